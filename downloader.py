@@ -2,18 +2,61 @@
 Módulo para gestionar la descarga de videos de YouTube.
 """
 
+import copy
+import functools
 import os
 import re
+import socket
 import threading
-from typing import Callable, Optional, Dict
+import time
+from typing import Callable, List, Optional, Dict, Set
 
-import yt_dlp
-
-from utils.config import obtener_directorio_descargas, FORMATO_VIDEO
+from utils.config import (
+    obtener_directorio_descargas, obtener_directorio_temporal, obtener_reglas_formato,
+    FORMATO_VIDEO, CALIDAD_REGLAS, CALIDAD_AUDIO_MP3, TIEMPO_ESPERA_SOCKET
+)
+from utils.ancho_banda import estimador_ancho_banda
+from utils.deduplicacion import HashIncremental, deduplicar
+from utils.espacio_disco import libro_reservas, calcular_necesidades, bytes_en_disco
+from utils.metadatos import obtener_info_video
+from utils.pipeline import etapa_descarga, etapa_postproceso
+from utils.postproceso import postprocesar, AUDIO_COPIA
+from utils.recortes import Tramo, descargar_tramo, describir_tramos, duracion_tramos, ffmpeg_disponible
+from utils.reintentos import (
+    clasificar_error, decidir_reintento, esperar, esperar_enfriamiento, registrar_exito,
+    DESCRIPCION_ERRORES, ERROR_CANCELADO
+)
+from utils.seleccion_formato import resolver_formato, tamano_formato, es_calidad_audio, extension_audio
+from utils.sesiones import sesion_youtube_dl, estadisticas_sesiones
+from utils.urls import clave_canonica, host_de_url
+from utils.vigilante import vigilante_estancamiento
 
 # Diccionario para almacenar eventos de cancelación para cada descarga
 _eventos_cancelacion: Dict[int, threading.Event] = {}
 
+# Descargas pausadas: el evento se activa al pedir la pausa y se limpia al reanudar
+_eventos_pausa: Dict[int, threading.Event] = {}
+
+# Descargas en una etapa que no se puede pausar -> motivo que se muestra al intentarlo
+_motivos_sin_pausa: Dict[int, str] = {}
+
+# Respuesta HTTP en curso de cada descarga, para cerrarla al cancelar
+_conexiones_activas: Dict[int, object] = {}
+
+# Descargas en curso por (clave canónica del video, calidad, tramos), para unir las repetidas
+_descargas_en_curso: Dict[tuple, "_DescargaCompartida"] = {}
+_lock_descargas_en_curso = threading.Lock()
+
+# Peticiones que terminaron con el archivo de otra descarga del mismo video
+_descargas_unidas: Set[int] = set()
+
+# Momento en que se pidió cada cancelación y latencias medidas hasta liberar los recursos
+_momentos_cancelacion: Dict[int, float] = {}
+_latencias_cancelacion: List[float] = []
+
+class DescargaPausadaError(Exception):
+    """Se lanza desde el hook de progreso para detener una descarga pausada."""
+
 def limpiar_nombre_archivo(nombre: str) -> str:
     """
     Limpia el nombre del archivo eliminando caracteres especiales que pueden
@@ -41,37 +84,86 @@ def limpiar_nombre_archivo(nombre: str) -> str:
     return nombre_limpio
 
 class ProgresoCallback:
-    """Clase para gestionar el callback de progreso de descarga."""
+    """
+    Clase para gestionar el callback de progreso de una descarga.
     
-    id_descarga = None
+    Se crea una instancia por descarga para que varias descargas simultáneas
+    no compartan el ID, el callback ni el host.
+    """
     
-    @staticmethod
-    def progreso_descarga(d: dict) -> None:
+    def __init__(self, id_descarga: int, callback: Optional[Callable[[float, float], None]] = None,
+                 host: str = ""):
+        """
+        Inicializa el callback de progreso.
+        
+        Args:
+            id_descarga: ID único de la descarga
+            callback: Función a la que notificar el porcentaje y la velocidad
+            host: Host del video, para registrar la velocidad medida
+        """
+        self.id_descarga = id_descarga
+        self.callback = callback
+        self.host = host
+        # Parte del progreso total que representa la parte en descarga
+        self.inicio_parte = 0.0
+        self.peso_parte = 1.0
+        # Hash del contenido, calculado a medida que se escriben los archivos
+        self.hash_contenido = HashIncremental()
+    
+    def _cancelada(self) -> bool:
+        """Indica si el usuario ha cancelado esta descarga."""
+        return (self.id_descarga in _eventos_cancelacion and 
+                _eventos_cancelacion[self.id_descarga].is_set())
+    
+    def _pausada(self) -> bool:
+        """Indica si el usuario ha pausado esta descarga."""
+        return (self.id_descarga in _eventos_pausa and 
+                _eventos_pausa[self.id_descarga].is_set())
+    
+    def _detenida(self) -> bool:
+        """Indica si hay que dejar de esperar: la descarga se canceló o se pausó."""
+        return self._cancelada() or self._pausada()
+    
+    def progreso_descarga(self, d: dict) -> None:
         """
         Función de callback para el progreso de la descarga.
         
         Args:
             d: Diccionario con información del progreso de descarga
         """
-        # Verificar si la descarga ha sido cancelada usando el ID almacenado
-        if (ProgresoCallback.id_descarga is not None and 
-            ProgresoCallback.id_descarga in _eventos_cancelacion and 
-            _eventos_cancelacion[ProgresoCallback.id_descarga].is_set()):
+        # Verificar si la descarga ha sido cancelada
+        if self._cancelada():
             # Señalizar la cancelación a yt-dlp
             raise Exception("Descarga cancelada por el usuario")
+        
+        if self._pausada():
+            # Detener la transferencia conservando el archivo parcial
+            raise DescargaPausadaError("Descarga pausada por el usuario")
+            
+        if d['status'] == 'finished':
+            # Completar el hash con los últimos bytes (el temporal ya tiene su nombre final)
+            self.hash_contenido.actualizar(d.get('filename'))
             
         if d['status'] == 'downloading':
+            # Informar del avance al vigilante e interrumpir si la dio por estancada
+            vigilante_estancamiento.alimentar(self.id_descarga, d.get('downloaded_bytes') or 0)
+            vigilante_estancamiento.comprobar(self.id_descarga)
+            
+            # Añadir al hash los bytes recién escritos
+            self.hash_contenido.actualizar(d.get('tmpfilename') or d.get('filename'))
+            
             # Extraer información de progreso
-            downloaded = d.get('downloaded_bytes', 0)
-            total = d.get('total_bytes', 0)
+            downloaded = d.get('downloaded_bytes') or 0
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
             
-            # Si no hay total_bytes, usar total_bytes_estimate
-            if total == 0:
-                total = d.get('total_bytes_estimate', 1)  # Usar 1 para evitar división por cero
+            # Si yt-dlp no conoce el total, estimarlo con la tasa de bits del formato
+            if not total:
+                info_formato = d.get('info_dict') or {}
+                total = tamano_formato(info_formato, info_formato.get('duration'))
             
             # Calcular el porcentaje
-            if total > 0:
-                porcentaje = (downloaded / total) * 100
+            if total:
+                porcentaje = min((downloaded / total) * 100, 100.0)
             else:
                 # Si no se puede obtener información de bytes, intentar con _percent_str
                 p_str = d.get('_percent_str', '0%')
@@ -80,10 +172,15 @@ class ProgresoCallback:
                 except ValueError:
                     porcentaje = 0
             
+            # Convertir el progreso de la parte actual al de la descarga completa
+            porcentaje = self.inicio_parte + porcentaje * self.peso_parte
+            
             # También podemos obtener la velocidad para mostrarla
             velocidad = d.get('speed', 0)
             if velocidad:
                 velocidad_mb = velocidad / 1048576  # Convertir a MB/s
+                # Alimentar la estimación de ancho de banda del host
+                estimador_ancho_banda.registrar(self.host, velocidad)
             else:
                 velocidad_mb = 0
             
@@ -91,19 +188,118 @@ class ProgresoCallback:
             print(f"Progreso: {porcentaje:.1f}%, Velocidad: {velocidad_mb:.2f} MB/s")
             
             # Llamar al callback con el porcentaje y la velocidad
-            if hasattr(ProgresoCallback, 'callback') and callable(ProgresoCallback.callback):
-                ProgresoCallback.callback(porcentaje, velocidad_mb)
+            if callable(self.callback):
+                self.callback(porcentaje, velocidad_mb)
             
             # Verificar cancelación después de cada actualización (para respuesta más rápida)
-            if (ProgresoCallback.id_descarga is not None and 
-                ProgresoCallback.id_descarga in _eventos_cancelacion and 
-                _eventos_cancelacion[ProgresoCallback.id_descarga].is_set()):
+            if self._cancelada():
                 raise Exception("Descarga cancelada por el usuario")
 
+class LoggerDescarga:
+    """
+    Logger para yt-dlp que, además de mostrar sus mensajes, comprueba si la
+    transferencia se estancó o se canceló.
+    
+    yt-dlp informa por el logger de los reintentos tras un corte o un tiempo
+    de espera agotado, que es justo cuando el hook de progreso no se llama.
+    """
+    
+    def __init__(self, id_descarga: int):
+        """
+        Inicializa el logger.
+        
+        Args:
+            id_descarga: ID único de la descarga
+        """
+        self.id_descarga = id_descarga
+    
+    def _comprobar(self) -> None:
+        """Interrumpe yt-dlp si la descarga se canceló o se estancó."""
+        evento = _eventos_cancelacion.get(self.id_descarga)
+        if evento is not None and evento.is_set():
+            raise Exception("Descarga cancelada por el usuario")
+        vigilante_estancamiento.comprobar(self.id_descarga)
+    
+    def debug(self, mensaje: str) -> None:
+        print(mensaje)
+        self._comprobar()
+    
+    def info(self, mensaje: str) -> None:
+        print(mensaje)
+    
+    def warning(self, mensaje: str) -> None:
+        print(mensaje)
+        self._comprobar()
+    
+    def error(self, mensaje: str) -> None:
+        print(mensaje)
+
+def _socket_de_respuesta(respuesta: object) -> Optional[socket.socket]:
+    """
+    Busca el socket de una respuesta HTTP de yt-dlp.
+    
+    Según el manejador que use yt-dlp (urllib, requests...) el socket está a
+    distinta profundidad, así que se recorren los atributos habituales.
+    
+    Args:
+        respuesta: Respuesta devuelta por YoutubeDL.urlopen
+    
+    Returns:
+        Socket de la conexión o None si no se encuentra
+    """
+    pendientes = [respuesta]
+    vistos = set()
+    while pendientes:
+        objeto = pendientes.pop()
+        if isinstance(objeto, socket.socket):
+            return objeto
+        if objeto is None or id(objeto) in vistos:
+            continue
+        vistos.add(id(objeto))
+        for atributo in ('fp', '_fp', 'raw', '_sock', 'sock', '_connection'):
+            pendientes.append(getattr(objeto, atributo, None))
+    return None
+
+def _cerrar_conexion(respuesta: object) -> None:
+    """
+    Corta una conexión en curso, despertando a un hilo bloqueado leyendo de ella.
+    
+    Cerrar la respuesta no basta: una lectura bloqueada en otro hilo sigue
+    esperando hasta el tiempo máximo del socket. shutdown() la despierta.
+    
+    Args:
+        respuesta: Respuesta devuelta por YoutubeDL.urlopen
+    """
+    conexion = _socket_de_respuesta(respuesta)
+    if conexion is not None:
+        try:
+            conexion.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    try:
+        respuesta.close()
+    except Exception as e:
+        print(f"Error al cerrar la conexión de la descarga: {str(e)}")
+
+def _cortar_conexion(id_descarga: int) -> None:
+    """
+    Corta la conexión en curso de una descarga, si tiene una abierta.
+    
+    Args:
+        id_descarga: ID de la descarga
+    """
+    respuesta = _conexiones_activas.get(id_descarga)
+    if respuesta is not None:
+        _cerrar_conexion(respuesta)
+
 def cancelar_descarga(id_descarga: int) -> bool:
     """
     Cancela una descarga en progreso.
     
+    Además de activar el evento que comprueban todas las etapas, cierra la
+    conexión en curso para que una lectura bloqueada no espere al siguiente
+    aviso de progreso.
+    
     Args:
         id_descarga: ID de la descarga a cancelar
     
@@ -112,41 +308,325 @@ def cancelar_descarga(id_descarga: int) -> bool:
     """
     if id_descarga in _eventos_cancelacion:
         print(f"Cancelando descarga con ID: {id_descarga}")
+        _momentos_cancelacion.setdefault(id_descarga, time.monotonic())
         _eventos_cancelacion[id_descarga].set()  # Activar evento de cancelación
+        _cortar_conexion(id_descarga)
         return True
     print(f"ID de descarga {id_descarga} no encontrado para cancelar")
     return False
 
-def descargar_video(url: str, progreso_callback: Optional[Callable[[float, float], None]] = None, 
-                   calidad: str = "", id_descarga: int = None) -> str:
+def _resolver_partes(pre_info: dict, opciones: dict) -> dict:
     """
-    Descarga un video de YouTube.
+    Resuelve los formatos concretos que se van a descargar, sin descargar nada.
     
     Args:
-        url: URL del video a descargar
-        progreso_callback: Función de callback para notificar el progreso
-        calidad: ID del formato a descargar (vacío para la mejor calidad)
-        id_descarga: ID único para la descarga
+        pre_info: Información del video ya extraída
+        opciones: Opciones de la descarga ('format' y 'merge_output_format')
         
     Returns:
-        Ruta donde se guardó el video
+        Info del formato seleccionado; si son varios formatos (video y audio)
+        incluye 'requested_formats' y la extensión del archivo unido
+    """
+    opciones_resolucion = {k: v for k, v in opciones.items()
+                           if k in ('format', 'merge_output_format')}
+    opciones_resolucion['quiet'] = True
+    with sesion_youtube_dl(opciones_resolucion) as ydl:
+        return ydl.process_ie_result(copy.deepcopy(pre_info), download=False)
+
+def _descargar_parte(pre_info: dict, formato: dict, opciones: dict, id_descarga: int) -> str:
+    """
+    Descarga un único formato (sin unir ni posprocesar).
+    
+    Args:
+        pre_info: Información del video ya extraída
+        formato: Formato a descargar (de 'requested_formats' o el seleccionado)
+        opciones: Opciones base de la descarga
+        id_descarga: ID único de la descarga
+        
+    Returns:
+        Ruta del archivo descargado
+    """
+    opciones_parte = dict(opciones)
+    opciones_parte['format'] = formato['format_id']
+    opciones_parte.pop('merge_output_format', None)
+    with sesion_youtube_dl(opciones_parte) as ydl:
+        # Anotar cada respuesta que abre la sesión para poder cerrarla al cancelar
+        urlopen_original = ydl.urlopen
         
+        def urlopen(peticion):
+            respuesta = urlopen_original(peticion)
+            _conexiones_activas[id_descarga] = respuesta
+            return respuesta
+        
+        ydl.urlopen = urlopen
+        try:
+            info = ydl.process_ie_result(copy.deepcopy(pre_info), download=True)
+        except BaseException:
+            # Una pausa o un error a mitad del cuerpo no cierra la respuesta:
+            # cortarla para no dejar la conexión abierta mientras se espera
+            _cortar_conexion(id_descarga)
+            raise
+        finally:
+            # Volver al método de la clase antes de devolver la sesión al grupo
+            del ydl.urlopen
+            _conexiones_activas.pop(id_descarga, None)
+    descargas = info.get('requested_downloads') or [info]
+    return descargas[0].get('filepath') or descargas[0]['_filename']
+
+class _DescargaCompartida:
+    """
+    Descarga en curso de un video y calidad, a la que pueden unirse otras peticiones.
+    
+    Attributes:
+        terminada: Se activa cuando la descarga termina (bien o mal)
+        resultado: Ruta del archivo descargado
+        error: Excepción con la que terminó la descarga
+    """
+    
+    def __init__(self):
+        """Inicializa la descarga sin interesados."""
+        self.terminada = threading.Event()
+        self.resultado: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self._progreso_callbacks: List[Callable[[float, float], None]] = []
+        self._estado_callbacks: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+    
+    def agregar(self, progreso_callback: Optional[Callable], estado_callback: Optional[Callable]) -> None:
+        """Añade los callbacks de una petición interesada en esta descarga."""
+        with self._lock:
+            if callable(progreso_callback):
+                self._progreso_callbacks.append(progreso_callback)
+            if callable(estado_callback):
+                self._estado_callbacks.append(estado_callback)
+    
+    def quitar(self, progreso_callback: Optional[Callable], estado_callback: Optional[Callable]) -> None:
+        """Quita los callbacks de una petición que deja de esperar."""
+        with self._lock:
+            if progreso_callback in self._progreso_callbacks:
+                self._progreso_callbacks.remove(progreso_callback)
+            if estado_callback in self._estado_callbacks:
+                self._estado_callbacks.remove(estado_callback)
+    
+    def notificar_progreso(self, porcentaje: float, velocidad: float) -> None:
+        """Reparte el progreso entre todas las peticiones."""
+        with self._lock:
+            callbacks = list(self._progreso_callbacks)
+        for callback in callbacks:
+            callback(porcentaje, velocidad)
+    
+    def notificar_estado(self, texto: str) -> None:
+        """Reparte el estado entre todas las peticiones."""
+        with self._lock:
+            callbacks = list(self._estado_callbacks)
+        for callback in callbacks:
+            callback(texto)
+
+def _unirse_a_descarga(compartida: _DescargaCompartida, id_descarga: Optional[int],
+                       progreso_callback: Optional[Callable], estado_callback: Optional[Callable]) -> Optional[str]:
+    """
+    Espera a que termine una descarga en curso del mismo video.
+    
+    La petición que se une puede cancelarse sin afectar a la descarga.
+    
+    Args:
+        compartida: Descarga en curso
+        id_descarga: ID de la petición que se une
+        progreso_callback: Callback de progreso de la petición
+        estado_callback: Callback de estado de la petición
+    
+    Returns:
+        Ruta del archivo descargado, o None si la descarga en curso se canceló
+    
     Raises:
-        Exception: Si ocurre un error durante la descarga
+        Exception: Si la descarga en curso falló o la petición se cancela
     """
-    # Asegurar que tenemos un ID de descarga
     if id_descarga is None:
         id_descarga = threading.get_ident()
+    _eventos_cancelacion[id_descarga] = threading.Event()
+    _motivos_sin_pausa[id_descarga] = "Unida a otra descarga del mismo video: no se puede pausar"
+    print(f"Descarga {id_descarga} unida a otra en curso del mismo video")
+    if callable(estado_callback):
+        estado_callback("Unida a una descarga en curso del mismo video")
+    
+    try:
+        while not compartida.terminada.wait(0.2):
+            if _eventos_cancelacion[id_descarga].is_set():
+                raise Exception("Descarga cancelada por el usuario")
+    finally:
+        compartida.quitar(progreso_callback, estado_callback)
+        _eventos_cancelacion.pop(id_descarga, None)
+        _momentos_cancelacion.pop(id_descarga, None)
+        _motivos_sin_pausa.pop(id_descarga, None)
+    
+    if compartida.error is not None:
+        if "cancelada por el usuario" in str(compartida.error).lower():
+            return None
+        raise Exception(str(compartida.error))
+    _descargas_unidas.add(id_descarga)
+    return compartida.resultado
+
+def _registrar_latencia_cancelacion(id_descarga: int) -> Optional[float]:
+    """
+    Mide el tiempo desde que se pidió la cancelación hasta liberar los recursos.
+    
+    Args:
+        id_descarga: ID de la descarga cancelada
+    
+    Returns:
+        Segundos transcurridos o None si no hubo petición de cancelación
+    """
+    momento = _momentos_cancelacion.pop(id_descarga, None)
+    if momento is None:
+        return None
+    latencia = time.monotonic() - momento
+    _latencias_cancelacion.append(latencia)
+    print(f"Descarga {id_descarga} cancelada: recursos liberados en {latencia:.2f} s "
+          f"(máximo de la sesión {max(_latencias_cancelacion):.2f} s)")
+    return latencia
+
+def estadisticas_cancelacion() -> dict:
+    """
+    Devuelve las latencias de cancelación medidas en esta sesión.
+    
+    Returns:
+        Diccionario con 'cancelaciones', 'media_s' y 'maxima_s'
+    """
+    latencias = list(_latencias_cancelacion)
+    return {
+        'cancelaciones': len(latencias),
+        'media_s': sum(latencias) / len(latencias) if latencias else 0.0,
+        'maxima_s': max(latencias) if latencias else 0.0,
+    }
+
+def pausar_descarga(id_descarga: int) -> bool:
+    """
+    Pausa una descarga en curso.
+    
+    La transferencia se detiene en el siguiente aviso de progreso, se cierra
+    su conexión, se libera su plaza y se conserva el archivo parcial para
+    continuar después. Si aún
+    no transfiere (obteniendo la información, esperando espacio, plaza o el
+    enfriamiento del host), deja de esperar y vuelve a hacerlo al reanudar.
+    
+    Args:
+        id_descarga: ID de la descarga a pausar
+    
+    Returns:
+        True si se pidió la pausa, False si la descarga no existe o está en
+        una etapa que no se puede pausar (ver motivo_sin_pausa)
+    """
+    if id_descarga in _eventos_pausa:
+        print(f"Pausando descarga con ID: {id_descarga}")
+        _eventos_pausa[id_descarga].set()
+        return True
+    return False
+
+def motivo_sin_pausa(id_descarga: int) -> Optional[str]:
+    """
+    Indica por qué una descarga no se puede pausar ahora.
+    
+    Args:
+        id_descarga: ID de la descarga
+    
+    Returns:
+        Motivo para mostrar al usuario, o None si no hay uno conocido
+    """
+    return _motivos_sin_pausa.get(id_descarga)
+
+def fue_unida(id_descarga: int) -> bool:
+    """
+    Indica si una descarga terminada obtuvo el archivo de otra del mismo video.
     
-    # Almacenar el ID en la clase de callback
-    ProgresoCallback.id_descarga = id_descarga
+    La respuesta se da una sola vez: después se olvida la descarga.
     
-    # Crear evento de cancelación para esta descarga
+    Args:
+        id_descarga: ID de la descarga
+    
+    Returns:
+        True si se unió a otra descarga en curso, False si descargó el video ella misma
+    """
+    if id_descarga in _descargas_unidas:
+        _descargas_unidas.discard(id_descarga)
+        return True
+    return False
+
+def reanudar_descarga(id_descarga: int) -> bool:
+    """
+    Reanuda una descarga pausada desde el byte en que se detuvo.
+    
+    Args:
+        id_descarga: ID de la descarga a reanudar
+    
+    Returns:
+        True si se reanudó, False si la descarga no existe
+    """
+    if id_descarga in _eventos_pausa:
+        print(f"Reanudando descarga con ID: {id_descarga}")
+        _eventos_pausa[id_descarga].clear()
+        return True
+    return False
+
+def _esperar_reanudacion(id_descarga: int) -> None:
+    """
+    Bloquea mientras la descarga siga pausada.
+    
+    Raises:
+        Exception: Si la descarga se cancela mientras está pausada
+    """
+    while _eventos_pausa[id_descarga].is_set():
+        if _eventos_cancelacion[id_descarga].wait(0.5):
+            raise Exception("Descarga cancelada por el usuario")
+
+def _descargar_video(url: str, progreso_callback: Optional[Callable[[float, float], None]] = None, 
+                     calidad: str = "", id_descarga: int = None,
+                     estado_callback: Optional[Callable[[str], None]] = None,
+                     intento_callback: Optional[Callable[[str], None]] = None,
+                     limite_velocidad: Optional[int] = None,
+                     clave_temporal: Optional[str] = None,
+                     segundo_plano: bool = False,
+                     tramos: Optional[List[Tramo]] = None) -> str:
+    """
+    Realiza la descarga de un video (los argumentos se describen en descargar_video).
+    
+    Returns:
+        Ruta donde se guardó el video
+    """
+    # Asegurar que tenemos un ID de descarga
+    if id_descarga is None:
+        id_descarga = threading.get_ident()
+    
+    # Crear eventos de cancelación y pausa para esta descarga
     _eventos_cancelacion[id_descarga] = threading.Event()
+    _eventos_pausa[id_descarga] = threading.Event()
     print(f"Registrando descarga con ID: {id_descarga}")
     
-    # Asignar el callback a la clase
-    ProgresoCallback.callback = progreso_callback
+    # Callback de progreso propio de esta descarga
+    progreso = ProgresoCallback(id_descarga, progreso_callback, host_de_url(url))
+    
+    def notificar_estado(texto: str) -> None:
+        if callable(estado_callback):
+            estado_callback(texto)
+    
+    def verificar_cancelacion() -> None:
+        if _eventos_cancelacion[id_descarga].is_set():
+            raise Exception("Descarga cancelada por el usuario")
+    
+    def esperar_pausada() -> None:
+        # La plaza ya está libre (o no se llegó a ocupar): esperar sin ocupar nada
+        notificar_estado("Pausado")
+        _esperar_reanudacion(id_descarga)
+        notificar_estado("Reanudando...")
+    
+    def esperar_pausable(espera: Callable[[Callable[[], bool]], object]):
+        # Esperas previas a la transferencia: una pausa las abandona y se repiten al reanudar
+        while True:
+            try:
+                return espera(progreso._detenida)
+            except Exception:
+                if progreso._cancelada() or not progreso._pausada():
+                    raise
+                esperar_pausada()
     
     if progreso_callback:
         progreso_callback(0.0, 0.0)  # Inicializa el progreso en 0%
@@ -158,69 +638,302 @@ def descargar_video(url: str, progreso_callback: Optional[Callable[[float, float
     if not os.path.exists(directorio_descargas):
         os.makedirs(directorio_descargas)
     
-    # Configurar el formato según la calidad seleccionada
-    formato_video = calidad if calidad else FORMATO_VIDEO
+    # Los parciales e intermedios van al directorio temporal (puede ser otro disco)
+    directorio_temporal = obtener_directorio_temporal()
     
-    # Nombre del archivo temporal
-    temp_filename = f"temp_download_{id_descarga}.%(ext)s"
+    # Nombre de los archivos temporales (uno por formato descargado)
+    temp_filename = f"temp_download_{clave_temporal or id_descarga}.f%(format_id)s.%(ext)s"
     extension = "mp4"  # Valor por defecto
     
-    # Método más simple: descargar primero con nombre temporal y luego renombrar
     opciones = {
-        'format': formato_video,
-        'outtmpl': os.path.join(directorio_descargas, temp_filename),
-        'progress_hooks': [ProgresoCallback.progreso_descarga],
+        'format': FORMATO_VIDEO,
+        'outtmpl': os.path.join(directorio_temporal, temp_filename),
+        'progress_hooks': [progreso.progreso_descarga],
+        'logger': LoggerDescarga(id_descarga),
+        'socket_timeout': TIEMPO_ESPERA_SOCKET,
+        # Los cortes y los 5xx los reintenta nuestra política (con espera y
+        # enfriamiento), no yt-dlp, que repite al instante; el .part se conserva
+        'retries': 0,
         'quiet': False,
         'no_warnings': False,
     }
+    if limite_velocidad:
+        opciones['ratelimit'] = limite_velocidad
     
     try:
-        with yt_dlp.YoutubeDL(opciones) as ydl:
-            # Extraer info antes de descargar para obtener el nombre y extensión
-            pre_info = ydl.extract_info(url, download=False)
-            extension = pre_info.get('ext', 'mp4')
-            
-            # Verificar cancelación antes de comenzar la descarga
-            if _eventos_cancelacion[id_descarga].is_set():
-                raise Exception("Descarga cancelada por el usuario")
+        # Obtener la info del video (de la caché si se precargó al pegar la URL)
+        pre_info = esperar_pausable(lambda detener: obtener_info_video(url, cancelada=detener))
+        
+        # Configurar el formato según la calidad seleccionada y los formatos del video
+        opciones['format'] = resolver_formato(calidad, pre_info)
+        contenedor = obtener_reglas_formato().get('contenedor')
+        if calidad == CALIDAD_REGLAS and contenedor:
+            opciones['merge_output_format'] = contenedor
+        
+        # Formatos concretos a descargar (video y audio por separado si hace falta unirlos)
+        seleccion = _resolver_partes(pre_info, opciones)
+        formatos = seleccion.get('requested_formats') or [seleccion]
+        extension = seleccion.get('ext', 'mp4')
+        
+        # Solo audio: la pista se lleva al contenedor propio de su códec (o se recodifica a MP3)
+        audio = None
+        if es_calidad_audio(calidad):
+            audio = 'mp3' if calidad == CALIDAD_AUDIO_MP3 else AUDIO_COPIA
+            extension = extension_audio(calidad, formatos[0])
+        
+        # Peso de cada parte en el progreso total, según su tamaño estimado
+        duracion = pre_info.get('duration')
+        tamanos = [tamano_formato(f, duracion) or 0 for f in formatos]
+        total = sum(tamanos)
+        pesos = [t / total if total else 1 / len(formatos) for t in tamanos]
+        
+        # Cada parte es una tarea que descarga un archivo: un formato, o un tramo del recorte
+        clave_archivos = clave_temporal or id_descarga
+        if tramos:
+            # Los tramos sin fin llegan hasta el final del video
+            tramos = [(inicio, fin if fin is not None else duracion) for inicio, fin in tramos]
+            segundos_tramos = duracion_tramos(tramos, duracion)
+            # Solo se transfieren los bytes de los tramos: el tamaño es proporcional a su duración
+            if duracion and segundos_tramos is not None:
+                tamanos = [t * segundos_tramos / duracion for t in tamanos]
+            longitudes = [(fin - inicio) if fin is not None else 0 for inicio, fin in tramos]
+            pesos = [longitud / sum(longitudes) if sum(longitudes) else 1 / len(tramos) for longitud in longitudes]
+            tareas = [
+                functools.partial(
+                    descargar_tramo, formatos, tramo,
+                    os.path.join(directorio_temporal,
+                                 f"temp_download_{clave_archivos}.t{indice}.{seleccion.get('ext', 'mp4')}"),
+                    progreso.progreso_descarga)
+                for indice, tramo in enumerate(tramos)
+            ]
+        else:
+            tareas = [functools.partial(_descargar_parte, pre_info, formato, opciones, id_descarga)
+                      for formato in formatos]
+        
+        # Reservar el espacio en disco antes de ocupar una plaza (si se conoce el tamaño)
+        necesidades = {}
+        if all(tamanos):
+            necesidades = calcular_necesidades(sum(tamanos), directorio_temporal, directorio_descargas,
+                                               len(formatos))
+            notificar_estado("Comprobando espacio en disco...")
+        
+        def escritos_en_disco() -> Dict[str, int]:
+            # Parciales (también los de un intento anterior) y archivo unido de esta descarga
+            prefijos = [f"temp_download_{clave_archivos}.", f"temp_download_{id_descarga}."]
+            return {directorio_temporal: bytes_en_disco(directorio_temporal, prefijos)}
+        
+        esperar_pausable(lambda detener: libro_reservas.reservar(id_descarga, necesidades, detener,
+                                                                 escritos_en_disco))
+        try:
+            partes = [None] * len(tareas)
+            parte_en_hash = 0  # parte cuyos bytes está leyendo el hash
+            intento = 1
+            while True:
+                # Respetar el enfriamiento del host antes de pedir plaza
+                esperar_pausable(lambda detener: esperar_enfriamiento(progreso.host, detener, estado_callback))
+                
+                # Etapa de descarga: solo la transferencia de bytes
+                notificar_estado("En espera...")
+                try:
+                    with etapa_descarga.ocupar(progreso._detenida, segundo_plano):
+                        verificar_cancelacion()
+                        if progreso._pausada():
+                            raise DescargaPausadaError("Descarga pausada por el usuario")
+                        for indice, (tarea, peso) in enumerate(zip(tareas, pesos)):
+                            if partes[indice]:
+                                continue  # Parte ya terminada en un intento anterior
+                            if indice != parte_en_hash:
+                                progreso.hash_contenido.nueva_parte()
+                                parte_en_hash = indice
+                            progreso.inicio_parte = sum(pesos[:indice]) * 100
+                            progreso.peso_parte = peso
+                            # Si ya hay bytes de un intento anterior, yt-dlp continúa desde ahí
+                            vigilante_estancamiento.registrar(
+                                id_descarga, progreso.host, estado_callback,
+                                functools.partial(_cortar_conexion, id_descarga))
+                            try:
+                                partes[indice] = tarea()
+                            except Exception:
+                                # Si el vigilante cortó la conexión, el error es el estancamiento
+                                vigilante_estancamiento.comprobar(id_descarga)
+                                raise
+                            finally:
+                                vigilante_estancamiento.quitar(id_descarga)
+                            verificar_cancelacion()
+                    registrar_exito(progreso.host)
+                    break
+                except Exception as error:
+                    if progreso._cancelada():
+                        # El error es el socket cortado al cancelar: no reintentar
+                        raise Exception("Descarga cancelada por el usuario") from error
+                    if isinstance(error, DescargaPausadaError) or progreso._pausada():
+                        # Pausada transfiriendo o esperando plaza: la plaza ya se liberó.
+                        # Al reanudar, yt-dlp pide los bytes restantes desde el final del .part
+                        esperar_pausada()
+                        continue
+                    espera = decidir_reintento(error, intento, progreso.host)
+                    tipo = DESCRIPCION_ERRORES[clasificar_error(error)]
+                    registro = f"Intento {intento}: {tipo} ({str(error)[:80]})"
+                    if callable(intento_callback) and clasificar_error(error) != ERROR_CANCELADO:
+                        intento_callback(registro)
+                    if espera is None:
+                        if intento > 1:
+                            raise Exception(f"{str(error)} (tras {intento} intentos)") from error
+                        raise
+                    print(f"{registro}; reintentando en {espera:.1f} s")
+                    notificar_estado(f"Reintento {intento} en {espera:.0f} s: {tipo}")
+                    esperar(espera, progreso._cancelada)
+                    intento += 1
             
-            # Iniciar la descarga
-            info = ydl.extract_info(url, download=True)
+            # Conservar la velocidad medida para las próximas descargas
+            estimador_ancho_banda.guardar()
             
             # Generar nombre limpio
-            titulo_original = info['title']
+            titulo_original = seleccion['title']
+            if tramos:
+                # El recorte no sustituye al video completo si también se descarga
+                titulo_original = f"{titulo_original} [{describir_tramos(tramos).replace(':', '.')}]"
             titulo_limpio = limpiar_nombre_archivo(titulo_original)
             
             # Rutas de archivo
-            ruta_temporal = os.path.join(directorio_descargas, f"temp_download_{id_descarga}.{extension}")
+            ruta_temporal = os.path.join(directorio_temporal, f"temp_download_{id_descarga}.{extension}")
             ruta_final = os.path.join(directorio_descargas, f"{titulo_limpio}.{extension}")
             
-            # Renombrar el archivo
-            if os.path.exists(ruta_temporal):
-                # Si existe un archivo con el mismo nombre final, lo eliminamos
-                if os.path.exists(ruta_final):
-                    os.remove(ruta_final)
-                os.rename(ruta_temporal, ruta_final)
+            # El posprocesamiento es local y breve: ya no se puede pausar
+            _motivos_sin_pausa[id_descarga] = "Ya se está finalizando: no se puede pausar"
+            if _eventos_pausa.pop(id_descarga).is_set():
+                print(f"Pausa de la descarga {id_descarga} ignorada: ya se está finalizando")
             
-            # Limpiar el evento de cancelación ya que la descarga se completó
-            if id_descarga in _eventos_cancelacion:
-                del _eventos_cancelacion[id_descarga]
-                
-            return ruta_final
+            # Etapa de posprocesamiento: unión, metadatos y colocación final en otro proceso
+            if audio:
+                notificar_estado("Extrayendo el audio..." if audio == AUDIO_COPIA else "Convirtiendo el audio...")
+            else:
+                notificar_estado("Uniendo video y audio..." if len(partes) > 1 else "Finalizando...")
+            with etapa_postproceso.ocupar(progreso._cancelada):
+                verificar_cancelacion()
+                ruta_final = postprocesar(partes, ruta_temporal, ruta_final, titulo_original,
+                                          progreso._cancelada, audio, concatenar=bool(tramos))
+        finally:
+            libro_reservas.liberar(id_descarga)
+        
+        # Si el contenido ya estaba en la biblioteca, enlazarlo en lugar de duplicarlo
+        # (los recortes se vuelven a escribir con ffmpeg: su hash no es el de los bytes recibidos)
+        if not tramos:
+            deduplicar(ruta_final, progreso.hash_contenido.resultado(
+                len(partes), os.path.splitext(ruta_final)[1].lstrip('.'), titulo_original, audio))
+        
+        # Informar del tiempo ahorrado al reutilizar sesiones de yt-dlp
+        estadisticas = estadisticas_sesiones()
+        print(f"Sesiones de yt-dlp: {estadisticas['creadas']} creadas, "
+              f"{estadisticas['reutilizadas']} reutilizadas, "
+              f"ahorro estimado {estadisticas['ahorro_ms']:.0f} ms")
+        
+        # Limpiar los eventos ya que la descarga se completó
+        _eventos_cancelacion.pop(id_descarga, None)
+        _eventos_pausa.pop(id_descarga, None)
+        _momentos_cancelacion.pop(id_descarga, None)
+        _motivos_sin_pausa.pop(id_descarga, None)
+            
+        return ruta_final
     except Exception as e:
         print(f"Error durante la descarga (ID: {id_descarga}): {str(e)}")
         
         # Limpiar archivos parciales si fue cancelada
         try:
-            archivo_parcial = os.path.join(directorio_descargas, f"temp_download_{id_descarga}.{extension}")
+            archivo_parcial = os.path.join(directorio_temporal, f"temp_download_{id_descarga}.{extension}")
             if os.path.exists(archivo_parcial):
                 # No eliminamos automáticamente, dejamos que el gestor lo decida
                 pass
         except Exception as clean_error:
             print(f"Error al manejar archivo parcial: {str(clean_error)}")
         
-        # Limpiar el evento de cancelación
-        if id_descarga in _eventos_cancelacion:
-            del _eventos_cancelacion[id_descarga]
+        # Limpiar los eventos de cancelación y pausa
+        _eventos_cancelacion.pop(id_descarga, None)
+        _eventos_pausa.pop(id_descarga, None)
+        _motivos_sin_pausa.pop(id_descarga, None)
+        
+        # Al llegar aquí ya se liberaron la plaza, la reserva de disco y la conexión
+        latencia = _registrar_latencia_cancelacion(id_descarga)
+        if latencia is not None and "cancelada por el usuario" in str(e).lower():
+            raise Exception(f"Descarga cancelada por el usuario (en {latencia:.1f} s)") from e
             
         raise
+
+def descargar_video(url: str, progreso_callback: Optional[Callable[[float, float], None]] = None, 
+                   calidad: str = "", id_descarga: int = None,
+                   estado_callback: Optional[Callable[[str], None]] = None,
+                   intento_callback: Optional[Callable[[str], None]] = None,
+                   limite_velocidad: Optional[int] = None,
+                   clave_temporal: Optional[str] = None,
+                   segundo_plano: bool = False,
+                   tramos: Optional[List[Tramo]] = None) -> str:
+    """
+    Descarga un video de YouTube.
+    
+    La transferencia ocupa una plaza de la etapa de descarga, que se libera en
+    cuanto llegan los bytes; la unión de video y audio y el renombrado final se
+    hacen después en la etapa de posprocesamiento, en otro proceso.
+    
+    Los errores transitorios se reintentan (sin ocupar plaza durante la espera)
+    continuando desde los bytes ya descargados.
+    
+    Si ya hay una descarga en curso del mismo video y la misma calidad, esta
+    se une a ella: recibe su progreso y su resultado sin abrir otra
+    transferencia ni escribir otro archivo.
+    
+    Args:
+        url: URL del video a descargar
+        progreso_callback: Función de callback para notificar el progreso
+        calidad: ID del formato a descargar (vacío para la mejor calidad,
+                 CALIDAD_REGLAS para elegirlo según las reglas de formato,
+                 CALIDAD_AUDIO o CALIDAD_AUDIO_MP3 para descargar solo el audio)
+        id_descarga: ID único para la descarga
+        estado_callback: Función a la que notificar la etapa en curso
+        intento_callback: Función a la que notificar cada intento fallido
+        limite_velocidad: Velocidad máxima en bytes por segundo (None sin límite)
+        clave_temporal: Nombre fijo para los archivos parciales (por defecto el
+                        ID de la descarga); permite continuarlos tras un reinicio
+        segundo_plano: Si es True, solo ocupa una plaza de descarga cuando no
+                       hay descargas en primer plano esperando
+        tramos: Tramos (inicio, fin) en segundos a los que limitar la descarga;
+                el archivo final los contiene uno tras otro. Sin ffmpeg no se
+                pueden recortar y se descarga el video completo
+        
+    Returns:
+        Ruta donde se guardó el video
+        
+    Raises:
+        Exception: Si ocurre un error durante la descarga
+    """
+    if tramos and not ffmpeg_disponible():
+        print(f"No se encontró ffmpeg, se descarga el video completo en lugar de los tramos: {url}")
+        tramos = None
+    
+    clave = (clave_canonica(url), calidad, tuple(tramos or ()))
+    while True:
+        with _lock_descargas_en_curso:
+            compartida = _descargas_en_curso.get(clave)
+            propia = compartida is None
+            if propia:
+                compartida = _descargas_en_curso[clave] = _DescargaCompartida()
+            compartida.agregar(progreso_callback, estado_callback)
+        if propia:
+            break
+        ruta = _unirse_a_descarga(compartida, id_descarga, progreso_callback, estado_callback)
+        if ruta is not None:
+            return ruta
+        # La descarga a la que se unió se canceló: hacerla por cuenta propia
+    
+    try:
+        ruta = _descargar_video(url, compartida.notificar_progreso, calidad, id_descarga,
+                                compartida.notificar_estado, intento_callback,
+                                limite_velocidad, clave_temporal, segundo_plano, tramos)
+        compartida.resultado = ruta
+        return ruta
+    except BaseException as e:
+        compartida.error = e
+        raise
+    finally:
+        with _lock_descargas_en_curso:
+            _descargas_en_curso.pop(clave, None)
+        compartida.terminada.set()
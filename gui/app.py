@@ -13,7 +13,12 @@ from gui.components.input_panel import InputPanel
 from gui.components.active_downloads import ActiveDownloadsPanel
 from gui.components.completed_downloads import CompletedDownloadsPanel
 from gui.components.folder_controls import FolderControls
+from gui.components.suscripciones import VentanaSuscripciones
+from gui.components.fallos import VentanaFallos
 from gui.utils.ui_helpers import centrar_ventana
+from utils.metadatos import cerrar_pool_extraccion
+from utils.postproceso import cerrar_pool_postproceso
+from utils.sesiones import cerrar_sesiones
 
 class YoutubeDownloaderApp:
     """
@@ -42,7 +47,8 @@ class YoutubeDownloaderApp:
             self.ventana, 
             self.active_downloads.frame, 
             self.completed_downloads.frame,
-            self.completed_downloads.actualizar_contador
+            self.completed_downloads.actualizar_contador,
+            self.active_downloads.actualizar_ocupacion
         )
         
         # Conectar eventos entre componentes
@@ -79,22 +85,39 @@ class YoutubeDownloaderApp:
         """Conecta los eventos entre los diferentes componentes."""
         # Conectar botón de descarga con el gestor de descargas
         self.input_panel.set_download_callback(self._iniciar_descarga)
+        self.input_panel.set_programar_callback(self.download_manager.programar_descarga)
+        self.input_panel.set_importar_callback(self.download_manager.importar_urls)
+        
+        # Ventana de suscripciones, que sincroniza a través del gestor de descargas
+        self.active_downloads.set_suscripciones_callback(
+            lambda: VentanaSuscripciones(self.ventana, self.download_manager.sincronizar_suscripciones))
+        
+        # Ventana de fallos, que reintenta a través del gestor de descargas
+        self.active_downloads.set_fallos_callback(
+            lambda: VentanaFallos(self.ventana, self.download_manager.reintentar_fallos))
     
-    def _iniciar_descarga(self, url, calidad=""):
+    def _iniciar_descarga(self, url, calidad="", tramos=None):
         """
         Callback para el botón de descarga.
         
         Args:
             url: URL del video a descargar
             calidad: ID del formato de calidad seleccionado (opcional)
+            tramos: Tramos (inicio, fin) en segundos a los que limitar la descarga (opcional)
         """
         if url:
             # Iniciar la descarga a través del gestor, pasando la calidad seleccionada
-            self.download_manager.iniciar_descarga(url, calidad)
+            self.download_manager.iniciar_descarga(url, calidad, tramos=tramos)
     
     def iniciar(self):
         """Inicia el bucle principal de la aplicación."""
-        self.ventana.mainloop()
+        try:
+            self.ventana.mainloop()
+        finally:
+            # Detener los procesos auxiliares y las sesiones de yt-dlp
+            cerrar_pool_extraccion()
+            cerrar_pool_postproceso()
+            cerrar_sesiones()
     
     def _configurar_desplazamiento_global(self):
         """
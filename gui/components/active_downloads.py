@@ -19,6 +19,8 @@ class ActiveDownloadsPanel:
             parent: Widget padre donde se colocará este panel
         """
         self.parent = parent
+        self.suscripciones_callback = None
+        self.fallos_callback = None
         self._crear_panel()
     
     def _crear_panel(self):
@@ -41,9 +43,59 @@ class ActiveDownloadsPanel:
         # Etiqueta de título para la sección
         tk.Label(frame_titulo, text="Descargas activas:", anchor="w", 
                 font=("Helvetica", 10, "bold")).pack(side=tk.LEFT, pady=(0, 2))
+        
+        # Ocupación de las etapas de descarga y posprocesamiento
+        self.ocupacion_var = tk.StringVar(value="")
+        tk.Label(frame_titulo, textvariable=self.ocupacion_var, anchor="e",
+                font=("Helvetica", 8), fg="gray").pack(side=tk.RIGHT, pady=(0, 2))
+        
+        # Acceso a las suscripciones a canales y listas
+        tk.Button(frame_titulo, text="Suscripciones", font=("Helvetica", 8), relief=tk.FLAT,
+                  cursor="hand2", command=self._abrir_suscripciones).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Acceso a las descargas fallidas
+        tk.Button(frame_titulo, text="Fallos", font=("Helvetica", 8), relief=tk.FLAT,
+                  cursor="hand2", command=self._abrir_fallos).pack(side=tk.LEFT)
                 
         # Se podría agregar aquí un botón para cancelar todas las descargas si se necesita
     
+    def _abrir_suscripciones(self):
+        """Llama al callback que abre la ventana de suscripciones."""
+        if self.suscripciones_callback:
+            self.suscripciones_callback()
+    
+    def _abrir_fallos(self):
+        """Llama al callback que abre la ventana de descargas fallidas."""
+        if self.fallos_callback:
+            self.fallos_callback()
+    
+    def set_fallos_callback(self, callback):
+        """
+        Establece el callback que abre la ventana de descargas fallidas.
+        
+        Args:
+            callback: Función sin argumentos
+        """
+        self.fallos_callback = callback
+    
+    def set_suscripciones_callback(self, callback):
+        """
+        Establece el callback que abre la ventana de suscripciones.
+        
+        Args:
+            callback: Función sin argumentos
+        """
+        self.suscripciones_callback = callback
+    
+    def actualizar_ocupacion(self, texto):
+        """
+        Muestra la ocupación de las etapas.
+        
+        Args:
+            texto: Resumen de la ocupación de cada etapa
+        """
+        self.ocupacion_var.set(texto)
+    
     def _crear_contenedor(self):
         """Crea el contenedor con scroll para las descargas activas."""
         frame_contenedor = tk.Frame(self.parent)
@@ -8,6 +8,10 @@ from datetime import datetime
 import os
 import platform
 import subprocess
+import time
+from PIL import Image, ImageTk
+
+from gui.utils.ui_helpers import formatear_duracion
 
 class DescargarItem:
     """
@@ -22,9 +26,14 @@ class DescargarItem:
     COLOR_BOTON_CANCELAR = "#ff8c00"  # Naranja para botón cancelar
     COLOR_BOTON_HOVER = "#ff3333"  # Rojo más intenso para hover
     
+    # Parámetros de la estimación del tiempo restante
+    INTERVALO_MUESTRA_ETA = 1.0  # segundos entre muestras del ritmo de avance
+    FACTOR_SUAVIZADO_ETA = 0.2  # peso de cada nueva muestra
+    
     def __init__(self, parent, url, nombre="", es_descarga_activa=True, 
                  ruta_archivo=None, tamano_archivo="", fecha_descarga=None,
-                 on_eliminar_callback=None, on_cancelar_callback=None, id_descarga=None):
+                 on_eliminar_callback=None, on_cancelar_callback=None, id_descarga=None,
+                 on_pausar_callback=None, on_reanudar_callback=None):
         """
         Inicializa un nuevo elemento de descarga.
         
@@ -39,6 +48,8 @@ class DescargarItem:
             on_eliminar_callback: Función a llamar cuando se solicita eliminar el elemento
             on_cancelar_callback: Función a llamar cuando se solicita cancelar la descarga
             id_descarga: ID de la descarga para identificarla (proporcionado por DownloadManager)
+            on_pausar_callback: Función a llamar cuando se solicita pausar la descarga
+            on_reanudar_callback: Función a llamar cuando se solicita reanudar la descarga
         """
         self.parent = parent
         self.url = url
@@ -50,6 +61,11 @@ class DescargarItem:
         self.on_eliminar_callback = on_eliminar_callback
         self.on_cancelar_callback = on_cancelar_callback
         self.id_descarga = id_descarga  # Guardar el ID de descarga
+        self.on_pausar_callback = on_pausar_callback
+        self.on_reanudar_callback = on_reanudar_callback
+        self.pausada = False
+        self.motivo_sin_pausa = None  # Por qué no se puede pausar en la etapa actual
+        self.intentos = []  # Historial de intentos fallidos de la descarga
         
         # Crear widgets
         self._crear_widgets()
@@ -95,6 +111,9 @@ class DescargarItem:
         info_label = tk.Label(self.frame, textvariable=self.info_var, anchor="w", font=("Helvetica", 8))
         info_label.grid(row=2, column=0, sticky="w", padx=5)
         
+        # El historial de intentos se consulta pasando el ratón sobre el estado
+        self._create_tooltip(info_label, lambda: "\n".join(self.intentos))
+        
         # Fecha/hora
         fecha_hora = datetime.now().strftime("%d/%m/%Y %H:%M")
         fecha_label = tk.Label(self.frame, text=f"Iniciado: {fecha_hora}", anchor="e", font=("Helvetica", 8))
@@ -104,6 +123,10 @@ class DescargarItem:
         if self.on_cancelar_callback:
             self._crear_boton_cancelar()
         
+        # Botón de pausa/reanudación
+        if self.on_pausar_callback and self.on_reanudar_callback:
+            self._crear_boton_pausa()
+        
         # Configurar grid
         self.frame.columnconfigure(0, weight=1)
         self.frame.columnconfigure(1, weight=1)
@@ -202,9 +225,91 @@ class DescargarItem:
         # Añadir tooltip (mensaje emergente)
         self._create_tooltip(self.boton_cancelar, "Cancelar descarga")
     
+    def _cargar_icono(self, nombre):
+        """
+        Carga un icono de la carpeta assets a tamaño de botón.
+        
+        Args:
+            nombre: Nombre del archivo del icono
+        
+        Returns:
+            Imagen para Tkinter o None si no se pudo cargar
+        """
+        try:
+            img_original = Image.open(os.path.join("assets", nombre))
+            return ImageTk.PhotoImage(img_original.resize((16, 16), Image.LANCZOS))
+        except Exception as e:
+            print(f"Error al cargar ícono {nombre}: {str(e)}")
+            return None
+    
+    def _crear_boton_pausa(self):
+        """Crea el botón para pausar y reanudar la descarga, junto al de cancelar."""
+        boton_frame = tk.Frame(self.frame)
+        boton_frame.place(relx=1.0, x=-30, y=0, anchor="ne")
+        
+        self.icono_pausar = self._cargar_icono("pausar.png")
+        self.icono_reanudar = self._cargar_icono("reanudar.png")
+        
+        self.boton_pausa = tk.Button(
+            boton_frame,
+            relief=tk.FLAT,
+            cursor="hand2",
+            command=self._alternar_pausa
+        )
+        self.boton_pausa.pack(padx=1, pady=1)
+        self._create_tooltip(self.boton_pausa, lambda: self.motivo_sin_pausa
+                             or ("Reanudar descarga" if self.pausada else "Pausar descarga"))
+        self.mostrar_pausa(False)
+    
+    def _alternar_pausa(self):
+        """Pausa la descarga si está en curso o la reanuda si está pausada."""
+        if not self.id_descarga:
+            return
+        if self.pausada:
+            self.on_reanudar_callback(self.id_descarga)
+        else:
+            self.on_pausar_callback(self.id_descarga)
+    
+    def desactivar_pausa(self, motivo):
+        """
+        Desactiva el botón de pausa en una etapa que no se puede pausar.
+        
+        Args:
+            motivo: Explicación que se muestra en el tooltip del botón
+        """
+        self.motivo_sin_pausa = motivo
+        if hasattr(self, 'boton_pausa'):
+            self.boton_pausa.config(state=tk.DISABLED)
+    
+    def mostrar_pausa(self, pausada):
+        """
+        Actualiza el botón según la descarga esté pausada o no.
+        
+        Args:
+            pausada: True si la descarga está pausada
+        """
+        self.pausada = pausada
+        # Al reanudar, el ritmo de avance anterior a la pausa ya no sirve para estimar
+        self._ultimo_avance = None
+        if not hasattr(self, 'boton_pausa'):
+            return
+        icono = self.icono_reanudar if pausada else self.icono_pausar
+        if icono:
+            self.boton_pausa.config(image=icono, text="")
+        else:
+            self.boton_pausa.config(text="▶" if pausada else "⏸", font=("Helvetica", 9, "bold"), width=2)
+    
     def _create_tooltip(self, widget, text):
-        """Crea un tooltip (mensaje emergente) para un widget."""
+        """
+        Crea un tooltip (mensaje emergente) para un widget.
+        
+        'text' puede ser una función que devuelva el texto al mostrarlo; si
+        devuelve una cadena vacía no se muestra nada.
+        """
         def enter(event):
+            texto = text() if callable(text) else text
+            if not texto:
+                return
             x, y, _, _ = widget.bbox("insert")
             x += widget.winfo_rootx() + 25
             y += widget.winfo_rooty() + 20
@@ -215,7 +320,7 @@ class DescargarItem:
             self.tooltip.wm_geometry(f"+{x}+{y}")
             
             label = tk.Label(
-                self.tooltip, text=text, bg="#FFFFDD", 
+                self.tooltip, text=texto, bg="#FFFFDD", justify=tk.LEFT,
                 relief=tk.SOLID, borderwidth=1,
                 font=("Helvetica", 8), padx=2, pady=1
             )
@@ -325,16 +430,66 @@ class DescargarItem:
     
     def actualizar(self, porcentaje, velocidad=0):
         """
-        Actualiza el progreso y la velocidad de descarga.
+        Actualiza el progreso, la velocidad y el tiempo restante de la descarga.
         """
         if hasattr(self, 'progreso'):
             self.progreso['value'] = porcentaje
             
             # Actualizar etiqueta de información
+            texto = f"{porcentaje:.1f}%"
             if velocidad > 0:
-                self.info_var.set(f"{porcentaje:.1f}% - {velocidad:.2f} MB/s")
+                texto += f" - {velocidad:.2f} MB/s"
+            eta = self._estimar_tiempo_restante(porcentaje)
+            if eta is not None:
+                texto += f" - quedan {formatear_duracion(eta)}"
+            self.info_var.set(texto)
+    
+    def registrar_intento(self, registro):
+        """
+        Añade un intento fallido al historial de la descarga.
+        
+        Args:
+            registro: Descripción del intento y su error
+        """
+        self.intentos.append(registro)
+        self.info_var.set(f"{registro[:60]} (reintentando)")
+    
+    def _estimar_tiempo_restante(self, porcentaje):
+        """
+        Estima los segundos restantes con una media móvil del ritmo de avance.
+        
+        Se suaviza el avance (en % por segundo) en lugar de usar la velocidad
+        instantánea, para que el tiempo mostrado no salte con cada actualización.
+        
+        Args:
+            porcentaje: Porcentaje de progreso actual (0-100)
+        
+        Returns:
+            Segundos restantes estimados o None si aún no hay datos suficientes
+        """
+        ahora = time.time()
+        anterior = getattr(self, '_ultimo_avance', None)
+        
+        # Primera muestra o reinicio del porcentaje (p. ej. al pasar del video al audio)
+        if anterior is None or porcentaje < anterior[1]:
+            self._ultimo_avance = (ahora, porcentaje)
+            self._ritmo_avance = None
+            return None
+        
+        momento_anterior, porcentaje_anterior = anterior
+        transcurrido = ahora - momento_anterior
+        if transcurrido >= self.INTERVALO_MUESTRA_ETA:
+            ritmo = (porcentaje - porcentaje_anterior) / transcurrido
+            if self._ritmo_avance is None:
+                self._ritmo_avance = ritmo
             else:
-                self.info_var.set(f"{porcentaje:.1f}%")
+                self._ritmo_avance = (self.FACTOR_SUAVIZADO_ETA * ritmo + 
+                                      (1 - self.FACTOR_SUAVIZADO_ETA) * self._ritmo_avance)
+            self._ultimo_avance = (ahora, porcentaje)
+        
+        if not self._ritmo_avance or self._ritmo_avance <= 0:
+            return None
+        return (100 - porcentaje) / self._ritmo_avance
     
     def completado(self, nombre, ruta_archivo, tamano_archivo="", fecha_descarga=None):
         """
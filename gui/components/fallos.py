@@ -0,0 +1,126 @@
+"""
+Ventana con las descargas fallidas, para revisarlas y reintentarlas en bloque.
+"""
+
+import time
+import tkinter as tk
+from tkinter import ttk, Toplevel
+from typing import Callable, List
+
+from gui.utils.ui_helpers import centrar_ventana
+from utils.fallos import listar_fallos, quitar_fallo, contar_fallos, DESCRIPCION_FALLOS
+
+# Opción del filtro que muestra todas las clases
+_TODAS = "Todas"
+
+class VentanaFallos:
+    """
+    Ventana con la tabla de fallos, un filtro por clase y botones para reintentar.
+    """
+
+    def __init__(self, parent, reintentar_callback: Callable[[List[dict]], None]):
+        """
+        Crea y muestra la ventana.
+
+        Args:
+            parent: Ventana sobre la que se mostrará
+            reintentar_callback: Función que vuelve a encolar una lista de fallos
+        """
+        self.reintentar_callback = reintentar_callback
+        self.fallos: List[dict] = []
+
+        self.ventana = Toplevel(parent)
+        self.ventana.title("Descargas fallidas")
+        centrar_ventana(self.ventana, 600, 360)
+        self.ventana.transient(parent)
+        self.ventana.grab_set()
+
+        self._crear_widgets()
+        self._actualizar_tabla()
+
+    def _crear_widgets(self):
+        """Crea el filtro, la tabla y los botones de la ventana."""
+        frame_filtro = tk.Frame(self.ventana)
+        frame_filtro.pack(fill=tk.X, padx=15, pady=(15, 5))
+        tk.Label(frame_filtro, text="Mostrar:").pack(side=tk.LEFT)
+
+        # Filtro por clase de fallo (con la descripción visible)
+        self._clases_por_texto = {texto: clase for clase, texto in DESCRIPCION_FALLOS.items()}
+        self.filtro_var = tk.StringVar(value=_TODAS)
+        filtro = ttk.Combobox(frame_filtro, textvariable=self.filtro_var, state="readonly", width=25,
+                              values=[_TODAS] + list(DESCRIPCION_FALLOS.values()))
+        filtro.pack(side=tk.LEFT, padx=5)
+        filtro.bind("<<ComboboxSelected>>", lambda event: self._actualizar_tabla())
+
+        self.resumen_var = tk.StringVar()
+        tk.Label(frame_filtro, textvariable=self.resumen_var, font=("Helvetica", 8),
+                 fg="gray").pack(side=tk.RIGHT)
+
+        frame_tabla = tk.Frame(self.ventana)
+        frame_tabla.pack(fill=tk.BOTH, expand=True, padx=15)
+        scrollbar = tk.Scrollbar(frame_tabla)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tabla = ttk.Treeview(
+            frame_tabla,
+            columns=("url", "clase", "intentos", "fecha"),
+            show="headings",
+            selectmode="extended",
+            yscrollcommand=scrollbar.set
+        )
+        self.tabla.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.tabla.yview)
+
+        self.tabla.heading("url", text="URL")
+        self.tabla.heading("clase", text="Causa")
+        self.tabla.heading("intentos", text="Intentos")
+        self.tabla.heading("fecha", text="Último fallo")
+        self.tabla.column("url", width=250)
+        self.tabla.column("clase", width=130)
+        self.tabla.column("intentos", width=60, anchor="center")
+        self.tabla.column("fecha", width=110)
+
+        frame_botones = tk.Frame(self.ventana)
+        frame_botones.pack(fill=tk.X, pady=10, padx=10)
+        tk.Button(frame_botones, text="Cerrar", width=10, command=self.ventana.destroy).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Reintentar todos", command=self._reintentar_todos).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Reintentar selección", command=self._reintentar_seleccion).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Quitar", width=10, command=self._quitar_seleccion).pack(side=tk.LEFT, padx=5)
+
+    def _actualizar_tabla(self):
+        """Muestra los fallos de la clase elegida en el filtro."""
+        clase = self._clases_por_texto.get(self.filtro_var.get())
+        self.fallos = listar_fallos(clase)
+
+        self.tabla.delete(*self.tabla.get_children())
+        for indice, fallo in enumerate(self.fallos):
+            self.tabla.insert("", "end", iid=str(indice), values=(
+                fallo['url'],
+                DESCRIPCION_FALLOS.get(fallo['clase'], fallo['clase']),
+                fallo['intentos'],
+                time.strftime("%d/%m/%Y %H:%M", time.localtime(fallo['ultimo_fallo'])),
+            ))
+
+        self.resumen_var.set(f"{sum(contar_fallos().values())} fallos registrados")
+
+    def _seleccionados(self) -> List[dict]:
+        """Devuelve los fallos seleccionados en la tabla."""
+        return [self.fallos[int(iid)] for iid in self.tabla.selection()]
+
+    def _reintentar_seleccion(self):
+        """Reintenta los fallos seleccionados."""
+        seleccionados = self._seleccionados()
+        if seleccionados:
+            self.reintentar_callback(seleccionados)
+            self.ventana.destroy()
+
+    def _reintentar_todos(self):
+        """Reintenta todos los fallos que muestra el filtro."""
+        if self.fallos:
+            self.reintentar_callback(list(self.fallos))
+            self.ventana.destroy()
+
+    def _quitar_seleccion(self):
+        """Borra del registro los fallos seleccionados."""
+        for fallo in self._seleccionados():
+            quitar_fallo(fallo['url'], fallo['calidad'])
+        self._actualizar_tabla()
@@ -9,10 +9,19 @@ from tkinter import ttk
 from PIL import Image, ImageTk
 
 from gui.utils.tooltip import crear_tooltip
-from utils.config import obtener_directorio_descargas, obtener_calidad_video, guardar_calidad_video
+from utils.config import (
+    obtener_directorio_descargas, obtener_calidad_video, guardar_calidad_video,
+    obtener_reglas_formato, guardar_reglas_formato, obtener_presupuesto_tiempo,
+    guardar_presupuesto_tiempo, RETARDO_PRECARGA_FORMATOS, PRESUPUESTO_TIEMPO_PREDETERMINADO
+)
 from tkinter import filedialog, messagebox, Toplevel
 from utils.config import guardar_configuracion
 from utils.video_quality import obtener_formatos_disponibles
+from utils.metadatos import programar_precarga, cancelar_precarga
+from utils.programador import normalizar_hora
+from utils.importacion import lineas_de_archivo
+from utils.recortes import parsear_tramos, inicio_de_url, formatear_tiempo
+from utils.urls import es_url_valida
 from gui.utils.ui_helpers import centrar_ventana # Importar la función
 
 class InputPanel:
@@ -29,7 +38,13 @@ class InputPanel:
         """
         self.parent = parent
         self.download_callback = None
+        self.programar_callback = None
+        self.importar_callback = None
         self.calidad_seleccionada = obtener_calidad_video()
+        self.tramos_var = tk.StringVar()  # Tramos de la próxima descarga ("1:30-2:45, 10:00-")
+        self._url_de_tramos = ""  # URL a la que pertenecen los tramos del diálogo de calidad
+        self._id_precarga_programada = None  # ID del 'after' pendiente de la precarga
+        self._url_enviada = None  # URL enviada al vaciar el campo: su precarga no se descarta
         self._crear_panel()
     
     def _crear_panel(self):
@@ -39,9 +54,13 @@ class InputPanel:
         
         tk.Label(frame_entrada, text="URL del video:").pack(side=tk.LEFT, padx=(0, 5))
         # Reducimos el ancho de la entrada para dar espacio a los botones
-        self.entrada_url = tk.Entry(frame_entrada, width=35)
+        self.url_var = tk.StringVar()
+        self.entrada_url = tk.Entry(frame_entrada, width=35, textvariable=self.url_var)
         self.entrada_url.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
+        # Precargar los formatos cuando se pega o escribe una URL
+        self.url_var.trace_add("write", self._on_url_modificada)
+        
         # Contenedor para los botones
         frame_botones = tk.Frame(frame_entrada)
         frame_botones.pack(side=tk.RIGHT)
@@ -59,6 +78,88 @@ class InputPanel:
             command=self._on_download_click
         )
         boton_descargar.pack(side=tk.LEFT, padx=5)
+        
+        # Botón para programar la descarga en una franja horaria
+        boton_programar = tk.Button(
+            frame_botones, 
+            text="Programar", 
+            command=self._on_programar_click
+        )
+        boton_programar.pack(side=tk.LEFT)
+        crear_tooltip(boton_programar, "Descargar más tarde, en una franja horaria")
+        
+        # Botón para importar una lista de URLs
+        boton_importar = tk.Button(
+            frame_botones, 
+            text="Importar", 
+            command=self._on_importar_click
+        )
+        boton_importar.pack(side=tk.LEFT, padx=(5, 0))
+        crear_tooltip(boton_importar, "Importar una lista de URLs (texto, .txt o .csv)")
+    
+    def _on_url_modificada(self, *args):
+        """
+        Reprograma la precarga de formatos cada vez que cambia el texto de la URL.
+        
+        Se espera RETARDO_PRECARGA_FORMATOS ms sin cambios antes de consultar,
+        y cualquier precarga pendiente de un texto anterior se descarta. Si
+        cambia la URL (no solo los tramos escritos tras ella), se olvidan los
+        tramos del diálogo de calidad, que eran del video anterior.
+        """
+        palabras = self.url_var.get().split()
+        url = palabras[0] if palabras else ""
+        if url != self._url_de_tramos:
+            self._url_de_tramos = url
+            self.tramos_var.set("")
+        
+        if self._id_precarga_programada is not None:
+            self.parent.after_cancel(self._id_precarga_programada)
+            self._id_precarga_programada = None
+        cancelar_precarga(excepto=self._url_enviada)
+        
+        url, _ = self._separar_url_y_tramos(self.url_var.get())
+        if es_url_valida(url):
+            self._id_precarga_programada = self.parent.after(
+                RETARDO_PRECARGA_FORMATOS, self._iniciar_precarga
+            )
+    
+    def _vaciar_entrada(self, url_enviada=None):
+        """
+        Vacía el campo de la URL tras enviarla.
+        
+        Args:
+            url_enviada: URL que se acaba de enviar; si se estaba precargando,
+                         la descarga aprovecha esa consulta en lugar de repetirla
+        """
+        self._url_enviada = url_enviada
+        try:
+            self.entrada_url.delete(0, tk.END)
+        finally:
+            self._url_enviada = None
+    
+    def _iniciar_precarga(self):
+        """Lanza la precarga en segundo plano de la URL actual."""
+        self._id_precarga_programada = None
+        url, _ = self._separar_url_y_tramos(self.url_var.get())
+        if es_url_valida(url):
+            programar_precarga(url)
+    
+    def _separar_url_y_tramos(self, texto):
+        """
+        Separa la URL de los tramos escritos a continuación ("URL 1:30-2:45, 10:00-").
+        
+        Args:
+            texto: Texto del campo de la URL
+        
+        Returns:
+            Tupla (URL, texto de los tramos); los tramos son los del diálogo de
+            calidad si no se escribieron junto a la URL (el parámetro t= solo
+            se propone en ese diálogo, nunca recorta sin preguntar)
+        """
+        palabras = texto.split()
+        if len(palabras) > 1 and es_url_valida(palabras[0]) and not any(es_url_valida(p) for p in palabras[1:]):
+            return palabras[0], " ".join(palabras[1:])
+        return texto.strip(), self.tramos_var.get()
     
     def _crear_boton_seleccionar_carpeta(self, frame_padre):
         """
@@ -137,15 +238,20 @@ class InputPanel:
     
     def _seleccionar_calidad_video(self):
         """Abre una ventana para seleccionar la calidad del video."""
-        url = self.entrada_url.get().strip()
+        url, _ = self._separar_url_y_tramos(self.entrada_url.get())
         if not url:
             messagebox.showwarning("Advertencia", "Por favor, ingresa una URL válida para ver las calidades disponibles.")
             return
         
+        # El parámetro t= de la URL propone un recorte desde ese instante
+        inicio = inicio_de_url(url)
+        if inicio and not self.tramos_var.get().strip():
+            self.tramos_var.set(f"{formatear_tiempo(inicio)}-")
+        
         # Crear ventana emergente
         ventana_calidad = Toplevel(self.parent)
         ventana_calidad.title("Seleccionar calidad de video")
-        centrar_ventana(ventana_calidad, 500, 480) # Centrar la ventana
+        centrar_ventana(ventana_calidad, 500, 530) # Centrar la ventana
         ventana_calidad.resizable(False, False)
         ventana_calidad.transient(self.parent)
         ventana_calidad.grab_set()
@@ -168,7 +274,19 @@ class InputPanel:
             text=f"URL: {url_cortada}", 
             font=("Helvetica", 9), 
             fg="#555555"
-        ).pack(pady=(0, 15))
+        ).pack(pady=(0, 10))
+        
+        # Tramos a los que limitar la descarga (vacío para el video completo)
+        frame_tramos = tk.Frame(frame_principal)
+        frame_tramos.pack(fill=tk.X, pady=(0, 5))
+        tk.Label(frame_tramos, text="Solo los tramos:").pack(side=tk.LEFT)
+        tk.Entry(frame_tramos, textvariable=self.tramos_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        tk.Label(
+            frame_principal, 
+            text="Por ejemplo 1:30-2:45, 1:02:00- (vacío para el video completo)", 
+            font=("Helvetica", 8), 
+            fg="gray"
+        ).pack(anchor="w")
         
         # Mostrar mensaje de carga y frame de progreso
         frame_carga = tk.Frame(frame_principal)
@@ -216,6 +334,14 @@ class InputPanel:
         )
         boton_aceptar.pack(side=tk.RIGHT, padx=5)
         
+        # Botón para editar las reglas de la calidad automática
+        tk.Button(
+            frame_botones, 
+            text="Reglas...", 
+            width=10, 
+            command=lambda: self._editar_reglas_formato(ventana_calidad)
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Variable para almacenar el formato seleccionado
         formato_seleccionado = {'id': None, 'calidad': None}
         
@@ -337,6 +463,11 @@ class InputPanel:
             # Configurar el botón de aceptar
             def aceptar_seleccion():
                 """Guarda la selección y cierra la ventana"""
+                try:
+                    parsear_tramos(self.tramos_var.get())
+                except ValueError as e:
+                    messagebox.showerror("Tramos no válidos", str(e), parent=ventana_calidad)
+                    return
                 self.calidad_seleccionada = formato_seleccionado['id']
                 guardar_calidad_video(formato_seleccionado['id'])
                 
@@ -383,6 +514,91 @@ class InputPanel:
         hilo.daemon = True
         hilo.start()
     
+    def _editar_reglas_formato(self, ventana_padre):
+        """
+        Abre una ventana para editar las reglas de la calidad automática.
+        
+        Args:
+            ventana_padre: Ventana sobre la que se mostrará el diálogo
+        """
+        reglas = obtener_reglas_formato()
+        
+        ventana_reglas = Toplevel(ventana_padre)
+        ventana_reglas.title("Reglas de formato")
+        centrar_ventana(ventana_reglas, 380, 290)
+        ventana_reglas.resizable(False, False)
+        ventana_reglas.transient(ventana_padre)
+        ventana_reglas.grab_set()
+        
+        frame_campos = tk.Frame(ventana_reglas)
+        frame_campos.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        
+        def valor_texto(valor):
+            return "" if valor is None else str(valor)
+        
+        # Campos: (etiqueta, variable, valores sugeridos)
+        variables = {
+            'altura_max': tk.StringVar(value=valor_texto(reglas.get('altura_max'))),
+            'codecs': tk.StringVar(value=", ".join(reglas.get('codecs') or [])),
+            'fps_max': tk.StringVar(value=valor_texto(reglas.get('fps_max'))),
+            'tamano_max_mb': tk.StringVar(value=valor_texto(reglas.get('tamano_max_mb'))),
+            'contenedor': tk.StringVar(value=valor_texto(reglas.get('contenedor'))),
+            'presupuesto': tk.StringVar(value=f"{obtener_presupuesto_tiempo():g}"),
+        }
+        campos = [
+            ("Altura máxima (px):", 'altura_max', ["", "2160", "1440", "1080", "720", "480", "360"]),
+            ("Códecs preferidos:", 'codecs', None),
+            ("FPS máximos:", 'fps_max', ["", "60", "30"]),
+            ("Tamaño máximo (MB):", 'tamano_max_mb', None),
+            ("Contenedor:", 'contenedor', ["", "mp4", "webm"]),
+            ("Tiempo máx. adaptativa (min):", 'presupuesto', ["5", "10", "30", "60"]),
+        ]
+        
+        for fila, (etiqueta, clave, valores) in enumerate(campos):
+            tk.Label(frame_campos, text=etiqueta, anchor="w").grid(row=fila, column=0, sticky="w", pady=4)
+            if valores:
+                campo = ttk.Combobox(frame_campos, textvariable=variables[clave], values=valores, width=22)
+            else:
+                campo = tk.Entry(frame_campos, textvariable=variables[clave], width=25)
+            campo.grid(row=fila, column=1, sticky="ew", pady=4, padx=(10, 0))
+        
+        tk.Label(
+            frame_campos, 
+            text="Deje un campo vacío para no limitarlo.", 
+            font=("Helvetica", 8), 
+            fg="#555555"
+        ).grid(row=len(campos), column=0, columnspan=2, sticky="w", pady=(8, 0))
+        
+        def numero(texto):
+            texto = texto.strip()
+            return float(texto) if texto else None
+        
+        def guardar():
+            """Valida y guarda las reglas"""
+            try:
+                altura = numero(variables['altura_max'].get())
+                nuevas_reglas = {
+                    'altura_max': int(altura) if altura else None,
+                    'codecs': [c.strip().lower() for c in variables['codecs'].get().split(",") if c.strip()],
+                    'fps_max': numero(variables['fps_max'].get()),
+                    'tamano_max_mb': numero(variables['tamano_max_mb'].get()),
+                    'contenedor': variables['contenedor'].get().strip().lower() or None,
+                }
+                presupuesto = numero(variables['presupuesto'].get()) or PRESUPUESTO_TIEMPO_PREDETERMINADO
+            except ValueError:
+                messagebox.showerror("Error", "Los límites deben ser números.", parent=ventana_reglas)
+                return
+            
+            if guardar_reglas_formato(nuevas_reglas) and guardar_presupuesto_tiempo(presupuesto):
+                ventana_reglas.destroy()
+            else:
+                messagebox.showerror("Error", "No se pudieron guardar las reglas.", parent=ventana_reglas)
+        
+        frame_botones = tk.Frame(ventana_reglas)
+        frame_botones.pack(fill=tk.X, pady=10, padx=10)
+        tk.Button(frame_botones, text="Cancelar", width=10, command=ventana_reglas.destroy).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Guardar", width=10, command=guardar).pack(side=tk.RIGHT, padx=5)
+    
     def _seleccionar_carpeta_destino(self):
         """Abre un diálogo para seleccionar la carpeta de destino de las descargas."""
         # Obtener directorio actual
@@ -418,18 +634,168 @@ class InputPanel:
     
     def _on_download_click(self):
         """Maneja el evento de clic en el botón de descarga."""
-        url = self.entrada_url.get()
+        texto = self.entrada_url.get()
+        url, texto_tramos = self._separar_url_y_tramos(texto)
+        if len(url.split()) > 1 and self.importar_callback:
+            # Se pegaron varias URLs en el campo: importarlas como lista
+            self._vaciar_entrada()
+            self.importar_callback(url.split(), self.calidad_seleccionada)
+            return
+        try:
+            tramos = parsear_tramos(texto_tramos)
+        except ValueError as e:
+            messagebox.showerror("Tramos no válidos", str(e))
+            return
         if url and self.download_callback:
-            # Limpiar el campo de entrada para la siguiente URL
-            self.entrada_url.delete(0, tk.END)
-            # Llamar al callback con la URL y la calidad seleccionada
-            self.download_callback(url, self.calidad_seleccionada)
+            # Limpiar el campo de entrada (y los tramos, que son de este video) para la siguiente URL
+            self._vaciar_entrada(url)
+            self.tramos_var.set("")
+            # Llamar al callback con la URL, la calidad seleccionada y los tramos
+            self.download_callback(url, self.calidad_seleccionada, tramos or None)
+    
+    def _on_programar_click(self):
+        """Abre una ventana para programar la descarga de la URL en una franja horaria."""
+        url = self.entrada_url.get().strip()
+        if not url or not self.programar_callback:
+            return
+        
+        ventana_programar = Toplevel(self.parent)
+        ventana_programar.title("Programar descarga")
+        centrar_ventana(ventana_programar, 340, 200)
+        ventana_programar.resizable(False, False)
+        ventana_programar.transient(self.parent)
+        ventana_programar.grab_set()
+        
+        frame_campos = tk.Frame(ventana_programar)
+        frame_campos.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        
+        variables = {
+            'inicio': tk.StringVar(value="22:00"),
+            'fin': tk.StringVar(value=""),
+            'limite': tk.StringVar(value=""),
+        }
+        campos = [
+            ("Empezar a las (HH:MM):", 'inicio', ["20:00", "22:00", "00:00", "02:00"]),
+            ("Pausar a las (HH:MM):", 'fin', ["", "06:00", "07:00", "08:00"]),
+            ("Velocidad máxima (KB/s):", 'limite', ["", "500", "1000", "5000"]),
+        ]
+        for fila, (etiqueta, clave, valores) in enumerate(campos):
+            tk.Label(frame_campos, text=etiqueta, anchor="w").grid(row=fila, column=0, sticky="w", pady=4)
+            ttk.Combobox(frame_campos, textvariable=variables[clave], values=valores, width=12).grid(
+                row=fila, column=1, sticky="ew", pady=4, padx=(10, 0))
+        
+        tk.Label(
+            frame_campos, 
+            text="Sin hora de pausa, la descarga no se detiene una vez empezada.", 
+            font=("Helvetica", 8), 
+            fg="#555555"
+        ).grid(row=len(campos), column=0, columnspan=2, sticky="w", pady=(8, 0))
+        
+        def aceptar():
+            """Valida la franja y programa la descarga"""
+            try:
+                inicio = normalizar_hora(variables['inicio'].get())
+                fin = normalizar_hora(variables['fin'].get())
+                limite_texto = variables['limite'].get().strip()
+                limite = int(limite_texto) if limite_texto else None
+            except ValueError:
+                messagebox.showerror("Error", "Las horas deben tener la forma HH:MM y la velocidad "
+                                     "debe ser un número entero.", parent=ventana_programar)
+                return
+            if not inicio:
+                messagebox.showerror("Error", "Indique la hora de inicio.", parent=ventana_programar)
+                return
+            
+            ventana_programar.destroy()
+            self._vaciar_entrada(url)
+            self.programar_callback(url, self.calidad_seleccionada, inicio, fin, limite)
+        
+        frame_botones = tk.Frame(ventana_programar)
+        frame_botones.pack(fill=tk.X, pady=10, padx=10)
+        tk.Button(frame_botones, text="Cancelar", width=10, command=ventana_programar.destroy).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Programar", width=10, command=aceptar).pack(side=tk.RIGHT, padx=5)
+    
+    def _on_importar_click(self):
+        """Abre una ventana para pegar una lista de URLs o elegir un archivo con ellas."""
+        if not self.importar_callback:
+            return
+        
+        ventana_importar = Toplevel(self.parent)
+        ventana_importar.title("Importar URLs")
+        centrar_ventana(ventana_importar, 460, 345)
+        ventana_importar.transient(self.parent)
+        ventana_importar.grab_set()
+        
+        tk.Label(
+            ventana_importar, 
+            text="Pegue las URLs (una o varias por línea) o abra un archivo .txt o .csv:", 
+            anchor="w"
+        ).pack(fill=tk.X, padx=15, pady=(15, 5))
+        
+        frame_texto = tk.Frame(ventana_importar)
+        frame_texto.pack(fill=tk.BOTH, expand=True, padx=15)
+        barra = tk.Scrollbar(frame_texto)
+        barra.pack(side=tk.RIGHT, fill=tk.Y)
+        texto = tk.Text(frame_texto, wrap=tk.NONE, yscrollcommand=barra.set, font=("Helvetica", 9))
+        texto.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        barra.config(command=texto.yview)
+        
+        planificar_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            ventana_importar,
+            text="Estimar tamaño y tiempo antes de descargar",
+            variable=planificar_var,
+            anchor="w"
+        ).pack(fill=tk.X, padx=15, pady=(5, 0))
+        
+        def importar_texto():
+            """Importa las URLs pegadas"""
+            lineas = texto.get("1.0", tk.END).splitlines()
+            ventana_importar.destroy()
+            self.importar_callback(lineas, self.calidad_seleccionada, planificar_var.get())
+        
+        def importar_archivo():
+            """Importa las URLs de un archivo (se lee en el hilo de importación)"""
+            ruta = filedialog.askopenfilename(
+                title="Importar URLs",
+                filetypes=[("Listas de URLs", "*.txt *.csv"), ("Todos los archivos", "*.*")],
+                parent=ventana_importar
+            )
+            if ruta:
+                ventana_importar.destroy()
+                self.importar_callback(lineas_de_archivo(ruta), self.calidad_seleccionada, planificar_var.get())
+        
+        frame_botones = tk.Frame(ventana_importar)
+        frame_botones.pack(fill=tk.X, pady=10, padx=10)
+        tk.Button(frame_botones, text="Cancelar", width=10, command=ventana_importar.destroy).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Importar", width=10, command=importar_texto).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Abrir archivo...", command=importar_archivo).pack(side=tk.LEFT, padx=5)
+    
+    def set_importar_callback(self, callback):
+        """
+        Establece el callback que se llamará al importar una lista de URLs.
+        
+        Args:
+            callback: Función a llamar con las líneas de texto, la calidad y si
+                      hay que planificar el lote antes de descargarlo
+        """
+        self.importar_callback = callback
+    
+    def set_programar_callback(self, callback):
+        """
+        Establece el callback que se llamará al programar una descarga.
+        
+        Args:
+            callback: Función a llamar con la URL, la calidad, la hora de inicio,
+                      la hora de fin y la velocidad máxima en KB/s
+        """
+        self.programar_callback = callback
     
     def set_download_callback(self, callback):
         """
         Establece el callback que se llamará cuando se haga clic en el botón de descarga.
         
         Args:
-            callback: Función a llamar con la URL y la calidad como argumento
+            callback: Función a llamar con la URL, la calidad y los tramos (o None)
         """
         self.download_callback = callback
@@ -0,0 +1,106 @@
+"""
+Ventana con la estimación de un lote de descargas, para confirmarlo antes de empezar.
+"""
+
+import tkinter as tk
+from tkinter import ttk, Toplevel
+from typing import Callable
+
+from gui.utils.ui_helpers import centrar_ventana, formatear_duracion
+from utils.historial import formatear_tamano
+
+class VentanaPlan:
+    """
+    Ventana con el resumen del lote (tamaño, duración y espacio) y el desglose por video.
+    """
+
+    def __init__(self, parent, plan: dict, aceptar_callback: Callable[[], None]):
+        """
+        Crea y muestra la ventana.
+
+        Args:
+            parent: Ventana sobre la que se mostrará
+            plan: Resultado de planificar_lote
+            aceptar_callback: Función que encola el lote si se confirma
+        """
+        self.plan = plan
+        self.aceptar_callback = aceptar_callback
+
+        self.ventana = Toplevel(parent)
+        self.ventana.title("Planificación del lote")
+        centrar_ventana(self.ventana, 620, 420)
+        self.ventana.transient(parent)
+        self.ventana.grab_set()
+
+        self._crear_resumen()
+        self._crear_tabla()
+
+        frame_botones = tk.Frame(self.ventana)
+        frame_botones.pack(fill=tk.X, pady=10, padx=10)
+        tk.Button(frame_botones, text="Cancelar", width=10, command=self.ventana.destroy).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Descargar", width=10, command=self._aceptar).pack(side=tk.RIGHT, padx=5)
+
+    def _crear_resumen(self):
+        """Muestra los totales del lote."""
+        plan = self.plan
+        lineas = [
+            f"Videos: {len(plan['elementos'])}"
+            + (f" ({plan['errores']} sin información)" if plan['errores'] else ""),
+            f"Tamaño estimado: {formatear_tamano(plan['bytes'])}"
+            + (f" (+{plan['sin_estimar']} sin tamaño conocido)" if plan['sin_estimar'] else ""),
+        ]
+        if plan['segundos']:
+            lineas.append(f"Duración estimada: {formatear_duracion(plan['segundos'])}"
+                          + (f" (+{plan['sin_velocidad']} sin velocidad medida)" if plan['sin_velocidad'] else ""))
+        else:
+            lineas.append("Duración estimada: desconocida (aún no hay velocidades medidas)")
+        lineas.append(f"Espacio necesario: {formatear_tamano(plan['necesario'])} "
+                      f"de {formatear_tamano(plan['libre'])} libres")
+
+        tk.Label(self.ventana, text="\n".join(lineas), justify=tk.LEFT, anchor="w").pack(
+            fill=tk.X, padx=15, pady=(15, 0))
+        if not plan['cabe']:
+            tk.Label(self.ventana, text="El lote no cabe en el disco de descargas.",
+                     fg="red", anchor="w").pack(fill=tk.X, padx=15)
+
+    def _crear_tabla(self):
+        """Muestra el desglose por video."""
+        frame_tabla = tk.Frame(self.ventana)
+        frame_tabla.pack(fill=tk.BOTH, expand=True, padx=15, pady=(10, 0))
+        scrollbar = tk.Scrollbar(frame_tabla)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tabla = ttk.Treeview(
+            frame_tabla,
+            columns=("titulo", "formato", "tamano", "duracion"),
+            show="headings",
+            selectmode="none",
+            yscrollcommand=scrollbar.set
+        )
+        tabla.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=tabla.yview)
+
+        tabla.heading("titulo", text="Video")
+        tabla.heading("formato", text="Formato")
+        tabla.heading("tamano", text="Tamaño")
+        tabla.heading("duracion", text="Tiempo")
+        tabla.column("titulo", width=290)
+        tabla.column("formato", width=110)
+        tabla.column("tamano", width=80)
+        tabla.column("duracion", width=80)
+
+        for elemento in self.plan['elementos']:
+            if elemento['error']:
+                valores = (elemento['url'], "Error", "-", "-")
+            else:
+                valores = (
+                    elemento['titulo'] or elemento['url'],
+                    elemento['formato'],
+                    formatear_tamano(elemento['bytes']) if elemento['bytes'] else "?",
+                    formatear_duracion(elemento['segundos']) if elemento['segundos'] else "?",
+                )
+            tabla.insert("", "end", values=valores)
+
+    def _aceptar(self):
+        """Encola el lote y cierra la ventana."""
+        self.ventana.destroy()
+        self.aceptar_callback()
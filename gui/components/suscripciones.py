@@ -0,0 +1,102 @@
+"""
+Ventana para gestionar las suscripciones a canales y listas.
+"""
+
+import time
+import tkinter as tk
+from tkinter import messagebox, Toplevel
+from typing import Callable
+
+from gui.utils.ui_helpers import centrar_ventana
+from utils.config import obtener_suscripciones
+from utils.suscripciones import agregar_suscripcion, quitar_suscripcion
+from utils.urls import es_url_valida
+
+class VentanaSuscripciones:
+    """
+    Ventana con la lista de suscripciones y botones para añadir, quitar y sincronizar.
+    """
+
+    def __init__(self, parent, sincronizar_callback: Callable[[], None]):
+        """
+        Crea y muestra la ventana.
+
+        Args:
+            parent: Ventana sobre la que se mostrará
+            sincronizar_callback: Función que busca videos nuevos en todas las suscripciones
+        """
+        self.sincronizar_callback = sincronizar_callback
+        self.suscripciones = []
+
+        self.ventana = Toplevel(parent)
+        self.ventana.title("Suscripciones")
+        centrar_ventana(self.ventana, 460, 320)
+        self.ventana.resizable(False, False)
+        self.ventana.transient(parent)
+        self.ventana.grab_set()
+
+        self._crear_widgets()
+        self._actualizar_lista()
+
+    def _crear_widgets(self):
+        """Crea la lista y los botones de la ventana."""
+        tk.Label(
+            self.ventana,
+            text="Canales y listas de los que se descargan los videos nuevos:",
+            anchor="w"
+        ).pack(fill=tk.X, padx=15, pady=(15, 5))
+
+        frame_lista = tk.Frame(self.ventana)
+        frame_lista.pack(fill=tk.BOTH, expand=True, padx=15)
+        barra = tk.Scrollbar(frame_lista)
+        barra.pack(side=tk.RIGHT, fill=tk.Y)
+        self.lista = tk.Listbox(frame_lista, yscrollcommand=barra.set, font=("Helvetica", 9))
+        self.lista.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        barra.config(command=self.lista.yview)
+
+        frame_agregar = tk.Frame(self.ventana)
+        frame_agregar.pack(fill=tk.X, padx=15, pady=5)
+        self.url_var = tk.StringVar()
+        tk.Entry(frame_agregar, textvariable=self.url_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(frame_agregar, text="Añadir", width=8, command=self._agregar).pack(side=tk.LEFT, padx=(5, 0))
+
+        frame_botones = tk.Frame(self.ventana)
+        frame_botones.pack(fill=tk.X, pady=10, padx=10)
+        tk.Button(frame_botones, text="Cerrar", width=10, command=self.ventana.destroy).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Sincronizar ahora", command=self._sincronizar).pack(side=tk.RIGHT, padx=5)
+        tk.Button(frame_botones, text="Quitar", width=10, command=self._quitar).pack(side=tk.LEFT, padx=5)
+
+    def _actualizar_lista(self):
+        """Muestra las suscripciones guardadas y cuándo se sincronizaron."""
+        self.suscripciones = obtener_suscripciones()
+        self.lista.delete(0, tk.END)
+        for suscripcion in self.suscripciones:
+            momento = suscripcion.get('ultima_sincronizacion')
+            revisada = time.strftime("%d/%m/%Y", time.localtime(momento)) if momento else "nunca"
+            nombre = suscripcion.get('nombre') or suscripcion['url']
+            self.lista.insert(tk.END, f"{nombre}  (revisada: {revisada})")
+
+    def _agregar(self):
+        """Añade la URL escrita a las suscripciones."""
+        url = self.url_var.get().strip()
+        if not es_url_valida(url):
+            messagebox.showwarning("Advertencia", "Por favor, ingresa una URL válida.", parent=self.ventana)
+            return
+        if not agregar_suscripcion(url):
+            messagebox.showinfo("Suscripciones", "Ya estaba suscrito a esa URL.", parent=self.ventana)
+            return
+        self.url_var.set("")
+        self._actualizar_lista()
+
+    def _quitar(self):
+        """Quita la suscripción seleccionada."""
+        seleccion = self.lista.curselection()
+        if not seleccion:
+            return
+        quitar_suscripcion(self.suscripciones[seleccion[0]]['url'])
+        self._actualizar_lista()
+
+    def _sincronizar(self):
+        """Busca videos nuevos en todas las suscripciones y cierra la ventana."""
+        self.sincronizar_callback()
+        self.ventana.destroy()
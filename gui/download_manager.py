@@ -5,14 +5,26 @@ Gestión de descargas en la interfaz gráfica.
 import os
 import threading
 import queue
-from typing import Callable, Dict
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Optional, Set, Tuple
 
 import tkinter as tk
 from tkinter import messagebox
 
-from downloader import descargar_video, cancelar_descarga
+from downloader import (
+    descargar_video, cancelar_descarga, pausar_descarga, reanudar_descarga, motivo_sin_pausa, fue_unida
+)
 from gui.components.descargar_item import DescargarItem
+from gui.components.plan_lote import VentanaPlan
+from utils.archivo_descargas import clave_de_url, esta_descargado, identificar_descarga
+from utils.fallos import registrar_fallo, quitar_fallo, DESCRIPCION_FALLOS
+from utils.importacion import importar_urls
+from utils.planificador import planificar_lote
 from utils.historial import agregar_video_historial, cargar_historial, formatear_tamano, eliminar_video_historial
+from utils.pipeline import resumen_ocupacion
+from utils.programador import cola_programada, describir_franja
+from utils.recortes import ffmpeg_disponible
+from utils.suscripciones import sincronizar_suscripciones
 
 class DownloadManager:
     """
@@ -25,10 +37,12 @@ class DownloadManager:
         cola_actualizaciones: Cola para comunicación entre hilos
         items_descarga: Diccionario de items de descarga activos
         actualizar_contador_callback: Función para actualizar el contador de videos
+        actualizar_ocupacion_callback: Función para mostrar la ocupación de las etapas
     """
     
     def __init__(self, ventana: tk.Tk, frame_activas: tk.Frame, frame_completadas: tk.Frame, 
-                 actualizar_contador_callback: Callable[[int], None] = None):
+                 actualizar_contador_callback: Callable[[int], None] = None,
+                 actualizar_ocupacion_callback: Callable[[str], None] = None):
         """
         Inicializa el gestor de descargas.
         
@@ -37,6 +51,7 @@ class DownloadManager:
             frame_activas: Frame para mostrar descargas activas
             frame_completadas: Frame para mostrar descargas completadas
             actualizar_contador_callback: Callback para actualizar el contador de videos
+            actualizar_ocupacion_callback: Callback para mostrar la ocupación de las etapas
         """
         self.ventana = ventana
         self.frame_activas = frame_activas
@@ -45,14 +60,30 @@ class DownloadManager:
         self.items_descarga = {}
         self.hilos_descarga = {}  # Diccionario para relacionar ID con hilo
         self.actualizar_contador_callback = actualizar_contador_callback
+        self.actualizar_ocupacion_callback = actualizar_ocupacion_callback
         self.archivos_temporales: Dict[int, str] = {}  # Para rastrear archivos temporales por ID de descarga
         self.ultimo_id_descarga = 0  # Para generar IDs únicos
+        self.programadas_en_curso: Dict[int, int] = {}  # Entrada programada -> ID de descarga
+        self.pausadas_por_franja: Set[int] = set()  # Descargas pausadas al cerrarse su franja
+        self.cola_importacion: Deque[Tuple[str, str, bool]] = deque()  # (URL, calidad, segundo plano) importadas, reintentadas o de suscripciones sin lanzar
+        self.importadas_en_curso: Set[int] = set()  # IDs de las descargas importadas lanzadas
+        self.peticiones: Dict[int, Tuple[str, str]] = {}  # ID de descarga -> (URL, calidad)
+        self.descargas_en_lote: Set[int] = set()  # Descargas que no abren un aviso al terminar ni al fallar
+        self.recortes: Dict[int, list] = {}  # ID de descarga -> tramos, en las que solo bajan unos tramos
+        self.progreso_planificacion: Optional[Tuple[int, int]] = None  # (planificados, total) del lote en estimación
         
         # Cargar historial de descargas
         self._cargar_historial_ui()
         
         # Iniciar el proceso de actualización de la interfaz
         self._iniciar_actualizacion_ui()
+        self._actualizar_ocupacion()
+        
+        # Retomar las descargas programadas que quedaron de la sesión anterior
+        self._iniciar_programador()
+        
+        # Buscar videos nuevos en las suscripciones que llevan tiempo sin revisarse
+        self.sincronizar_suscripciones(solo_vencidas=True)
     
     def _actualizar_contador(self):
         """Actualiza el contador de videos descargados."""
@@ -85,6 +116,76 @@ class DownloadManager:
         self._actualizar_progreso()
         self.ventana.after(INTERVALO_ACTUALIZACION_UI, self._iniciar_actualizacion_ui)
     
+    def _actualizar_ocupacion(self) -> None:
+        """Muestra periódicamente la ocupación de las etapas de descarga y posproceso."""
+        from utils.config import INTERVALO_OCUPACION_UI
+        if self.actualizar_ocupacion_callback:
+            texto = resumen_ocupacion()
+            en_espera = len(cola_programada.entradas()) - len(self.programadas_en_curso)
+            if en_espera > 0:
+                texto += f" · Programadas {en_espera}"
+            if self.cola_importacion:
+                texto += f" · Importadas {len(self.cola_importacion)}"
+            if self.progreso_planificacion:
+                texto += " · Planificando {}/{}".format(*self.progreso_planificacion)
+            self.actualizar_ocupacion_callback(texto)
+        self.ventana.after(INTERVALO_OCUPACION_UI, self._actualizar_ocupacion)
+    
+    def _iniciar_programador(self) -> None:
+        """Inicia el bucle que abre y cierra las franjas de las descargas programadas."""
+        from utils.config import INTERVALO_PROGRAMADOR_UI
+        self._revisar_programadas()
+        self.ventana.after(INTERVALO_PROGRAMADOR_UI, self._iniciar_programador)
+    
+    def _revisar_programadas(self) -> None:
+        """
+        Arranca, pausa o reanuda las descargas programadas según su franja.
+        
+        Una descarga cuya franja se cierra se pausa (libera su plaza y conserva
+        el archivo parcial) y se reanuda cuando la franja vuelve a abrirse.
+        """
+        for entrada in cola_programada.entradas():
+            abierta = cola_programada.puede_ejecutarse(entrada)
+            id_descarga = self.programadas_en_curso.get(entrada['id'])
+            
+            if id_descarga is None:
+                if abierta:
+                    limite = entrada['limite_kbs'] * 1024 if entrada.get('limite_kbs') else None
+                    print(f"Abierta la franja {describir_franja(entrada)}: {entrada['url']}")
+                    self.programadas_en_curso[entrada['id']] = self._lanzar_descarga(
+                        entrada['url'], entrada.get('calidad', ''), limite, entrada['clave_temporal'],
+                        en_lote=True)
+            elif not abierta and id_descarga not in self.pausadas_por_franja:
+                # La descarga puede no haber arrancado aún: se reintenta en la próxima revisión
+                if pausar_descarga(id_descarga):
+                    self.pausadas_por_franja.add(id_descarga)
+                    if id_descarga in self.items_descarga:
+                        self.items_descarga[id_descarga].mostrar_pausa(True)
+                        self.items_descarga[id_descarga].info_var.set(
+                            f"Fuera de franja ({describir_franja(entrada)})")
+            elif abierta and id_descarga in self.pausadas_por_franja:
+                self.pausadas_por_franja.discard(id_descarga)
+                if reanudar_descarga(id_descarga) and id_descarga in self.items_descarga:
+                    self.items_descarga[id_descarga].mostrar_pausa(False)
+    
+    def _finalizar_descarga(self, id_descarga: int) -> None:
+        """Libera el seguimiento de una descarga terminada (bien, con error o cancelada)."""
+        self._terminar_programada(id_descarga)
+        self.peticiones.pop(id_descarga, None)
+        self.descargas_en_lote.discard(id_descarga)
+        self.recortes.pop(id_descarga, None)
+        if id_descarga in self.importadas_en_curso:
+            self.importadas_en_curso.discard(id_descarga)
+            self._lanzar_importadas()
+    
+    def _terminar_programada(self, id_descarga: int) -> None:
+        """Quita de la cola programada la entrada de una descarga que ha terminado."""
+        for id_entrada, id_en_curso in list(self.programadas_en_curso.items()):
+            if id_en_curso == id_descarga:
+                del self.programadas_en_curso[id_entrada]
+                cola_programada.quitar(id_entrada)
+        self.pausadas_por_franja.discard(id_descarga)
+    
     def _actualizar_progreso(self) -> None:
         """Procesa los mensajes en la cola para actualizar la interfaz."""
         try:
@@ -96,12 +197,27 @@ class DownloadManager:
                     self._procesar_inicio_descarga(*valores)
                 elif tipo == "progreso":
                     self._procesar_progreso_descarga(*valores)
+                elif tipo == "estado":
+                    self._procesar_estado_descarga(*valores)
+                elif tipo == "intento":
+                    self._procesar_intento_fallido(*valores)
                 elif tipo == "completado":
                     self._procesar_descarga_completada(*valores)
                 elif tipo == "error":
                     self._procesar_error_descarga(*valores)
                 elif tipo == "cancelado":
                     self._procesar_descarga_cancelada(*valores)
+                elif tipo == "suscripciones":
+                    self._procesar_suscripciones(*valores)
+                elif tipo == "importacion":
+                    self._procesar_lote_importado(*valores)
+                elif tipo == "importacion_fin":
+                    self._procesar_fin_importacion(*valores)
+                elif tipo == "plan":
+                    self._procesar_plan(*valores)
+                
+                if tipo in ("completado", "error", "cancelado"):
+                    self._finalizar_descarga(valores[0])
                     
         except Exception as e:
             print(f"Error en actualizar_progreso: {str(e)}")
@@ -114,7 +230,9 @@ class DownloadManager:
             url, 
             es_descarga_activa=True, 
             on_cancelar_callback=self.cancelar_descarga,
-            id_descarga=id_descarga
+            id_descarga=id_descarga,
+            on_pausar_callback=self.pausar_descarga,
+            on_reanudar_callback=self.reanudar_descarga
         )
         self.items_descarga[id_descarga] = item
     
@@ -125,8 +243,26 @@ class DownloadManager:
             # Forzar actualización visual
             self.ventana.update_idletasks()
     
-    def _procesar_descarga_completada(self, id_descarga: int, ruta_guardado: str) -> None:
-        """Procesa la finalización exitosa de una descarga."""
+    def _procesar_estado_descarga(self, id_descarga: int, texto: str) -> None:
+        """Muestra la etapa en la que se encuentra una descarga activa."""
+        if id_descarga in self.items_descarga:
+            self.items_descarga[id_descarga].info_var.set(texto)
+    
+    def _procesar_intento_fallido(self, id_descarga: int, registro: str) -> None:
+        """Añade un intento fallido al historial de intentos de una descarga."""
+        if id_descarga in self.items_descarga:
+            self.items_descarga[id_descarga].registrar_intento(registro)
+    
+    def _procesar_descarga_completada(self, id_descarga: int, ruta_guardado: str, unida: bool = False) -> None:
+        """
+        Procesa la finalización exitosa de una descarga.
+        
+        Args:
+            id_descarga: ID de la descarga
+            ruta_guardado: Ruta del archivo descargado
+            unida: Si es True, la descarga se unió a otra del mismo video, que
+                   ya avisa al terminar
+        """
         if id_descarga in self.items_descarga:
             # Obtener solo el nombre del video sin extensión
             nombre_archivo = os.path.basename(ruta_guardado)
@@ -136,8 +272,13 @@ class DownloadManager:
             tamano_bytes = os.path.getsize(ruta_guardado)
             tamano_formateado = formatear_tamano(tamano_bytes)
             
-            # Guardar en el historial y obtener la fecha actual que se asignó
-            fecha_descarga = agregar_video_historial(nombre_video, ruta_guardado)
+            # Guardar en el historial (y en el índice de descargados) y obtener la fecha asignada.
+            # Un recorte no cuenta como video descargado
+            extractor, id_video = ("", "")
+            if id_descarga not in self.recortes:
+                extractor, id_video = identificar_descarga(self.items_descarga[id_descarga].url) or ("", "")
+            quitar_fallo(self.items_descarga[id_descarga].url)
+            fecha_descarga = agregar_video_historial(nombre_video, ruta_guardado, extractor, id_video)
             
             # Actualizar el elemento de la lista con la ruta del archivo, su tamaño y la fecha
             self.items_descarga[id_descarga].completado(
@@ -158,18 +299,34 @@ class DownloadManager:
             # Actualizar contador de videos descargados
             self._actualizar_contador()
             
-            messagebox.showinfo("Éxito", f"Video guardado en:\n{ruta_guardado}")
+            # Los lotes no abren un aviso por cada video: se ven en la lista de completadas.
+            # Tampoco las peticiones unidas a otra descarga: el mismo archivo se avisa una vez
+            if id_descarga not in self.descargas_en_lote and not unida:
+                messagebox.showinfo("Éxito", f"Video guardado en:\n{ruta_guardado}")
     
     def _procesar_error_descarga(self, id_descarga: int, error_mensaje: str) -> None:
         """Procesa un error durante la descarga."""
         if id_descarga in self.items_descarga:
-            self.items_descarga[id_descarga].info_var.set("Error")
+            item = self.items_descarga[id_descarga]
+            item.info_var.set("Error")
             del self.items_descarga[id_descarga]  # Eliminar del diccionario
             self._reorganizar_lista()
             
-            # Si el error no fue por cancelación del usuario, mostrar mensaje
+            # Si el error no fue por cancelación del usuario, registrarlo y avisar
             if "cancelada por el usuario" not in error_mensaje.lower():
-                messagebox.showerror("Error", f"No se pudo descargar el video.\n{error_mensaje}")
+                if id_descarga in self.recortes:
+                    # No se registra: reintentarlo desde la ventana de fallos bajaría el video entero
+                    messagebox.showerror("Error", f"No se pudo descargar el recorte.\n{error_mensaje}")
+                    return
+                url, calidad = self.peticiones.get(id_descarga, (item.url, ""))
+                clase = registrar_fallo(url, calidad, error_mensaje, len(item.intentos))
+                # Los lotes no abren un aviso por cada fallo: se revisan en la ventana de fallos
+                if id_descarga not in self.descargas_en_lote:
+                    messagebox.showerror(
+                        "Error",
+                        f"No se pudo descargar el video ({DESCRIPCION_FALLOS[clase].lower()}).\n"
+                        f"{error_mensaje}\n\nPuede reintentarlo desde la ventana de fallos."
+                    )
     
     def _procesar_descarga_cancelada(self, id_descarga: int, ruta_temporal: str = None) -> None:
         """Procesa la cancelación de una descarga."""
@@ -233,34 +390,268 @@ class DownloadManager:
                 self.frame_activas, 
                 item.url,
                 on_cancelar_callback=self.cancelar_descarga,
-                id_descarga=id_descarga  # Pasar el ID de descarga
+                id_descarga=id_descarga,  # Pasar el ID de descarga
+                on_pausar_callback=self.pausar_descarga,
+                on_reanudar_callback=self.reanudar_descarga
             )
             # Copiar el estado actual
+            nuevo_item.intentos = item.intentos
+            nuevo_item.mostrar_pausa(item.pausada)
             if hasattr(item, 'progreso') and item.progreso:
                 nuevo_item.actualizar(item.progreso["value"], 0)
             # Reemplazar la referencia en el diccionario
             self.items_descarga[id_descarga] = nuevo_item
     
-    def iniciar_descarga(self, url: str, calidad: str = "") -> None:
+    def _procesar_suscripciones(self, urls: list) -> None:
+        """
+        Encola en segundo plano los videos nuevos encontrados en las suscripciones.
+        
+        Pasan por la cola de importación, así que no se lanzan más de
+        IMPORTADAS_EN_CURSO a la vez aunque lleguen cientos.
+        """
+        from utils.config import obtener_calidad_video
+        calidad = obtener_calidad_video()
+        self.cola_importacion.extend(
+            (url, calidad, True) for url in urls if not esta_descargado(clave_de_url(url))
+        )
+        self._lanzar_importadas()
+    
+    def importar_urls(self, lineas: Iterable[str], calidad: str = "", planificar: bool = False) -> None:
+        """
+        Importa una lista de URLs (texto pegado o archivo) sin bloquear la interfaz.
+        
+        Las líneas se analizan en otro hilo; las URLs nuevas llegan en lotes a
+        la cola de importación, de la que se lanzan IMPORTADAS_EN_CURSO
+        descargas a la vez.
+        
+        Args:
+            lineas: Líneas de texto con las URLs (se consumen en el hilo)
+            calidad: ID del formato a descargar
+            planificar: Si es True, antes de encolar nada se estima el lote y
+                        se pide confirmación
+        """
+        if planificar:
+            self.planificar_urls(lineas, calidad)
+            return
+        
+        def importar_en_hilo():
+            resumen = {}
+            try:
+                for lote in importar_urls(lineas, resumen):
+                    self.cola_actualizaciones.put(("importacion", lote, calidad))
+            except Exception as e:
+                print(f"Error al importar las URLs: {str(e)}")
+                resumen['error'] = str(e)
+            self.cola_actualizaciones.put(("importacion_fin", resumen))
+        
+        threading.Thread(target=importar_en_hilo, daemon=True).start()
+    
+    def planificar_urls(self, lineas: Iterable[str], calidad: str = "") -> None:
+        """
+        Estima el tamaño, la duración y el espacio de una importación antes de encolarla.
+        
+        La estimación se hace en otro hilo; al terminar se muestra el plan y
+        las URLs solo se encolan si el usuario lo confirma.
+        
+        Args:
+            lineas: Líneas de texto con las URLs (se consumen en el hilo)
+            calidad: ID del formato a descargar
+        """
+        def planificar_en_hilo():
+            resumen = {}
+            try:
+                urls = [url for lote in importar_urls(lineas, resumen) for url in lote]
+                self.progreso_planificacion = (0, len(urls))
+                plan = planificar_lote(
+                    urls, calidad,
+                    lambda hechos, total: setattr(self, 'progreso_planificacion', (hechos, total))
+                )
+            except Exception as e:
+                print(f"Error al planificar las URLs: {str(e)}")
+                resumen['error'] = str(e)
+                self.cola_actualizaciones.put(("importacion_fin", resumen))
+                return
+            finally:
+                self.progreso_planificacion = None
+            self.cola_actualizaciones.put(("plan", plan, calidad, resumen))
+        
+        threading.Thread(target=planificar_en_hilo, daemon=True).start()
+    
+    def _procesar_plan(self, plan: dict, calidad: str, resumen: dict) -> None:
+        """Muestra el plan de una importación y la encola si se acepta."""
+        if not plan['elementos']:
+            self._procesar_fin_importacion(resumen)
+            return
+        urls = [elemento['url'] for elemento in plan['elementos'] if not elemento['error']]
+        VentanaPlan(self.ventana, plan, lambda: self._procesar_lote_importado(urls, calidad))
+    
+    def _procesar_lote_importado(self, urls: list, calidad: str) -> None:
+        """Añade un lote de URLs importadas a la cola de importación."""
+        self.cola_importacion.extend((url, calidad, False) for url in urls)
+        self._lanzar_importadas()
+    
+    def _lanzar_importadas(self) -> None:
+        """Lanza descargas de la cola de importación hasta llenar sus plazas."""
+        from utils.config import IMPORTADAS_EN_CURSO
+        while self.cola_importacion and len(self.importadas_en_curso) < IMPORTADAS_EN_CURSO:
+            url, calidad, segundo_plano = self.cola_importacion.popleft()
+            self.importadas_en_curso.add(
+                self._lanzar_descarga(url, calidad, segundo_plano=segundo_plano, en_lote=True)
+            )
+    
+    def reintentar_fallos(self, fallos: list) -> None:
+        """
+        Vuelve a encolar descargas fallidas.
+        
+        Pasan por la misma cola que las importaciones, así que se lanzan
+        como mucho IMPORTADAS_EN_CURSO a la vez. Cada fallo sigue registrado
+        hasta que su descarga termine bien.
+        
+        Args:
+            fallos: Fallos a reintentar (diccionarios con 'url' y 'calidad')
+        """
+        self.cola_importacion.extend((fallo['url'], fallo.get('calidad', ''), False) for fallo in fallos)
+        self._lanzar_importadas()
+    
+    def _procesar_fin_importacion(self, resumen: dict) -> None:
+        """Informa del resultado de una importación."""
+        if resumen.get('error'):
+            messagebox.showerror("Error", f"No se pudo completar la importación.\n{resumen['error']}")
+            return
+        messagebox.showinfo(
+            "Importación",
+            f"URLs encontradas: {resumen.get('encontradas', 0)}\n"
+            f"Repetidas: {resumen.get('repetidas', 0)}\n"
+            f"Ya descargadas: {resumen.get('descargadas', 0)}\n"
+            f"Añadidas a la cola: {resumen.get('nuevas', 0)}"
+        )
+    
+    def sincronizar_suscripciones(self, solo_vencidas: bool = False) -> None:
+        """
+        Busca videos nuevos en las suscripciones (en otro hilo) y los encola en segundo plano.
+        
+        Args:
+            solo_vencidas: Si es True, solo se revisan las suscripciones que llevan
+                           DIAS_ENTRE_SINCRONIZACIONES días sin sincronizarse
+        """
+        def sincronizar_en_hilo():
+            try:
+                nuevos = sincronizar_suscripciones(solo_vencidas)
+            except Exception as e:
+                print(f"Error al sincronizar las suscripciones: {str(e)}")
+                return
+            if nuevos:
+                self.cola_actualizaciones.put(("suscripciones", nuevos))
+        
+        threading.Thread(target=sincronizar_en_hilo, daemon=True).start()
+    
+    def iniciar_descarga(self, url: str, calidad: str = "", preguntar_duplicado: bool = True,
+                         segundo_plano: bool = False, tramos: Optional[list] = None) -> bool:
         """
         Inicia la descarga de un video.
         
+        Antes de hacer ninguna consulta a la red se comprueba en el índice de
+        descargados si el video ya se descargó.
+        
         Args:
             url: URL del video a descargar
             calidad: ID del formato a descargar (vacío para la mejor calidad)
+            preguntar_duplicado: Si es True, pregunta si se quiere descargar de
+                                 nuevo un video ya descargado; si es False, lo omite
+            segundo_plano: Si es True, la descarga cede las plazas a las de primer plano
+            tramos: Tramos (inicio, fin) en segundos a los que limitar la descarga
+                    (sin ffmpeg se avisa y se descarga el video completo)
+        
+        Returns:
+            True si se inició la descarga, False si se omitió
         """
         if not url:
             messagebox.showwarning("Advertencia", "Por favor, ingresa una URL válida.")
-            return
+            return False
+        
+        if tramos and not ffmpeg_disponible():
+            messagebox.showwarning(
+                "Recorte no disponible",
+                "Para descargar solo unos tramos se necesita ffmpeg, que no está instalado.\n\n"
+                "Se descargará el video completo."
+            )
+            tramos = None
+        
+        # Un recorte de un video ya descargado no es un duplicado
+        if not tramos and esta_descargado(clave_de_url(url)):
+            if not preguntar_duplicado:
+                print(f"Ya descargado, se omite: {url}")
+                return False
+            if not messagebox.askyesno(
+                "Ya descargado",
+                "Este video ya se descargó.\n\n¿Desea descargarlo de nuevo?"
+            ):
+                return False
+        
+        self._lanzar_descarga(url, calidad, segundo_plano=segundo_plano, en_lote=segundo_plano,
+                              tramos=tramos)
+        return True
+    
+    def programar_descarga(self, url: str, calidad: str, inicio: str, fin: Optional[str] = None,
+                           limite_kbs: Optional[int] = None) -> bool:
+        """
+        Añade una descarga a la cola programada para ejecutarla en una franja horaria.
+        
+        Args:
+            url: URL del video a descargar
+            calidad: ID del formato a descargar (vacío para la mejor calidad)
+            inicio: Hora "HH:MM" a partir de la cual puede empezar
+            fin: Hora "HH:MM" en la que se pausa hasta la franja siguiente (None para no pausarla)
+            limite_kbs: Velocidad máxima en KB/s mientras se ejecuta (None sin límite)
+        
+        Returns:
+            True si se programó, False si se omitió
+        """
+        if not url:
+            messagebox.showwarning("Advertencia", "Por favor, ingresa una URL válida.")
+            return False
+        
+        if esta_descargado(clave_de_url(url)) and not messagebox.askyesno(
+            "Ya descargado",
+            "Este video ya se descargó.\n\n¿Desea programarlo de nuevo?"
+        ):
+            return False
+        
+        cola_programada.agregar(url, calidad, inicio, fin, limite_kbs)
+        self._revisar_programadas()
+        return True
+    
+    def _lanzar_descarga(self, url: str, calidad: str = "", limite_velocidad: Optional[int] = None,
+                         clave_temporal: Optional[str] = None, segundo_plano: bool = False,
+                         en_lote: bool = False, tramos: Optional[list] = None) -> int:
+        """
+        Crea el hilo de una descarga y lo inicia.
         
+        Args:
+            url: URL del video a descargar
+            calidad: ID del formato a descargar
+            limite_velocidad: Velocidad máxima en bytes por segundo (None sin límite)
+            clave_temporal: Nombre fijo para los archivos parciales
+            segundo_plano: Si es True, la descarga cede las plazas a las de primer plano
+            en_lote: Si es True, no se abre un aviso al terminar (los errores solo se registran)
+            tramos: Tramos (inicio, fin) en segundos a los que limitar la descarga
+        
+        Returns:
+            ID asignado a la descarga
+        """
         # Generar un ID único para esta descarga
         self.ultimo_id_descarga += 1
         id_descarga = self.ultimo_id_descarga
+        self.peticiones[id_descarga] = (url, calidad)
+        if en_lote:
+            self.descargas_en_lote.add(id_descarga)
+        if tramos:
+            self.recortes[id_descarga] = tramos
         
         # Crear y comenzar el hilo de descarga
         hilo_descarga = threading.Thread(
             target=self._descargar_en_hilo,
-            args=(url, calidad, id_descarga)
+            args=(url, calidad, id_descarga, limite_velocidad, clave_temporal, segundo_plano, tramos)
         )
         hilo_descarga.daemon = True
         
@@ -269,6 +660,7 @@ class DownloadManager:
         
         # Iniciar el hilo
         hilo_descarga.start()
+        return id_descarga
     
     def cancelar_descarga(self, id_descarga: int) -> None:
         """
@@ -294,7 +686,43 @@ class DownloadManager:
             # Si no se pudo cancelar, actualizar el estado a error
             self.cola_actualizaciones.put(("error", id_descarga, "No se pudo cancelar la descarga"))
     
-    def _descargar_en_hilo(self, url: str, calidad: str = "", id_descarga: int = None) -> None:
+    def pausar_descarga(self, id_descarga: int) -> None:
+        """
+        Pausa una descarga en progreso, liberando su plaza y conservando el archivo parcial.
+        
+        Si la descarga está en una etapa que no se puede pausar (finalizando o
+        unida a otra descarga), se desactiva el botón y se muestra el motivo.
+        
+        Args:
+            id_descarga: ID de la descarga a pausar
+        """
+        if id_descarga not in self.items_descarga:
+            return
+        item = self.items_descarga[id_descarga]
+        if pausar_descarga(id_descarga):
+            item.mostrar_pausa(True)
+            item.info_var.set("Pausando...")
+        else:
+            motivo = motivo_sin_pausa(id_descarga)
+            if motivo:
+                item.desactivar_pausa(motivo)
+                item.info_var.set(motivo)
+    
+    def reanudar_descarga(self, id_descarga: int) -> None:
+        """
+        Reanuda una descarga pausada desde el punto en que se detuvo.
+        
+        Args:
+            id_descarga: ID de la descarga a reanudar
+        """
+        if id_descarga in self.items_descarga and reanudar_descarga(id_descarga):
+            self.items_descarga[id_descarga].mostrar_pausa(False)
+    
+    def _descargar_en_hilo(self, url: str, calidad: str = "", id_descarga: int = None,
+                           limite_velocidad: Optional[int] = None,
+                           clave_temporal: Optional[str] = None,
+                           segundo_plano: bool = False,
+                           tramos: Optional[list] = None) -> None:
         """
         Realiza la descarga en un hilo separado.
         
@@ -302,6 +730,10 @@ class DownloadManager:
             url: URL del video a descargar
             calidad: ID del formato a descargar
             id_descarga: ID único para identificar esta descarga
+            limite_velocidad: Velocidad máxima en bytes por segundo (None sin límite)
+            clave_temporal: Nombre fijo para los archivos parciales
+            segundo_plano: Si es True, la descarga cede las plazas a las de primer plano
+            tramos: Tramos (inicio, fin) en segundos a los que limitar la descarga
         """
         try:
             # Notificar inicio de descarga
@@ -311,23 +743,31 @@ class DownloadManager:
             ruta_guardado = descargar_video(url, 
                                             lambda p, v: self._progreso_callback(p, v, id_descarga), 
                                             calidad,
-                                            id_descarga)
+                                            id_descarga,
+                                            lambda texto: self.cola_actualizaciones.put(
+                                                ("estado", id_descarga, texto)),
+                                            lambda registro: self.cola_actualizaciones.put(
+                                                ("intento", id_descarga, registro)),
+                                            limite_velocidad,
+                                            clave_temporal,
+                                            segundo_plano,
+                                            tramos)
             
             # Notificar que se completó
-            self.cola_actualizaciones.put(("completado", id_descarga, ruta_guardado))
+            self.cola_actualizaciones.put(("completado", id_descarga, ruta_guardado, fue_unida(id_descarga)))
         except Exception as e:
             print(f"Error o cancelación en descarga: {str(e)}")
             error_mensaje = str(e)
             
             # Detectar si fue una cancelación
             if "cancelada por el usuario" in error_mensaje.lower():
-                # Buscar directorio de descargas para encontrar el archivo temporal
-                from utils.config import obtener_directorio_descargas
-                directorio = obtener_directorio_descargas()
+                # Buscar en el directorio temporal el archivo parcial de la descarga
+                from utils.config import obtener_directorio_temporal
+                directorio = obtener_directorio_temporal()
                 # Buscar archivos temporales que puedan coincidir con esta descarga
                 try:
                     import glob
-                    archivos = glob.glob(os.path.join(directorio, f"temp_download_{id_descarga}.*"))
+                    archivos = glob.glob(os.path.join(directorio, f"temp_download_{clave_temporal or id_descarga}.*"))
                     archivo_temporal = archivos[0] if archivos else None
                     
                     # Notificar cancelación
@@ -16,3 +16,22 @@ def centrar_ventana(ventana, ancho, alto):
     x = (pantalla_ancho // 2) - (ancho // 2)
     y = (pantalla_alto // 2) - (alto // 2)
     ventana.geometry(f"{ancho}x{alto}+{x}+{y}")
+
+def formatear_duracion(segundos):
+    """
+    Formatea una duración en segundos de forma legible (p. ej. "1 h 05 min").
+    
+    Args:
+        segundos: Duración en segundos
+    
+    Returns:
+        Cadena con la duración formateada
+    """
+    segundos = int(max(segundos, 0))
+    horas, resto = divmod(segundos, 3600)
+    minutos, segundos = divmod(resto, 60)
+    if horas:
+        return f"{horas} h {minutos:02d} min"
+    if minutos:
+        return f"{minutos} min {segundos:02d} s"
+    return f"{segundos} s"
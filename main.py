@@ -2,15 +2,19 @@
 Punto de entrada principal de la aplicación.
 """
 
+import argparse
 import os
-from utils.config import DOWNLOADS_DIR, ASSETS_DIR, cargar_configuracion
+from utils.config import (
+    DOWNLOADS_DIR, ASSETS_DIR, CACHE_YTDLP_DIR, COLA_COMPARTIDA_BD, MAX_DESCARGAS_SIMULTANEAS,
+    TITULO_APP, CALIDAD_AUDIO, CALIDAD_AUDIO_MP3, cargar_configuracion
+)
 
 def inicializar_directorios():
     """Inicializa los directorios necesarios para la aplicación."""
     # Cargar la configuración para obtener la carpeta de descargas actual
     cargar_configuracion()
     
-    for directorio in [DOWNLOADS_DIR, ASSETS_DIR]:
+    for directorio in [DOWNLOADS_DIR, ASSETS_DIR, CACHE_YTDLP_DIR]:
         if not os.path.exists(directorio):
             try:
                 os.makedirs(directorio)
@@ -18,11 +22,81 @@ def inicializar_directorios():
             except Exception as e:
                 print(f"Error al crear directorio {directorio}: {str(e)}")
 
+def crear_parser() -> argparse.ArgumentParser:
+    """Crea el analizador de los argumentos de la línea de órdenes."""
+    parser = argparse.ArgumentParser(
+        description=f"{TITULO_APP}. Sin argumentos abre la interfaz gráfica.")
+    parser.add_argument("--cola", default=COLA_COMPARTIDA_BD, metavar="RUTA",
+                        help="archivo SQLite de la cola compartida entre nodos")
+    parser.add_argument("--encolar", nargs="+", metavar="URL_O_ARCHIVO",
+                        help="añade URLs (o archivos .txt/.csv con URLs) a la cola compartida")
+    parser.add_argument("--calidad", default="",
+                        help="ID del formato de las URLs encoladas (por defecto la mejor calidad; "
+                             f"'{CALIDAD_AUDIO}' o '{CALIDAD_AUDIO_MP3}' para solo audio)")
+    parser.add_argument("--audio", action="store_true",
+                        help=f"encola solo el audio, sin recodificar (equivale a --calidad {CALIDAD_AUDIO})")
+    parser.add_argument("--nodo", nargs="?", const="", metavar="NOMBRE",
+                        help="ejecuta un nodo sin interfaz que descarga los trabajos de la cola")
+    parser.add_argument("--hilos", type=int, default=MAX_DESCARGAS_SIMULTANEAS,
+                        help="trabajos que el nodo descarga a la vez")
+    parser.add_argument("--salir-al-vaciar", action="store_true",
+                        help="el nodo termina cuando no quedan trabajos pendientes ni en curso")
+    parser.add_argument("--estado", action="store_true",
+                        help="muestra cuántos trabajos hay en cada estado")
+    return parser
+
+def encolar(ruta_cola: str, entradas: list, calidad: str) -> None:
+    """
+    Añade a la cola compartida las URLs indicadas en la línea de órdenes.
+    
+    Args:
+        ruta_cola: Archivo SQLite de la cola
+        entradas: URLs o rutas de archivos con URLs
+        calidad: ID del formato a descargar
+    """
+    import itertools
+    from utils.cola_compartida import encolar_trabajos
+    from utils.importacion import importar_urls, lineas_de_archivo
+    
+    lineas = itertools.chain.from_iterable(
+        lineas_de_archivo(entrada) if os.path.isfile(entrada) else [entrada] for entrada in entradas)
+    resumen = {}
+    anadidas = repetidas = 0
+    for lote in importar_urls(lineas, resumen):
+        nuevas, ya_encoladas = encolar_trabajos(ruta_cola, lote, calidad)
+        anadidas += nuevas
+        repetidas += ya_encoladas
+    print(f"URLs encontradas: {resumen['encontradas']}, repetidas: {resumen['repetidas']}, "
+          f"ya descargadas: {resumen['descargadas']}, ya en la cola: {repetidas}, añadidas: {anadidas}")
+
 def main():
     """Función principal de la aplicación."""
+    argumentos = crear_parser().parse_args()
+    
     # Inicializar directorios necesarios
     inicializar_directorios()
     
+    if argumentos.encolar:
+        calidad = argumentos.calidad
+        if argumentos.audio and calidad not in (CALIDAD_AUDIO, CALIDAD_AUDIO_MP3):
+            calidad = CALIDAD_AUDIO
+        encolar(argumentos.cola, argumentos.encolar, calidad)
+    if argumentos.nodo is not None:
+        from nodo import NodoDescarga, nombre_nodo_predeterminado
+        NodoDescarga(argumentos.cola, argumentos.nodo or nombre_nodo_predeterminado(),
+                     argumentos.hilos, argumentos.salir_al_vaciar).ejecutar()
+    if argumentos.estado:
+        from utils.cola_compartida import contar_trabajos
+        conteo = contar_trabajos(argumentos.cola)
+        print(", ".join(f"{estado}: {total}" for estado, total in conteo.items()))
+    if argumentos.encolar or argumentos.nodo is not None or argumentos.estado:
+        return
+    
+    # Preparar en segundo plano la caché y los procesos de extracción
+    import threading
+    from utils.metadatos import calentar_extraccion
+    threading.Thread(target=calentar_extraccion, daemon=True).start()
+    
     # Iniciar la aplicación gráfica
     from gui.app import YoutubeDownloaderApp
     app = YoutubeDownloaderApp()
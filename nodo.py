@@ -0,0 +1,162 @@
+"""
+Nodo de descarga sin interfaz que toma trabajos de la cola compartida.
+
+Varios nodos (en la misma máquina o en varias) pueden apuntar al mismo
+archivo de cola: cada uno reclama trabajos de uno en uno, mantiene vivos
+sus arrendamientos con un hilo de latidos y los devuelve a la cola si se
+detiene. Las descargas se guardan en la carpeta de descargas del nodo.
+"""
+
+import itertools
+import os
+import socket
+import threading
+from typing import Dict, Tuple
+
+from downloader import descargar_video, cancelar_descarga
+from utils.archivo_descargas import clave_de_url, esta_descargado, identificar_descarga
+from utils.cola_compartida import (
+    reclamar_trabajo, renovar_trabajo, completar_trabajo, fallar_trabajo, liberar_trabajo,
+    contar_trabajos, TRABAJO_PENDIENTE, TRABAJO_EN_CURSO
+)
+from utils.config import INTERVALO_LATIDO, INTERVALO_SONDEO_COLA, MAX_DESCARGAS_SIMULTANEAS
+from utils.historial import agregar_video_historial
+
+class NodoDescarga:
+    """
+    Ejecuta los trabajos de la cola compartida con varios hilos de descarga.
+    """
+
+    def __init__(self, ruta_cola: str, nombre: str, hilos: int = MAX_DESCARGAS_SIMULTANEAS,
+                 salir_al_vaciar: bool = False):
+        """
+        Inicializa el nodo.
+
+        Args:
+            ruta_cola: Ruta del archivo SQLite de la cola compartida
+            nombre: Nombre del nodo (se guarda en los trabajos que reclama)
+            hilos: Trabajos que el nodo ejecuta a la vez
+            salir_al_vaciar: Si es True, el nodo termina cuando no quedan trabajos
+                             pendientes ni en curso
+        """
+        self.ruta_cola = ruta_cola
+        self.nombre = nombre
+        self.hilos = max(1, hilos)
+        self.salir_al_vaciar = salir_al_vaciar
+        self.detener = threading.Event()
+        # ID del trabajo -> (testigo, ID de la descarga local)
+        self.en_curso: Dict[int, Tuple[str, int]] = {}
+        self.perdidos = set()  # Trabajos cuyo arrendamiento reclamó otro nodo
+        self._lock = threading.Lock()
+        self._ids_descarga = itertools.count(1)
+
+    def ejecutar(self) -> None:
+        """Ejecuta el nodo hasta que se detenga (Ctrl+C) o se vacíe la cola."""
+        print(f"Nodo {self.nombre}: atendiendo la cola {self.ruta_cola} con {self.hilos} hilos")
+        threading.Thread(target=self._latir, daemon=True).start()
+        trabajadores = [threading.Thread(target=self._trabajar, daemon=True) for _ in range(self.hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        try:
+            for trabajador in trabajadores:
+                while trabajador.is_alive():
+                    trabajador.join(timeout=1)
+        except KeyboardInterrupt:
+            print(f"Nodo {self.nombre}: deteniendo y devolviendo los trabajos en curso")
+            self.detener.set()
+            with self._lock:
+                for id_descarga in [id_descarga for _, id_descarga in self.en_curso.values()]:
+                    cancelar_descarga(id_descarga)
+            for trabajador in trabajadores:
+                trabajador.join(timeout=10)
+        self.detener.set()
+        print(f"Nodo {self.nombre}: terminado")
+
+    def _trabajar(self) -> None:
+        """Bucle de un hilo: reclama trabajos y los descarga."""
+        while not self.detener.is_set():
+            try:
+                trabajo = reclamar_trabajo(self.ruta_cola, self.nombre)
+            except Exception as e:
+                print(f"Nodo {self.nombre}: error al leer la cola: {str(e)}")
+                trabajo = None
+
+            if trabajo:
+                self._ejecutar_trabajo(trabajo)
+            elif self.salir_al_vaciar and self._cola_vacia():
+                return
+            else:
+                self.detener.wait(INTERVALO_SONDEO_COLA)
+
+    def _cola_vacia(self) -> bool:
+        """Indica si no quedan trabajos pendientes ni en curso en ningún nodo."""
+        try:
+            conteo = contar_trabajos(self.ruta_cola)
+        except Exception:
+            return False
+        return not conteo[TRABAJO_PENDIENTE] and not conteo[TRABAJO_EN_CURSO]
+
+    def _ejecutar_trabajo(self, trabajo: dict) -> None:
+        """Descarga un trabajo reclamado y registra su resultado en la cola."""
+        id_trabajo, testigo, url = trabajo['id'], trabajo['testigo'], trabajo['url']
+        id_descarga = next(self._ids_descarga)
+        with self._lock:
+            self.en_curso[id_trabajo] = (testigo, id_descarga)
+        print(f"Nodo {self.nombre}: trabajo {id_trabajo} ({url}), intento {trabajo['intentos']}")
+
+        try:
+            if esta_descargado(clave_de_url(url)):
+                print(f"Nodo {self.nombre}: {url} ya estaba descargado")
+                completar_trabajo(self.ruta_cola, id_trabajo, testigo)
+                return
+
+            ruta_guardado = descargar_video(url, calidad=trabajo['calidad'], id_descarga=id_descarga,
+                                            clave_temporal=f"cola{id_trabajo}")
+            extractor, id_video = identificar_descarga(url) or ("", "")
+            nombre_video = os.path.splitext(os.path.basename(ruta_guardado))[0]
+            agregar_video_historial(nombre_video, ruta_guardado, extractor, id_video)
+            if completar_trabajo(self.ruta_cola, id_trabajo, testigo, ruta_guardado):
+                print(f"Nodo {self.nombre}: trabajo {id_trabajo} guardado en {ruta_guardado}")
+        except Exception as e:
+            self._registrar_error(id_trabajo, testigo, str(e))
+        finally:
+            with self._lock:
+                self.en_curso.pop(id_trabajo, None)
+                self.perdidos.discard(id_trabajo)
+
+    def _registrar_error(self, id_trabajo: int, testigo: str, mensaje: str) -> None:
+        """Devuelve a la cola (o da por fallido) un trabajo que no terminó."""
+        with self._lock:
+            perdido = id_trabajo in self.perdidos
+        try:
+            if perdido:
+                print(f"Nodo {self.nombre}: trabajo {id_trabajo} reclamado por otro nodo")
+            elif self.detener.is_set():
+                liberar_trabajo(self.ruta_cola, id_trabajo, testigo)
+            else:
+                estado = fallar_trabajo(self.ruta_cola, id_trabajo, testigo, mensaje)
+                print(f"Nodo {self.nombre}: trabajo {id_trabajo} ({estado}): {mensaje}")
+        except Exception as e:
+            print(f"Nodo {self.nombre}: no se pudo actualizar el trabajo {id_trabajo}: {str(e)}")
+
+    def _latir(self) -> None:
+        """Renueva periódicamente los arrendamientos de los trabajos en curso."""
+        while not self.detener.wait(INTERVALO_LATIDO):
+            with self._lock:
+                en_curso = dict(self.en_curso)
+            for id_trabajo, (testigo, id_descarga) in en_curso.items():
+                try:
+                    vigente = renovar_trabajo(self.ruta_cola, id_trabajo, testigo)
+                except Exception as e:
+                    # Si la cola no responde se reintenta en el siguiente latido
+                    print(f"Nodo {self.nombre}: no se pudo renovar el trabajo {id_trabajo}: {str(e)}")
+                    continue
+                if not vigente:
+                    # Otro nodo lo reclamó: dejar de descargarlo para no duplicarlo
+                    with self._lock:
+                        self.perdidos.add(id_trabajo)
+                    cancelar_descarga(id_descarga)
+
+def nombre_nodo_predeterminado() -> str:
+    """Devuelve un nombre de nodo único en la máquina (equipo y proceso)."""
+    return f"{socket.gethostname()}-{os.getpid()}"
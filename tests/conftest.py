@@ -0,0 +1,32 @@
+"""
+Utilidades comunes de las pruebas.
+
+Las pruebas no deben tocar los archivos de la aplicación (descargas,
+índices, estadísticas), así que se redirigen a un directorio temporal.
+"""
+
+import pytest
+
+import downloader
+import utils.deduplicacion
+import utils.metadatos
+from utils.ancho_banda import estimador_ancho_banda
+
+@pytest.fixture
+def directorio_descargas(tmp_path, monkeypatch):
+    """Descarga en un directorio temporal sin escribir índices ni estadísticas reales."""
+    monkeypatch.setattr(downloader, 'obtener_directorio_descargas', lambda: str(tmp_path))
+    monkeypatch.setattr(downloader, 'obtener_directorio_temporal', lambda: str(tmp_path))
+    monkeypatch.setattr(utils.deduplicacion, 'INDICE_CONTENIDO_ARCHIVO', str(tmp_path / "indice.json"))
+    monkeypatch.setattr(estimador_ancho_banda, 'archivo', str(tmp_path / "red.json"))
+    return tmp_path
+
+@pytest.fixture
+def grupo_preparado():
+    """Arranca los procesos del grupo para que su arranque no cuente en los tiempos."""
+    pool = utils.metadatos._obtener_pool()
+    futuros = [pool.submit(utils.metadatos._calentar_proceso)
+               for _ in range(utils.metadatos.PROCESOS_EXTRACCION)]
+    for futuro in futuros:
+        futuro.result(timeout=60)
+    return pool
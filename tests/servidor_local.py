@@ -0,0 +1,158 @@
+"""
+Servidor HTTP local que imita al de un video e inyecta fallos, para las pruebas.
+
+Sirve un archivo de bytes conocidos (admite Range para continuar descargas)
+y, antes de responder con normalidad, consume una lista de fallos: códigos
+HTTP (503, 429...), 'corte' (envía la mitad de lo pedido y resetea la
+conexión), 'lento' (espera 'retardo' segundos antes de responder),
+'parada' (envía la mitad y deja la conexión abierta sin enviar nada más) o
+'goteo' (envía el cuerpo en trozos pequeños con una pausa entre ellos).
+"""
+
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+from utils.metadatos import guardar_info_en_cache
+
+# Bytes de cada trozo y segundos entre trozos de una respuesta 'goteo'
+_TROZO_GOTEO = 32 * 1024
+_PAUSA_GOTEO = 0.1
+
+class _Manejador(BaseHTTPRequestHandler):
+    """Responde a las peticiones según los fallos pendientes del servidor."""
+
+    def log_message(self, formato, *args):
+        pass
+
+    def do_HEAD(self):
+        self._responder(cuerpo=False)
+
+    def do_GET(self):
+        self._responder(cuerpo=True)
+
+    def _responder(self, cuerpo: bool) -> None:
+        servidor = self.server
+        rango = self.headers.get('Range')
+        with servidor.lock:
+            fallo = servidor.fallos.pop(0) if servidor.fallos else None
+            servidor.peticiones.append((self.path, rango, fallo, time.monotonic()))
+
+        if isinstance(fallo, int):
+            self.send_error(fallo)
+            return
+        if fallo == 'lento':
+            # Se espera sin responder, como un servidor que no contesta
+            if servidor.detener.wait(servidor.retardo):
+                return
+
+        contenido = servidor.contenido
+        inicio = 0
+        if rango and rango.startswith('bytes='):
+            inicio = int(rango[len('bytes='):].split('-')[0] or 0)
+        if inicio:
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {inicio}-{len(contenido) - 1}/{len(contenido)}")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(len(contenido) - inicio))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if not cuerpo:
+            return
+
+        if fallo == 'parada':
+            mitad = inicio + (len(contenido) - inicio) // 2
+            self.wfile.write(contenido[inicio:mitad])
+            self.wfile.flush()
+            servidor.detener.wait(servidor.retardo)
+            return
+        if fallo == 'corte':
+            mitad = inicio + (len(contenido) - inicio) // 2
+            self.wfile.write(contenido[inicio:mitad])
+            self.wfile.flush()
+            # Cerrar con RST en lugar de FIN: el cliente ve "Connection reset"
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.connection.close()
+            return
+        if fallo == 'goteo':
+            try:
+                for posicion in range(inicio, len(contenido), _TROZO_GOTEO):
+                    self.wfile.write(contenido[posicion:posicion + _TROZO_GOTEO])
+                    self.wfile.flush()
+                    if servidor.detener.wait(_PAUSA_GOTEO):
+                        return
+            except OSError:
+                # El cliente cerró la conexión a mitad del cuerpo
+                with servidor.lock:
+                    servidor.desconexiones += 1
+            return
+        self.wfile.write(contenido[inicio:])
+
+class ServidorLocal(ThreadingHTTPServer):
+    """
+    Servidor HTTP en 127.0.0.1 con un puerto libre, en un hilo propio.
+
+    Attributes:
+        contenido: Bytes que sirve
+        fallos: Fallos pendientes, uno por petición
+        peticiones: (ruta, cabecera Range, fallo aplicado, momento) de cada petición
+        retardo: Segundos que tarda una respuesta 'lento'
+        desconexiones: Respuestas 'goteo' que el cliente cortó antes de terminar
+    """
+
+    daemon_threads = True
+
+    def __init__(self, tamano: int = 2 * 1024 * 1024, fallos: Optional[list] = None,
+                 retardo: float = 30.0):
+        super().__init__(('127.0.0.1', 0), _Manejador)
+        self.contenido = bytes(range(256)) * (tamano // 256)
+        self.fallos = list(fallos or [])
+        self.peticiones: List[Tuple[str, Optional[str], object, float]] = []
+        self.retardo = retardo
+        self.desconexiones = 0
+        self.lock = threading.Lock()
+        self.detener = threading.Event()
+
+    def url(self, ruta: str = '/video.mp4') -> str:
+        """Devuelve la URL de una ruta del servidor."""
+        return f"http://127.0.0.1:{self.server_address[1]}{ruta}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.detener.set()
+        self.shutdown()
+        self.server_close()
+
+def preparar_video(servidor, titulo: str = "Video de prueba") -> str:
+    """
+    Deja en la caché de metadatos la información de un video servido por el servidor local.
+
+    Args:
+        servidor: ServidorLocal que sirve el video
+        titulo: Título del video
+
+    Returns:
+        URL del video
+    """
+    url = servidor.url()
+    guardar_info_en_cache(url, {
+        'id': 'video',
+        'title': titulo,
+        'extractor': 'generic',
+        'extractor_key': 'Generic',
+        'webpage_url': url,
+        'duration': 10,
+        'formats': [{
+            'format_id': 'mp4', 'url': url, 'ext': 'mp4', 'protocol': 'http',
+            'vcodec': 'h264', 'acodec': 'aac', 'filesize': len(servidor.contenido),
+        }],
+    })
+    return url
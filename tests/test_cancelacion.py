@@ -0,0 +1,127 @@
+"""
+Pruebas de la latencia de cancelación en cada etapa: extracción, transferencia y posproceso.
+"""
+
+import glob
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+import downloader
+from tests.servidor_local import ServidorLocal, preparar_video
+from utils.postproceso import postprocesar
+
+def _tamano_parcial(directorio, id_descarga) -> int:
+    """Bytes del .part de una descarga (0 si aún no existe)."""
+    return sum(os.path.getsize(ruta) for ruta in glob.glob(
+        os.path.join(str(directorio), f"temp_download_{id_descarga}.*.part")))
+
+def _ffmpeg_escribiendo(ruta: str) -> bool:
+    """Indica si hay un ffmpeg en marcha que escribe en la ruta."""
+    return subprocess.run(['pgrep', '-f', ruta], stdout=subprocess.DEVNULL).returncode == 0
+
+def test_cancelar_durante_la_extraccion(directorio_descargas, grupo_preparado):
+    id_descarga = 4101
+    errores = []
+
+    def descargar():
+        try:
+            downloader.descargar_video(url, id_descarga=id_descarga)
+        except Exception as e:
+            errores.append(e)
+
+    with ServidorLocal(fallos=['lento'], retardo=60) as servidor:
+        url = servidor.url('/sin_respuesta.mp4')
+        hilo = threading.Thread(target=descargar)
+        hilo.start()
+        time.sleep(1)
+        assert hilo.is_alive()
+
+        inicio = time.monotonic()
+        assert downloader.cancelar_descarga(id_descarga)
+        hilo.join(timeout=10)
+        latencia = time.monotonic() - inicio
+
+    assert not hilo.is_alive()
+    assert errores and "cancelada por el usuario" in str(errores[0]).lower()
+    # La espera de la extracción comprueba la cancelación cada 0,2 s
+    assert latencia < 1
+    assert downloader.estadisticas_cancelacion()['maxima_s'] < 1
+
+def test_cancelar_durante_una_transferencia_lenta(directorio_descargas):
+    id_descarga = 4102
+    errores = []
+
+    def descargar():
+        try:
+            downloader.descargar_video(url, id_descarga=id_descarga)
+        except Exception as e:
+            errores.append(e)
+
+    with ServidorLocal(fallos=['goteo']) as servidor:
+        url = preparar_video(servidor)
+        hilo = threading.Thread(target=descargar)
+        hilo.start()
+        fin = time.monotonic() + 10
+        while _tamano_parcial(directorio_descargas, id_descarga) < 256 * 1024:
+            assert time.monotonic() < fin, "La transferencia no empezó"
+            time.sleep(0.05)
+
+        inicio = time.monotonic()
+        assert downloader.cancelar_descarga(id_descarga)
+        hilo.join(timeout=10)
+        latencia = time.monotonic() - inicio
+
+        # Se cerró la conexión: el servidor no pudo seguir enviando
+        time.sleep(0.3)
+        assert servidor.desconexiones == 1
+        assert len(servidor.peticiones) == 1
+
+    assert not hilo.is_alive()
+    assert errores and "cancelada por el usuario" in str(errores[0]).lower()
+    # Al goteo aún le quedaban varios segundos
+    assert latencia < 1
+    # El .part se conserva para continuar o borrarlo después
+    assert 0 < _tamano_parcial(directorio_descargas, id_descarga) < len(servidor.contenido)
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="Se necesita ffmpeg")
+def test_cancelar_durante_el_posproceso_detiene_ffmpeg(tmp_path):
+    # Un minuto de tono sin comprimir, concatenado muchas veces y recodificado a MP3
+    entrada = str(tmp_path / "tono.wav")
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'sine=duration=60',
+                    entrada], check=True)
+    ruta_temporal = str(tmp_path / "temp_download_4103.mp3")
+    cancelada = threading.Event()
+    errores = []
+
+    def posprocesar():
+        try:
+            postprocesar([entrada] * 200, ruta_temporal, str(tmp_path / "final.mp3"), "Tono",
+                         cancelada.is_set, 'mp3', concatenar=True)
+        except Exception as e:
+            errores.append(e)
+
+    hilo = threading.Thread(target=posprocesar)
+    hilo.start()
+    fin = time.monotonic() + 30
+    while not _ffmpeg_escribiendo(ruta_temporal):
+        assert time.monotonic() < fin, "ffmpeg no empezó"
+        time.sleep(0.05)
+
+    inicio = time.monotonic()
+    cancelada.set()
+    hilo.join(timeout=10)
+    latencia = time.monotonic() - inicio
+
+    assert not hilo.is_alive()
+    assert errores and "cancelada por el usuario" in str(errores[0]).lower()
+    # La marca .cancelar se crea y se comprueba cada 0,2 s
+    assert latencia < 2
+    assert not _ffmpeg_escribiendo(ruta_temporal)
+    assert not os.path.exists(ruta_temporal)
+    assert not os.path.exists(ruta_temporal + ".cancelar")
+    assert os.path.exists(entrada)
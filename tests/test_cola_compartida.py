@@ -0,0 +1,89 @@
+"""
+Pruebas de la cola compartida con varios procesos sobre el mismo archivo SQLite.
+
+Cada proceso hace de nodo: abre la base por su cuenta, como lo haría otra
+máquina que ve el mismo archivo.
+"""
+
+import multiprocessing
+import time
+
+import pytest
+
+import utils.cola_compartida as cola_compartida
+from utils.cola_compartida import (
+    TRABAJO_COMPLETADO, TRABAJO_EN_CURSO, completar_trabajo, contar_trabajos,
+    encolar_trabajos, fallar_trabajo, reclamar_trabajo, renovar_trabajo,
+)
+
+def _vaciar_cola(ruta: str, nodo: str) -> list:
+    """Reclama y completa trabajos hasta que no quede ninguno; devuelve sus IDs."""
+    reclamados = []
+    while True:
+        trabajo = reclamar_trabajo(ruta, nodo)
+        if trabajo is None:
+            return reclamados
+        reclamados.append(trabajo['id'])
+        assert completar_trabajo(ruta, trabajo['id'], trabajo['testigo'], f"{nodo}.mp4")
+
+def _reclamar_y_caer(ruta: str, nodo: str, duracion: float) -> dict:
+    """Reclama un trabajo con un arrendamiento corto y termina sin latir (un nodo caído)."""
+    original = cola_compartida.DURACION_ARRENDAMIENTO
+    cola_compartida.DURACION_ARRENDAMIENTO = duracion
+    try:
+        return reclamar_trabajo(ruta, nodo)
+    finally:
+        cola_compartida.DURACION_ARRENDAMIENTO = original
+
+@pytest.fixture
+def procesos():
+    """Grupo de procesos nuevos (spawn), cada uno con su propia conexión a la base."""
+    with multiprocessing.get_context('spawn').Pool(4) as grupo:
+        yield grupo
+
+@pytest.fixture
+def ruta_cola(tmp_path):
+    return str(tmp_path / "cola.sqlite3")
+
+def test_ningun_trabajo_se_reclama_dos_veces(ruta_cola, procesos):
+    anadidas, repetidas = encolar_trabajos(
+        ruta_cola, [f"https://example.com/video/{numero}" for numero in range(200)])
+    assert (anadidas, repetidas) == (200, 0)
+
+    por_nodo = procesos.starmap(_vaciar_cola, [(ruta_cola, f"nodo{numero}") for numero in range(4)])
+
+    reclamados = [id_trabajo for ids in por_nodo for id_trabajo in ids]
+    assert len(reclamados) == len(set(reclamados)) == 200
+    assert contar_trabajos(ruta_cola)[TRABAJO_COMPLETADO] == 200
+
+def test_arrendamiento_caducado_se_vuelve_a_reclamar(ruta_cola, procesos):
+    encolar_trabajos(ruta_cola, ["https://example.com/video/1"])
+
+    caido = procesos.apply(_reclamar_y_caer, (ruta_cola, "caido", 0.5))
+    assert caido['nodo'] == "caido" and caido['estado'] == TRABAJO_EN_CURSO
+    # Mientras el arrendamiento sigue vigente nadie más puede tomarlo
+    assert procesos.apply(reclamar_trabajo, (ruta_cola, "otro")) is None
+
+    time.sleep(0.6)
+    nuevo = procesos.apply(reclamar_trabajo, (ruta_cola, "otro"))
+    assert nuevo['id'] == caido['id']
+    assert nuevo['testigo'] != caido['testigo']
+    assert nuevo['intentos'] == 2
+
+def test_el_testigo_caducado_no_tiene_efecto(ruta_cola, procesos):
+    encolar_trabajos(ruta_cola, ["https://example.com/video/1"])
+    caido = procesos.apply(_reclamar_y_caer, (ruta_cola, "caido", 0.5))
+    time.sleep(0.6)
+    nuevo = procesos.apply(reclamar_trabajo, (ruta_cola, "otro"))
+
+    # El nodo que perdió el trabajo no puede latir, terminarlo ni devolverlo
+    id_trabajo, testigo = caido['id'], caido['testigo']
+    assert not procesos.apply(renovar_trabajo, (ruta_cola, id_trabajo, testigo))
+    assert not procesos.apply(completar_trabajo, (ruta_cola, id_trabajo, testigo, "caido.mp4"))
+    assert procesos.apply(fallar_trabajo, (ruta_cola, id_trabajo, testigo, "error")) is None
+    assert contar_trabajos(ruta_cola)[TRABAJO_EN_CURSO] == 1
+
+    # El nodo que lo tiene ahora sí
+    assert procesos.apply(renovar_trabajo, (ruta_cola, id_trabajo, nuevo['testigo']))
+    assert procesos.apply(completar_trabajo, (ruta_cola, id_trabajo, nuevo['testigo'], "otro.mp4"))
+    assert contar_trabajos(ruta_cola)[TRABAJO_COMPLETADO] == 1
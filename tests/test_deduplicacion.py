@@ -0,0 +1,69 @@
+"""
+Pruebas de la deduplicación por contenido y del hash que la decide.
+"""
+
+import hashlib
+import os
+
+import pytest
+
+import utils.deduplicacion as deduplicacion
+from utils.deduplicacion import HashIncremental, deduplicar
+from utils.postproceso import AUDIO_COPIA
+
+@pytest.fixture(autouse=True)
+def indice_temporal(tmp_path, monkeypatch):
+    """Usa un índice de contenido vacío en el directorio temporal, sin reflinks."""
+    monkeypatch.setattr(deduplicacion, 'INDICE_CONTENIDO_ARCHIVO', str(tmp_path / "indice.json"))
+    # Forzar el enlace duro aunque el sistema de archivos admita reflinks
+    monkeypatch.setattr(deduplicacion, '_clonar', lambda origen, destino: False)
+
+def _escribir(ruta, contenido: bytes) -> str:
+    with open(ruta, 'wb') as archivo:
+        archivo.write(contenido)
+    return str(ruta)
+
+def _hash_de(ruta: str, **opciones) -> str:
+    hash_contenido = HashIncremental()
+    hash_contenido.actualizar(ruta)
+    return hash_contenido.resultado(**opciones)
+
+def test_duplicado_se_sustituye_por_enlace_duro(tmp_path):
+    contenido = os.urandom(64 * 1024)
+    primero = _escribir(tmp_path / "primero.mp4", contenido)
+    segundo = _escribir(tmp_path / "segundo.mp4", contenido)
+
+    assert deduplicar(primero, _hash_de(primero)) == 0
+    assert deduplicar(segundo, _hash_de(segundo)) == len(contenido)
+
+    assert os.path.samefile(primero, segundo)
+    assert os.stat(primero).st_nlink == 2
+    assert open(segundo, 'rb').read() == contenido
+    # Volver a registrar el mismo archivo no libera nada más
+    assert deduplicar(segundo, _hash_de(segundo)) == 0
+
+def test_sin_hash_o_con_otro_tamano_no_se_enlaza(tmp_path):
+    primero = _escribir(tmp_path / "primero.mp4", b"a" * 1000)
+    segundo = _escribir(tmp_path / "segundo.mp4", b"a" * 2000)
+
+    assert deduplicar(primero, "mismo") == 0
+    assert deduplicar(segundo, "mismo") == 0
+    assert deduplicar(segundo, None) == 0
+    assert not os.path.samefile(primero, segundo)
+
+def test_hash_de_una_parte_sin_tocar_es_el_del_archivo(tmp_path):
+    contenido = os.urandom(3 * 1024 * 1024 + 17)
+    ruta = _escribir(tmp_path / "video.mp4", contenido)
+    assert _hash_de(ruta) == hashlib.sha256(contenido).hexdigest()
+
+def test_hash_distingue_lo_que_escribe_ffmpeg(tmp_path):
+    ruta = _escribir(tmp_path / "parte.webm", os.urandom(1024))
+    unido = dict(partes=2, extension='mp4', titulo="Título")
+
+    # Unir video y audio incrusta el título: otro título es otro archivo
+    assert _hash_de(ruta, **unido) == _hash_de(ruta, **unido)
+    assert _hash_de(ruta, **unido) != _hash_de(ruta, **dict(unido, titulo="Otro título"))
+    # Una descarga de solo audio nunca coincide con el archivo descargado ni con otro modo
+    copia = _hash_de(ruta, extension='m4a', audio=AUDIO_COPIA)
+    assert copia != _hash_de(ruta)
+    assert copia != _hash_de(ruta, extension='mp3', audio='mp3')
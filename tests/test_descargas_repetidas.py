@@ -0,0 +1,33 @@
+"""
+Pruebas de las peticiones repetidas de un mismo video, que se unen a la descarga en curso.
+"""
+
+import threading
+import time
+
+import downloader
+from tests.servidor_local import ServidorLocal, preparar_video
+
+def test_la_peticion_repetida_se_une_y_se_avisa_una_vez(directorio_descargas):
+    rutas = {}
+
+    def descargar(id_descarga):
+        rutas[id_descarga] = downloader.descargar_video(url, id_descarga=id_descarga)
+
+    with ServidorLocal(fallos=['lento'], retardo=1.5) as servidor:
+        url = preparar_video(servidor)
+        propia = threading.Thread(target=descargar, args=(5201,))
+        propia.start()
+        time.sleep(0.5)
+        unida = threading.Thread(target=descargar, args=(5202,))
+        unida.start()
+        propia.join(timeout=30)
+        unida.join(timeout=30)
+
+        assert len(servidor.peticiones) == 1
+
+    assert rutas[5201] == rutas[5202]
+    assert not downloader.fue_unida(5201)
+    assert downloader.fue_unida(5202)
+    # La respuesta se da una sola vez
+    assert not downloader.fue_unida(5202)
@@ -0,0 +1,106 @@
+"""
+Pruebas del libro de reservas de espacio en disco: reservar, esperar o rechazar.
+"""
+
+import threading
+import time
+import types
+
+import pytest
+
+import utils.espacio_disco as espacio_disco
+from utils.espacio_disco import EspacioInsuficienteError, LibroReservas
+
+MB = 1024 * 1024
+
+@pytest.fixture
+def disco(tmp_path, monkeypatch):
+    """Simula el espacio libre del disco del directorio temporal (sin mínimo libre)."""
+    estado = {'libre': 100 * MB}
+    monkeypatch.setattr(espacio_disco, 'ESPACIO_MINIMO_LIBRE_MB', 0)
+    monkeypatch.setattr(espacio_disco.shutil, 'disk_usage',
+                        lambda directorio: types.SimpleNamespace(free=estado['libre']))
+    estado['directorio'] = str(tmp_path)
+    return estado
+
+def _reservar_en_hilo(libro, id_descarga, necesidades, **opciones):
+    """Reserva en otro hilo; devuelve el hilo y la lista donde deja el resultado."""
+    resultado = []
+
+    def reservar():
+        try:
+            libro.reservar(id_descarga, necesidades, **opciones)
+            resultado.append(True)
+        except Exception as e:
+            resultado.append(e)
+
+    hilo = threading.Thread(target=reservar, daemon=True)
+    hilo.start()
+    return hilo, resultado
+
+def test_reserva_si_cabe(disco):
+    libro = LibroReservas()
+    libro.reservar(1, {disco['directorio']: 60 * MB})
+    assert sum(libro.reservas[1].values()) == 60 * MB
+
+    libro.liberar(1)
+    assert libro.reservas == {}
+
+def test_rechaza_si_no_cabe_ni_liberando_las_demas(disco):
+    libro = LibroReservas()
+    libro.reservar(1, {disco['directorio']: 60 * MB})
+    with pytest.raises(EspacioInsuficienteError):
+        libro.reservar(2, {disco['directorio']: 101 * MB})
+    assert 2 not in libro.reservas
+
+def test_espera_a_que_otra_descarga_libere_su_reserva(disco):
+    libro = LibroReservas()
+    libro.reservar(1, {disco['directorio']: 60 * MB})
+
+    # Cabe en el disco, pero no junto a la otra reserva
+    hilo, resultado = _reservar_en_hilo(libro, 2, {disco['directorio']: 60 * MB})
+    time.sleep(0.3)
+    assert hilo.is_alive() and 2 not in libro.reservas
+
+    libro.liberar(1)
+    hilo.join(timeout=2)
+    assert resultado == [True]
+    assert 2 in libro.reservas
+
+def test_cancelar_deja_de_esperar(disco):
+    libro = LibroReservas()
+    libro.reservar(1, {disco['directorio']: 60 * MB})
+    cancelada = threading.Event()
+
+    hilo, resultado = _reservar_en_hilo(libro, 2, {disco['directorio']: 60 * MB},
+                                        cancelada=cancelada.is_set)
+    cancelada.set()
+    hilo.join(timeout=2)
+    assert not hilo.is_alive()
+    assert "cancelada" in str(resultado[0]).lower()
+    assert 2 not in libro.reservas
+
+def test_lo_ya_escrito_se_descuenta_de_las_reservas(disco):
+    libro = LibroReservas()
+    escritos = {disco['directorio']: 0}
+    libro.reservar(1, {disco['directorio']: 80 * MB}, escritos=lambda: dict(escritos))
+
+    # La primera descarga ya escribió 50 MB: el espacio libre los descuenta
+    # y su reserva solo cuenta los 30 MB que le faltan
+    escritos[disco['directorio']] = 50 * MB
+    disco['libre'] = 50 * MB
+    hilo, resultado = _reservar_en_hilo(libro, 2, {disco['directorio']: 20 * MB})
+    hilo.join(timeout=2)
+    assert resultado == [True]
+
+def test_los_parciales_propios_se_descuentan_de_la_necesidad(disco):
+    libro = LibroReservas()
+    disco['libre'] = 30 * MB
+    # Necesita 70 MB en total pero ya tiene 50 MB de un intento anterior
+    libro.reservar(1, {disco['directorio']: 70 * MB},
+                   escritos=lambda: {disco['directorio']: 50 * MB})
+    assert 1 in libro.reservas
+
+    # Sin descontarlos no cabría
+    with pytest.raises(EspacioInsuficienteError):
+        LibroReservas().reservar(2, {disco['directorio']: 70 * MB})
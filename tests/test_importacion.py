@@ -0,0 +1,58 @@
+"""
+Pruebas de la importación masiva de URLs: canonización, repetidos y rapidez.
+"""
+
+import time
+
+import pytest
+
+import utils.archivo_descargas as archivo_descargas
+from utils.importacion import canonizar_url, importar_urls
+from utils.urls import clave_canonica
+
+
+@pytest.fixture(autouse=True)
+def indice_vacio(monkeypatch):
+    """Usa un índice de descargados vacío en memoria (sin leer el historial)."""
+    monkeypatch.setattr(archivo_descargas, '_claves', set())
+
+
+def test_formas_de_un_mismo_video_cuentan_una_vez():
+    lineas = [
+        "https://youtu.be/dQw4w9WgXcQ, https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://vimeo.com/76979871 https://vimeo.com/76979871?autoplay=1",
+        "https://example.com/pagina https://example.com/pagina",
+    ]
+    resumen = {}
+    lotes = list(importar_urls(lineas, resumen))
+
+    assert lotes == [[
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://vimeo.com/76979871",
+        "https://example.com/pagina",
+    ]]
+    assert resumen == {'encontradas': 7, 'repetidas': 4, 'descargadas': 0, 'nuevas': 3}
+
+
+def test_ya_descargados_se_descartan():
+    archivo_descargas._claves.add("youtube dQw4w9WgXcQ")
+    resumen = {}
+    assert list(importar_urls(["https://youtu.be/dQw4w9WgXcQ"], resumen)) == []
+    assert resumen['descargadas'] == 1
+
+
+def test_diez_mil_urls_de_otro_sitio_sin_recorrer_todos_los_extractores():
+    lineas = [f"https://vimeo.com/{100000 + i}" for i in range(10000)]
+    inicio = time.monotonic()
+    urls = [url for lote in importar_urls(lineas) for url in lote]
+    assert len(urls) == 10000
+    # Recorriendo los ~1800 extractores por URL tardaba más de 50 s
+    assert time.monotonic() - inicio < 5
+
+
+def test_misma_clave_al_importar_unir_descargas_y_en_el_indice():
+    for url in ("https://youtu.be/dQw4w9WgXcQ", "https://vimeo.com/76979871?autoplay=1"):
+        _, clave = canonizar_url(url)
+        assert clave == clave_canonica(url) == archivo_descargas.clave_de_url(url)
+    assert clave_canonica("https://vimeo.com/76979871?autoplay=1") == clave_canonica("https://vimeo.com/76979871")
@@ -0,0 +1,116 @@
+"""
+Pruebas del tiempo máximo de extracción contra servidores locales lentos.
+"""
+
+import threading
+import time
+
+import utils.metadatos as metadatos
+from tests.servidor_local import ServidorLocal
+
+def _esperar_peticion(servidor, limite=10.0):
+    """Espera a que el servidor reciba la primera petición."""
+    fin = time.monotonic() + limite
+    while not servidor.peticiones:
+        assert time.monotonic() < fin, "La extracción no llegó al servidor"
+        time.sleep(0.05)
+
+def _extraer(resultados, nombre, url):
+    """Extrae la información de una URL anotando el resultado (o el error) y lo que tardó."""
+    inicio = time.monotonic()
+    try:
+        resultados[nombre] = metadatos.obtener_info_video(url, usar_cache=False)
+    except Exception as e:
+        resultados[nombre] = e
+    resultados[nombre + '_s'] = time.monotonic() - inicio
+
+def test_extraccion_bloqueada_no_interrumpe_las_demas(grupo_preparado, monkeypatch):
+    resultados = {}
+
+    # Un servidor que no responde y otro que tarda, pero responde antes de su límite
+    with ServidorLocal(fallos=['lento'], retardo=60) as bloqueado, \
+            ServidorLocal(fallos=['lento'], retardo=5) as lento:
+        monkeypatch.setattr(metadatos, 'TIEMPO_MAXIMO_EXTRACCION', 3)
+        hilo_bloqueado = threading.Thread(target=_extraer, args=(resultados, 'bloqueado', bloqueado.url('/a.mp4')))
+        hilo_bloqueado.start()
+        # Subir el límite solo cuando la extracción bloqueada ya lo está esperando
+        _esperar_peticion(bloqueado)
+        monkeypatch.setattr(metadatos, 'TIEMPO_MAXIMO_EXTRACCION', 20)
+        hilo_lento = threading.Thread(target=_extraer, args=(resultados, 'lento', lento.url('/b.mp4')))
+        hilo_lento.start()
+
+        hilo_bloqueado.join(timeout=30)
+        hilo_lento.join(timeout=30)
+
+        # La extracción bloqueada se abandona al agotar su tiempo
+        assert isinstance(resultados['bloqueado'], Exception)
+        assert "Se agotó el tiempo" in str(resultados['bloqueado'])
+        assert resultados['bloqueado_s'] < 5
+
+        # La otra terminó en el grupo retirado, sin repetirse en el nuevo
+        assert isinstance(resultados['lento'], dict), resultados['lento']
+        assert all(fallo == 'lento' for _, _, fallo, _ in lento.peticiones)
+
+    # Las peticiones nuevas ya usan otro grupo, y el retirado termina sus procesos
+    assert metadatos._obtener_pool() is not grupo_preparado
+    fin = time.monotonic() + 10
+    while any(proceso.is_alive() for proceso in list((grupo_preparado._processes or {}).values())):
+        assert time.monotonic() < fin, "El grupo retirado sigue con procesos vivos"
+        time.sleep(0.2)
+
+def test_descargar_la_url_precargada_aprovecha_la_precarga(grupo_preparado):
+    with ServidorLocal(fallos=['lento'], retardo=2) as servidor:
+        url = servidor.url('/precargada.mp4')
+        metadatos.programar_precarga(url)
+        _esperar_peticion(servidor)
+
+        # Al pulsar Descargar se vacía el campo, pero la precarga de esa URL sigue
+        metadatos.cancelar_precarga(excepto=url)
+        info = metadatos.obtener_info_video(url)
+
+        assert info['webpage_url'] == url
+        assert len(servidor.peticiones) == 1
+
+def test_precarga_abandonada_deja_su_resultado_en_cache(grupo_preparado):
+    with ServidorLocal(fallos=['lento'], retardo=2) as servidor:
+        url = servidor.url('/abandonada.mp4')
+        metadatos.programar_precarga(url)
+        _esperar_peticion(servidor)
+
+        # El texto cambió: se deja de esperar, pero el proceso termina la consulta
+        metadatos.cancelar_precarga()
+        fin = time.monotonic() + 10
+        while metadatos.obtener_info_en_cache(url) is None:
+            assert time.monotonic() < fin, "El resultado de la consulta abandonada se perdió"
+            time.sleep(0.1)
+
+        metadatos.obtener_info_video(url)
+        assert len(servidor.peticiones) == 1
+
+def test_la_espera_de_turno_no_cuenta_en_el_tiempo_maximo(grupo_preparado, monkeypatch):
+    monkeypatch.setattr(metadatos, 'TIEMPO_MAXIMO_EXTRACCION', 3)
+    procesos = metadatos.PROCESOS_EXTRACCION
+    resultados = {}
+
+    # Cada consulta tarda 2 s: la última espera turno otros 2 s tras ocupar todos los procesos
+    with ServidorLocal(fallos=['lento'] * (procesos + 1), retardo=2) as servidor:
+        nombres = [f'turno{numero}' for numero in range(procesos + 1)]
+        hilos = [threading.Thread(target=_extraer, args=(resultados, nombre, servidor.url(f'/{nombre}.mp4')))
+                 for nombre in nombres]
+        for hilo in hilos[:-1]:
+            hilo.start()
+        fin = time.monotonic() + 10
+        while len(servidor.peticiones) < procesos:
+            assert time.monotonic() < fin, "Las extracciones no ocuparon todos los procesos"
+            time.sleep(0.05)
+        hilos[-1].start()
+        for hilo in hilos:
+            hilo.join(timeout=30)
+
+    ultima = nombres[-1]
+    assert isinstance(resultados[ultima], dict), resultados[ultima]
+    # Tardó más que el tiempo máximo en total, pero no desde que empezó
+    assert resultados[ultima + '_s'] > 3
+    assert all(isinstance(resultados[nombre], dict) for nombre in nombres)
+    # Nadie se dio por bloqueado: el grupo sigue siendo el mismo
+    assert metadatos._obtener_pool() is grupo_preparado
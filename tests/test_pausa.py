@@ -0,0 +1,83 @@
+"""
+Pruebas de la pausa de descargas, durante la transferencia y fuera de ella.
+"""
+
+import glob
+import os
+import threading
+import time
+
+import downloader
+from tests.servidor_local import ServidorLocal, preparar_video
+from utils.reintentos import registrar_exito, registrar_limitacion
+
+def _esperar_estado(estados, texto, limite=5.0):
+    """Espera a que la descarga notifique un estado que contenga el texto."""
+    fin = time.monotonic() + limite
+    while not any(texto in estado for estado in estados):
+        assert time.monotonic() < fin, f"No llegó el estado '{texto}': {estados}"
+        time.sleep(0.05)
+
+def _tamano_parcial(directorio, id_descarga) -> int:
+    """Bytes del .part de una descarga (0 si aún no existe)."""
+    return sum(os.path.getsize(ruta) for ruta in glob.glob(
+        os.path.join(str(directorio), f"temp_download_{id_descarga}.*.part")))
+
+def test_pausa_a_mitad_de_la_transferencia_continua_con_range(directorio_descargas):
+    id_descarga = 4002
+    with ServidorLocal(fallos=['goteo']) as servidor:
+        url = preparar_video(servidor)
+        estados, resultado = [], []
+        hilo = threading.Thread(target=lambda: resultado.append(
+            downloader.descargar_video(url, id_descarga=id_descarga, estado_callback=estados.append)),
+            daemon=True)
+        hilo.start()
+        fin = time.monotonic() + 10
+        while _tamano_parcial(directorio_descargas, id_descarga) < 256 * 1024:
+            assert time.monotonic() < fin, "La transferencia no empezó"
+            time.sleep(0.05)
+
+        assert downloader.pausar_descarga(id_descarga)
+        _esperar_estado(estados, "Pausado")
+        # En pausa se corta la conexión y el .part deja de crecer
+        parcial = _tamano_parcial(directorio_descargas, id_descarga)
+        time.sleep(0.5)
+        assert _tamano_parcial(directorio_descargas, id_descarga) == parcial
+        assert 0 < parcial < len(servidor.contenido)
+        assert servidor.desconexiones == 1
+
+        assert downloader.reanudar_descarga(id_descarga)
+        hilo.join(timeout=30)
+
+    assert not hilo.is_alive()
+    assert resultado and open(resultado[0], 'rb').read() == servidor.contenido
+    # La segunda petición continúa desde los bytes del .part en lugar de empezar de cero
+    assert len(servidor.peticiones) == 2
+    assert servidor.peticiones[0][1] is None
+    assert servidor.peticiones[1][1] == f"bytes={parcial}-"
+
+def test_pausa_durante_el_enfriamiento_del_host(directorio_descargas):
+    id_descarga = 4001
+    registrar_limitacion('127.0.0.1')  # 30 s de enfriamiento
+    try:
+        with ServidorLocal() as servidor:
+            url = preparar_video(servidor)
+            estados, resultado = [], []
+            hilo = threading.Thread(target=lambda: resultado.append(
+                downloader.descargar_video(url, id_descarga=id_descarga, estado_callback=estados.append)))
+            hilo.start()
+            _esperar_estado(estados, "limita las descargas")
+
+            # La pausa abandona la espera en lugar de quedarse en "Pausando..."
+            assert downloader.pausar_descarga(id_descarga)
+            _esperar_estado(estados, "Pausado")
+            assert servidor.peticiones == []
+
+            registrar_exito('127.0.0.1')
+            assert downloader.reanudar_descarga(id_descarga)
+            hilo.join(timeout=30)
+
+            assert resultado and open(resultado[0], 'rb').read() == servidor.contenido
+            assert "Reanudando..." in estados
+    finally:
+        registrar_exito('127.0.0.1')
@@ -0,0 +1,75 @@
+"""
+Pruebas de las franjas horarias de las descargas programadas.
+"""
+
+import datetime
+
+import pytest
+
+from utils.programador import ColaProgramada, en_franja, normalizar_hora
+
+def _a_las(hora: str, dia: int = 1) -> datetime.datetime:
+    horas, minutos = (int(valor) for valor in hora.split(":"))
+    return datetime.datetime(2026, 1, dia, horas, minutos)
+
+@pytest.mark.parametrize("hora, dentro", [
+    ("08:59", False),
+    ("09:00", True),
+    ("16:59", True),
+    ("17:00", False),
+])
+def test_franja_dentro_del_dia(hora, dentro):
+    assert en_franja("09:00", "17:00", _a_las(hora)) is dentro
+
+@pytest.mark.parametrize("hora, dentro", [
+    ("21:59", False),
+    ("22:00", True),
+    ("23:59", True),
+    ("00:00", True),
+    ("06:59", True),
+    ("07:00", False),
+    ("12:00", False),
+])
+def test_franja_que_cruza_la_medianoche(hora, dentro):
+    assert en_franja("22:00", "07:00", _a_las(hora)) is dentro
+
+@pytest.mark.parametrize("hora", ["00:00", "07:59", "08:00", "23:59"])
+def test_franja_de_24_horas_siempre_abierta(hora):
+    assert en_franja("08:00", "08:00", _a_las(hora))
+
+def test_sin_fin_abre_a_partir_de_la_hora():
+    assert not en_franja("22:00", None, _a_las("21:59"))
+    assert en_franja("22:00", None, _a_las("22:00"))
+
+def test_normalizar_hora():
+    assert normalizar_hora("7:05") == "07:05"
+    assert normalizar_hora("22") == "22:00"
+    assert normalizar_hora("  ") is None
+    for texto in ("24:00", "12:60", "doce"):
+        with pytest.raises(ValueError):
+            normalizar_hora(texto)
+
+def test_sin_fin_espera_a_no_antes_de_y_despues_no_se_detiene():
+    entrada = {'inicio': "22:00", 'fin': None, 'no_antes_de': _a_las("22:00").timestamp()}
+    assert not ColaProgramada.puede_ejecutarse(entrada, _a_las("21:59"))
+    assert ColaProgramada.puede_ejecutarse(entrada, _a_las("22:00"))
+    # Ya empezada sigue a la mañana siguiente, aunque la hora sea anterior a su inicio
+    assert ColaProgramada.puede_ejecutarse(entrada, _a_las("09:00", dia=2))
+
+def test_con_fin_solo_cuenta_la_franja():
+    entrada = {'inicio': "22:00", 'fin': "07:00", 'no_antes_de': _a_las("22:00", dia=5).timestamp()}
+    # no_antes_de no se usa: la franja se repite cada día
+    assert ColaProgramada.puede_ejecutarse(entrada, _a_las("23:00"))
+    assert not ColaProgramada.puede_ejecutarse(entrada, _a_las("09:00", dia=6))
+
+def test_la_cola_se_conserva_tras_reiniciar(tmp_path):
+    archivo = str(tmp_path / "programadas.json")
+    cola = ColaProgramada(archivo)
+    primera = cola.agregar("https://example.com/a", "", "22:00", "07:00", 500)
+    segunda = cola.agregar("https://example.com/b", "18", "03:00")
+    cola.quitar(primera['id'])
+
+    recargada = ColaProgramada(archivo).entradas()
+    assert [entrada['id'] for entrada in recargada] == [segunda['id']]
+    # El nombre de los parciales no cambia: la descarga continúa desde sus bytes
+    assert recargada[0]['clave_temporal'] == segunda['clave_temporal']
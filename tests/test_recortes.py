@@ -0,0 +1,74 @@
+"""
+Pruebas de la interpretación de tramos y tiempos de los recortes.
+"""
+
+import os
+
+import pytest
+
+import downloader
+from tests.servidor_local import ServidorLocal, preparar_video
+from utils.recortes import describir_tramos, inicio_de_url, parsear_tramos, segundos_de_tiempo
+
+@pytest.mark.parametrize("texto, segundos", [
+    ("90", 90),
+    ("1:30", 90),
+    ("1:02:03", 3723),
+    ("1m30s", 90),
+    ("1h2m", 3720),
+    ("45s", 45),
+    ("2.5", 2.5),
+])
+def test_segundos_de_tiempo(texto, segundos):
+    assert segundos_de_tiempo(texto) == segundos
+
+@pytest.mark.parametrize("texto", ["", "abc", "1:xx", "1m30x"])
+def test_segundos_de_tiempo_rechaza_lo_que_no_es_un_tiempo(texto):
+    with pytest.raises(ValueError):
+        segundos_de_tiempo(texto)
+
+def test_tramos_se_ordenan_y_se_unen_los_que_se_solapan():
+    assert parsear_tramos("10:00-12:00, 1:30-2:45; 2:00-3:00\n11:00-11:30") == [
+        (90, 180), (600, 720)]
+    # Un tramo que empieza justo donde acaba otro también se une
+    assert parsear_tramos("0:10-0:20, 0:20-0:30") == [(10, 30)]
+
+def test_tramos_sin_fin_o_sin_inicio():
+    assert parsear_tramos("10:00-") == [(600, None)]
+    assert parsear_tramos("-1:00") == [(0, 60)]
+    # Un tramo sin fin absorbe los que empiezan después
+    assert parsear_tramos("5:00-, 7:00-8:00, 1:00-2:00") == [(60, 120), (300, None)]
+    assert parsear_tramos("") == []
+
+@pytest.mark.parametrize("texto", ["2:00-1:00", "1:00-1:00", "1:30", "1:00-abc"])
+def test_tramos_no_validos(texto):
+    with pytest.raises(ValueError):
+        parsear_tramos(texto)
+
+def test_describir_tramos_se_vuelve_a_interpretar_igual():
+    tramos = [(90, 165), (3720, None)]
+    assert describir_tramos(tramos) == "1:30-2:45, 1:02:00-"
+    assert parsear_tramos(describir_tramos(tramos)) == tramos
+
+@pytest.mark.parametrize("url, inicio", [
+    ("https://youtu.be/dQw4w9WgXcQ?t=90", 90),
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=1m30s", 90),
+    ("https://vimeo.com/76979871#t=2m", 120),
+    ("https://example.com/video.mp4?start=15", 15),
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", None),
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=0", None),
+    ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=ayer", None),
+])
+def test_inicio_de_url(url, inicio):
+    assert inicio_de_url(url) == inicio
+
+def test_sin_ffmpeg_se_descarga_el_video_completo(directorio_descargas, monkeypatch):
+    monkeypatch.setattr(downloader, 'ffmpeg_disponible', lambda: False)
+    with ServidorLocal() as servidor:
+        url = preparar_video(servidor)
+        ruta = downloader.descargar_video(url, id_descarga=4201, tramos=[(1.0, 2.0)])
+
+    # No falla por la falta de ffmpeg y el nombre no lleva los tramos: es el video entero
+    assert "[" not in os.path.basename(ruta)
+    with open(ruta, 'rb') as archivo:
+        assert archivo.read() == servidor.contenido
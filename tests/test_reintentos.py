@@ -0,0 +1,93 @@
+"""
+Pruebas de la política de reintentos contra un servidor local que inyecta fallos.
+"""
+
+import pytest
+
+import downloader
+import utils.reintentos
+from tests.servidor_local import ServidorLocal, preparar_video
+from utils.reintentos import enfriamiento_restante, registrar_exito, registrar_limitacion
+from utils.urls import host_de_url
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """Acorta las esperas de la política y registra las que se hacen entre intentos."""
+    monkeypatch.setattr(utils.reintentos, 'ESPERA_BASE_REINTENTO', 0.05)
+    monkeypatch.setattr(utils.reintentos, 'ENFRIAMIENTO_BASE_HOST', 0.5)
+    registradas = []
+    esperar_original = downloader.esperar
+
+    def esperar(segundos, cancelada=None):
+        registradas.append(segundos)
+        esperar_original(segundos, cancelada)
+
+    monkeypatch.setattr(downloader, 'esperar', esperar)
+    return registradas
+
+def test_errores_5xx_y_cortes_se_reintentan_con_espera(directorio_descargas, esperas):
+    with ServidorLocal(fallos=[503, 'corte', 500]) as servidor:
+        url = preparar_video(servidor)
+        intentos = []
+        ruta = downloader.descargar_video(url, intento_callback=intentos.append)
+
+        with open(ruta, 'rb') as archivo:
+            assert archivo.read() == servidor.contenido
+        assert [fallo for _, _, fallo, _ in servidor.peticiones] == [503, 'corte', 500, None]
+
+    assert len(intentos) == 3
+    assert all("error de red" in intento for intento in intentos)
+    # Espera exponencial con variación completa: cada una por debajo de su tope
+    assert len(esperas) == 3
+    for numero, espera in enumerate(esperas, start=1):
+        assert 0 <= espera <= 0.05 * 2 ** (numero - 1)
+
+@pytest.mark.parametrize("codigo", [429, 403])
+def test_limitacion_pone_al_host_en_enfriamiento(directorio_descargas, esperas, monkeypatch, codigo):
+    limitados = []
+    registrar_original = utils.reintentos.registrar_limitacion
+    monkeypatch.setattr(utils.reintentos, 'registrar_limitacion',
+                        lambda host: limitados.append(host) or registrar_original(host))
+
+    with ServidorLocal(fallos=[codigo]) as servidor:
+        url = preparar_video(servidor)
+        estados = []
+        ruta = downloader.descargar_video(url, estado_callback=estados.append)
+
+        with open(ruta, 'rb') as archivo:
+            assert archivo.read() == servidor.contenido
+        (_, _, fallo, limitada), (_, _, _, reintento) = servidor.peticiones
+
+    assert fallo == codigo
+    assert limitados == ['127.0.0.1']
+    # El reintento esperó al final del enfriamiento, no solo a la espera exponencial
+    assert reintento - limitada >= 0.5 - 0.05
+    assert any("limita las descargas" in estado for estado in estados)
+    # La descarga correcta reinicia el enfriamiento del host
+    assert enfriamiento_restante('127.0.0.1') == 0
+
+def test_reintento_continua_desde_el_part(directorio_descargas, esperas):
+    with ServidorLocal(fallos=['corte']) as servidor:
+        url = preparar_video(servidor)
+        ruta = downloader.descargar_video(url)
+
+        with open(ruta, 'rb') as archivo:
+            assert archivo.read() == servidor.contenido
+        (_, primer_rango, _, _), (_, segundo_rango, _, _) = servidor.peticiones
+
+    assert primer_rango is None
+    # El segundo intento pide solo los bytes que faltan
+    assert segundo_rango is not None and segundo_rango.startswith('bytes=')
+    assert int(segundo_rango[len('bytes='):].split('-')[0]) > 0
+    assert not list(directorio_descargas.glob('*.part'))
+
+def test_enfriamiento_compartido_entre_formas_de_url():
+    host = host_de_url('https://youtu.be/dQw4w9WgXcQ')
+    try:
+        registrar_limitacion(host)
+        for url in ('https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'https://m.youtube.com/watch?v=x',
+                    'https://music.youtube.com/watch?v=x'):
+            assert host_de_url(url) == host
+            assert enfriamiento_restante(host_de_url(url)) > 0
+    finally:
+        registrar_exito(host)
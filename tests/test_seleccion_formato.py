@@ -0,0 +1,60 @@
+"""
+Pruebas de la elección de formato cuando ningún formato cumple todas las reglas.
+"""
+
+import pytest
+
+import utils.seleccion_formato as seleccion_formato
+from utils.config import CALIDAD_REGLAS, FORMATO_VIDEO
+from utils.seleccion_formato import resolver_formato
+
+MB = 1024 * 1024
+
+def _video(format_id, altura, ext, tamano_mb, fps=30):
+    return {'format_id': format_id, 'height': altura, 'ext': ext, 'fps': fps,
+            'vcodec': 'vp9' if ext == 'webm' else 'avc1', 'acodec': 'none',
+            'filesize': tamano_mb * MB}
+
+def _audio(format_id, ext, tamano_mb):
+    return {'format_id': format_id, 'ext': ext, 'vcodec': 'none',
+            'acodec': 'opus' if ext == 'webm' else 'mp4a', 'abr': 128, 'filesize': tamano_mb * MB}
+
+INFO = {'duration': 600, 'formats': [
+    _audio('251', 'webm', 5),
+    _video('137', 1080, 'mp4', 200),
+    _video('248', 1080, 'webm', 150),
+    _video('244', 480, 'webm', 40),
+    _video('398', 720, 'mp4', 90, fps=60),
+]}
+
+@pytest.fixture
+def reglas(monkeypatch):
+    """Permite fijar las reglas de formato de cada prueba."""
+    def fijar(**valores):
+        monkeypatch.setattr(seleccion_formato, 'obtener_reglas_formato', lambda: dict(valores))
+    return fijar
+
+def test_reglas_cumplidas_eligen_el_mejor(reglas):
+    reglas(contenedor='mp4', altura_max=1080)
+    assert resolver_formato(CALIDAD_REGLAS, INFO).startswith('137+')
+
+def test_contenedor_no_disponible_se_relaja_antes_que_la_calidad(reglas):
+    reglas(contenedor='mp4', tamano_max_mb=100, fps_max=30)
+    # Ningún mp4 de 30 fps cabe: sin exigir el contenedor, el mejor webm que cabe
+    assert resolver_formato(CALIDAD_REGLAS, INFO) == '244+251'
+
+def test_los_fps_se_relajan_despues_del_contenedor(reglas):
+    reglas(contenedor='mp4', tamano_max_mb=100, fps_max=30, altura_max=480)
+    # Sin contenedor sigue cabiendo el webm de 480p, que cumple los fps
+    assert resolver_formato(CALIDAD_REGLAS, INFO) == '244+251'
+    reglas(tamano_max_mb=100, fps_max=24, altura_max=720)
+    assert resolver_formato(CALIDAD_REGLAS, INFO) == '398+251'
+
+def test_tamano_maximo_imposible_es_un_error_y_no_la_mejor_calidad(reglas):
+    reglas(contenedor='mp4', tamano_max_mb=20)
+    with pytest.raises(Exception, match="Ningún formato cabe en el tamaño máximo de 20 MB"):
+        resolver_formato(CALIDAD_REGLAS, INFO)
+
+def test_sin_formatos_de_video_elige_yt_dlp(reglas):
+    reglas(tamano_max_mb=20)
+    assert resolver_formato(CALIDAD_REGLAS, {'formats': [_audio('251', 'webm', 5)]}) == FORMATO_VIDEO
@@ -0,0 +1,57 @@
+"""
+Pruebas de la reutilización de sesiones de yt-dlp entre trabajos.
+"""
+
+import yt_dlp
+
+from utils.sesiones import sesion_youtube_dl
+
+# Opción de conexión propia de estas pruebas, para no tomar sesiones de otras
+_CONEXION = {'quiet': True, 'socket_timeout': 12.5}
+
+def _estado(ydl) -> dict:
+    """Lo que YoutubeDL deriva de las opciones de cada trabajo."""
+    return {
+        'progress_hooks': list(ydl._progress_hooks),
+        'postprocessor_hooks': list(ydl._postprocessor_hooks),
+        'pps': {momento: len(pps) for momento, pps in ydl._pps.items()},
+        'format_selector': ydl.format_selector,
+        'outtmpl': ydl.params.get('outtmpl'),
+        'format': ydl.params.get('format'),
+        'download_retcode': ydl._download_retcode,
+    }
+
+def _info(url: str) -> dict:
+    """Información de un video con un formato pequeño y otro grande."""
+    return {
+        'id': 'video', 'title': "Video", 'extractor': 'generic', 'extractor_key': 'Generic',
+        'webpage_url': url,
+        'formats': [
+            {'format_id': 'pequeno', 'url': url + '?p', 'ext': 'mp4', 'height': 360,
+             'vcodec': 'h264', 'acodec': 'aac'},
+            {'format_id': 'grande', 'url': url + '?g', 'ext': 'mp4', 'height': 1080,
+             'vcodec': 'h264', 'acodec': 'aac'},
+        ],
+    }
+
+def test_sesion_reutilizada_no_conserva_el_trabajo_anterior(tmp_path):
+    llamadas = []
+    anterior = {
+        **_CONEXION,
+        'format': 'pequeno',
+        'outtmpl': str(tmp_path / '%(id)s.%(ext)s'),
+        'progress_hooks': [llamadas.append],
+        'postprocessor_hooks': [llamadas.append],
+        'postprocessors': [{'key': 'FFmpegMetadata'}],
+    }
+    with sesion_youtube_dl(anterior) as ydl:
+        primera = ydl
+        assert ydl.process_ie_result(_info("http://127.0.0.1/v"), download=False)['format_id'] == 'pequeno'
+        assert _estado(ydl)['progress_hooks'] == [llamadas.append]
+
+    with sesion_youtube_dl(dict(_CONEXION)) as ydl:
+        assert ydl is primera
+        # Igual que una sesión recién creada: sin hooks, formato ni posprocesadores del anterior
+        assert _estado(ydl) == _estado(yt_dlp.YoutubeDL(dict(_CONEXION)))
+        assert ydl.process_ie_result(_info("http://127.0.0.1/v"), download=False)['format_id'] == 'grande'
+    assert llamadas == []
@@ -0,0 +1,33 @@
+"""
+Pruebas del vigilante de transferencias estancadas contra un servidor local.
+"""
+
+import time
+
+import downloader
+import utils.reintentos
+import utils.vigilante
+from tests.servidor_local import ServidorLocal, preparar_video
+from utils.vigilante import vigilante_estancamiento
+
+def test_transferencia_estancada_se_corta_y_continua(directorio_descargas, monkeypatch):
+    monkeypatch.setattr(utils.vigilante, 'obtener_ventana_estancamiento', lambda: 1.0)
+    monkeypatch.setattr(utils.reintentos, 'ESPERA_BASE_REINTENTO', 0.05)
+    antes = vigilante_estancamiento.estancamientos_por_host().get('127.0.0.1', 0)
+
+    # El servidor deja de enviar a mitad del archivo sin cerrar la conexión
+    with ServidorLocal(fallos=['parada'], retardo=60) as servidor:
+        url = preparar_video(servidor)
+        inicio = time.monotonic()
+        ruta = downloader.descargar_video(url)
+        duracion = time.monotonic() - inicio
+
+        with open(ruta, 'rb') as archivo:
+            assert archivo.read() == servidor.contenido
+        (_, _, fallo, _), (_, rango, _, _) = servidor.peticiones
+
+    assert fallo == 'parada'
+    assert rango is not None and int(rango[len('bytes='):].split('-')[0]) > 0
+    # Sin cortar la conexión habría esperado el tiempo máximo del socket (20 s)
+    assert duracion < 10
+    assert vigilante_estancamiento.estancamientos_por_host()['127.0.0.1'] == antes + 1
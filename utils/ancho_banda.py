@@ -0,0 +1,115 @@
+"""
+Medición del ancho de banda a partir de las velocidades de descarga.
+
+Las velocidades que reporta el progreso de yt-dlp se combinan en una media
+móvil exponencial (EWMA) por host, que se guarda entre sesiones.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.config import ESTADISTICAS_RED_ARCHIVO, FACTOR_SUAVIZADO_VELOCIDAD
+
+# Intervalo mínimo entre muestras de un mismo host (el progreso llega muy seguido)
+_INTERVALO_MUESTRAS = 0.5  # segundos
+# Intervalo mínimo entre escrituras del archivo de estadísticas
+_INTERVALO_GUARDADO = 30  # segundos
+
+class EstimadorAnchoBanda:
+    """
+    Estima la velocidad de descarga por host con una media móvil exponencial.
+
+    Attributes:
+        alfa: Peso de cada nueva muestra (0-1)
+        archivo: Ruta del archivo JSON donde se guardan las estimaciones
+    """
+
+    def __init__(self, alfa: float = FACTOR_SUAVIZADO_VELOCIDAD, archivo: str = ESTADISTICAS_RED_ARCHIVO):
+        """
+        Inicializa el estimador y carga las mediciones guardadas.
+
+        Args:
+            alfa: Peso de cada nueva muestra (0-1)
+            archivo: Ruta del archivo JSON de estadísticas
+        """
+        self.alfa = alfa
+        self.archivo = archivo
+        self._lock = threading.Lock()
+        self._velocidades: Dict[str, float] = {}  # host -> bytes/s
+        self._ultima_muestra: Dict[str, float] = {}
+        self._ultimo_guardado = time.time()
+        self._cargar()
+
+    def _cargar(self) -> None:
+        """Carga las velocidades guardadas en disco."""
+        if not os.path.exists(self.archivo):
+            return
+        try:
+            with open(self.archivo, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            self._velocidades = {h: float(v) for h, v in datos.get('velocidades', {}).items()}
+        except Exception as e:
+            print(f"Error al cargar estadísticas de red: {str(e)}")
+
+    def guardar(self) -> None:
+        """Guarda las velocidades actuales en disco."""
+        with self._lock:
+            datos = {'velocidades': dict(self._velocidades)}
+            self._ultimo_guardado = time.time()
+        try:
+            with open(self.archivo, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"Error al guardar estadísticas de red: {str(e)}")
+
+    def registrar(self, host: str, velocidad: float) -> None:
+        """
+        Añade una muestra de velocidad para un host.
+
+        Args:
+            host: Host del que se está descargando
+            velocidad: Velocidad medida en bytes por segundo
+        """
+        if not velocidad or velocidad <= 0:
+            return
+
+        ahora = time.time()
+        with self._lock:
+            if ahora - self._ultima_muestra.get(host, 0) < _INTERVALO_MUESTRAS:
+                return
+            self._ultima_muestra[host] = ahora
+
+            anterior = self._velocidades.get(host)
+            if anterior is None:
+                self._velocidades[host] = velocidad
+            else:
+                self._velocidades[host] = self.alfa * velocidad + (1 - self.alfa) * anterior
+
+            guardar = ahora - self._ultimo_guardado > _INTERVALO_GUARDADO
+
+        if guardar:
+            self.guardar()
+
+    def obtener(self, host: Optional[str] = None) -> Optional[float]:
+        """
+        Devuelve la velocidad estimada.
+
+        Args:
+            host: Host del que se quiere la estimación; si es None o no hay
+                  mediciones para él, se usa la media de todos los hosts
+
+        Returns:
+            Velocidad estimada en bytes por segundo, o None si no hay mediciones
+        """
+        with self._lock:
+            if host and host in self._velocidades:
+                return self._velocidades[host]
+            if not self._velocidades:
+                return None
+            return sum(self._velocidades.values()) / len(self._velocidades)
+
+# Estimador compartido por todas las descargas
+estimador_ancho_banda = EstimadorAnchoBanda()
@@ -0,0 +1,170 @@
+"""
+Índice de videos ya descargados, por extractor e ID.
+
+Se guarda en un archivo de texto con una línea "extractor id" por video (el
+mismo formato que --download-archive de yt-dlp) y se mantiene en memoria
+como un conjunto, de modo que comprobar si un video ya se descargó no
+requiere ninguna consulta a la red. Al cargarse se completa con los videos
+del historial, y se reconstruye a partir de él si el archivo no existe.
+"""
+
+import os
+import threading
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from utils.config import ARCHIVO_DESCARGAS
+from utils.urls import identificar_video
+
+# Claves "extractor id" de los videos descargados (se carga al primer uso)
+_claves: Optional[Set[str]] = None
+_lock_archivo = threading.Lock()
+
+def clave_archivo(extractor: str, id_video: str) -> str:
+    """
+    Construye la clave de un video en el índice.
+
+    Args:
+        extractor: Nombre del extractor de yt-dlp
+        id_video: ID del video en ese extractor
+
+    Returns:
+        Clave con la forma "extractor id"
+    """
+    return f"{extractor.lower()} {id_video}"
+
+def identificar_descarga(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Obtiene el extractor y el ID de un video sin acceder a la red.
+
+    Se usa lo que se pueda deducir de la propia URL, igual que en la clave
+    canónica (utils.urls.clave_canonica), y si no se puede, la información
+    del video si ya está en la caché de metadatos.
+
+    Args:
+        url: URL del video
+
+    Returns:
+        Tupla (extractor en minúsculas, ID del video) o None si no se puede determinar
+    """
+    identificacion = identificar_video(url)
+    if identificacion:
+        return identificacion
+    from utils.metadatos import obtener_info_en_cache
+    info = obtener_info_en_cache(url)
+    if info and info.get('extractor_key') and info.get('id'):
+        return info['extractor_key'].lower(), info['id']
+    return None
+
+def clave_de_url(url: str) -> Optional[str]:
+    """
+    Obtiene la clave del índice para una URL sin acceder a la red.
+
+    Args:
+        url: URL del video
+
+    Returns:
+        Clave "extractor id" o None si no se puede determinar
+    """
+    identificacion = identificar_descarga(url)
+    return clave_archivo(*identificacion) if identificacion else None
+
+def _claves_de_historial(historial: List[Dict[str, Any]]) -> Set[str]:
+    """Obtiene las claves de los videos del historial que tienen extractor e ID."""
+    return {
+        clave_archivo(video["extractor"], video["id_video"])
+        for video in historial
+        if video.get("extractor") and video.get("id_video")
+    }
+
+def _escribir_archivo(claves: Set[str]) -> None:
+    """Reescribe el archivo completo con las claves indicadas."""
+    temporal = ARCHIVO_DESCARGAS + ".tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        for clave in sorted(claves):
+            f.write(clave + "\n")
+    os.replace(temporal, ARCHIVO_DESCARGAS)
+
+def _cargar_claves() -> Set[str]:
+    """
+    Devuelve el conjunto de claves, cargándolo del archivo la primera vez.
+
+    Debe llamarse con _lock_archivo adquirido.
+    """
+    global _claves
+
+    if _claves is not None:
+        return _claves
+
+    claves = set()
+    if os.path.exists(ARCHIVO_DESCARGAS):
+        try:
+            with open(ARCHIVO_DESCARGAS, 'r', encoding='utf-8') as f:
+                claves = {linea.strip() for linea in f if linea.strip()}
+        except Exception as e:
+            print(f"Error al cargar el archivo de descargas: {str(e)}")
+
+    # Incorporar los videos del historial que falten (o rehacer el índice si no existía).
+    # Importación diferida: el historial también usa este módulo
+    from utils.historial import cargar_historial
+    faltantes = _claves_de_historial(cargar_historial()) - claves
+    _claves = claves | faltantes
+    if faltantes or not os.path.exists(ARCHIVO_DESCARGAS):
+        try:
+            _escribir_archivo(_claves)
+        except Exception as e:
+            print(f"Error al guardar el archivo de descargas: {str(e)}")
+    return _claves
+
+def esta_descargado(clave: Optional[str]) -> bool:
+    """
+    Indica si un video ya está en el índice.
+
+    Args:
+        clave: Clave "extractor id" del video
+
+    Returns:
+        True si el video ya se descargó
+    """
+    if not clave:
+        return False
+    with _lock_archivo:
+        return clave in _cargar_claves()
+
+def registrar_descarga(clave: Optional[str]) -> None:
+    """
+    Añade un video al índice.
+
+    Args:
+        clave: Clave "extractor id" del video
+    """
+    if not clave:
+        return
+    with _lock_archivo:
+        claves = _cargar_claves()
+        if clave in claves:
+            return
+        claves.add(clave)
+        try:
+            with open(ARCHIVO_DESCARGAS, 'a', encoding='utf-8') as f:
+                f.write(clave + "\n")
+        except Exception as e:
+            print(f"Error al guardar el archivo de descargas: {str(e)}")
+
+def quitar_descarga(clave: Optional[str]) -> None:
+    """
+    Quita un video del índice.
+
+    Args:
+        clave: Clave "extractor id" del video
+    """
+    if not clave:
+        return
+    with _lock_archivo:
+        claves = _cargar_claves()
+        if clave not in claves:
+            return
+        claves.discard(clave)
+        try:
+            _escribir_archivo(claves)
+        except Exception as e:
+            print(f"Error al guardar el archivo de descargas: {str(e)}")
@@ -0,0 +1,134 @@
+"""
+Colocación de los archivos terminados en la carpeta de descargas.
+"""
+
+import os
+import shutil
+
+# Bytes pedidos al núcleo en cada llamada de copia
+_TAMANO_BLOQUE_COPIA = 64 * 1024 * 1024
+
+def _mismo_sistema_archivos(origen: str, directorio_destino: str) -> bool:
+    """Indica si el archivo y el directorio están en el mismo sistema de archivos."""
+    try:
+        return os.stat(origen).st_dev == os.stat(directorio_destino).st_dev
+    except OSError:
+        return False
+
+def _copiar_en_nucleo(f_origen, f_destino, tamano: int) -> None:
+    """
+    Copia el contenido de un archivo a otro sin pasar los datos por el proceso.
+
+    Usa copy_file_range o sendfile si el sistema los ofrece y, si no, una
+    copia convencional.
+
+    Args:
+        f_origen: Archivo de origen abierto en binario
+        f_destino: Archivo de destino abierto en binario
+        tamano: Bytes a copiar
+    """
+    entrada, salida = f_origen.fileno(), f_destino.fileno()
+    copiado = 0
+
+    for funcion in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, funcion):
+            continue
+        try:
+            while copiado < tamano:
+                pedido = min(_TAMANO_BLOQUE_COPIA, tamano - copiado)
+                if funcion == 'copy_file_range':
+                    n = os.copy_file_range(entrada, salida, pedido)
+                else:
+                    n = os.sendfile(salida, entrada, None, pedido)
+                if n == 0:
+                    break
+                copiado += n
+            if copiado >= tamano:
+                return
+        except OSError:
+            # No admitido entre estos sistemas de archivos: probar el siguiente método
+            pass
+
+    # Continuar desde donde se quedó la copia del núcleo
+    f_origen.seek(copiado)
+    f_destino.seek(copiado)
+    shutil.copyfileobj(f_origen, f_destino, _TAMANO_BLOQUE_COPIA)
+
+def preasignar(descriptor: int, tamano: int) -> bool:
+    """
+    Reserva en disco el tamaño final de un archivo antes de escribirlo.
+
+    Reduce la fragmentación y hace que un disco lleno falle al principio y
+    no al final. Solo se usa donde el sistema ofrece posix_fallocate.
+
+    Args:
+        descriptor: Descriptor del archivo abierto para escritura
+        tamano: Tamaño final en bytes
+
+    Returns:
+        True si se preasignó el espacio
+    """
+    if not hasattr(os, 'posix_fallocate') or tamano <= 0:
+        return False
+    try:
+        os.posix_fallocate(descriptor, 0, tamano)
+        return True
+    except OSError:
+        # Sistema de archivos sin soporte: se escribirá sin preasignar
+        return False
+
+def _sincronizar_directorio(directorio: str) -> None:
+    """Asegura en disco la entrada de directorio de un archivo recién renombrado."""
+    if os.name != 'posix':
+        return
+    try:
+        descriptor = os.open(directorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+def mover_archivo_final(origen: str, destino: str) -> str:
+    """
+    Mueve un archivo terminado a su ubicación definitiva, reemplazando si ya existe.
+
+    En el mismo sistema de archivos basta con un renombrado atómico. Si no,
+    se preasigna un temporal junto al destino, se copia con el núcleo, se
+    sincroniza con fsync, se renombra sobre el destino y se borra el origen;
+    así en la carpeta final nunca aparece un archivo a medio escribir.
+
+    Args:
+        origen: Archivo terminado (normalmente en el directorio temporal)
+        destino: Ruta definitiva
+
+    Returns:
+        Ruta definitiva del archivo
+    """
+    directorio_destino = os.path.dirname(os.path.abspath(destino))
+
+    if _mismo_sistema_archivos(origen, directorio_destino):
+        os.replace(origen, destino)
+        return destino
+
+    temporal = os.path.join(directorio_destino, f".{os.path.basename(destino)}.moviendo")
+    try:
+        with open(origen, 'rb') as f_origen, open(temporal, 'wb') as f_destino:
+            tamano = os.fstat(f_origen.fileno()).st_size
+            preasignar(f_destino.fileno(), tamano)
+            _copiar_en_nucleo(f_origen, f_destino, tamano)
+            f_destino.flush()
+            os.fsync(f_destino.fileno())
+        shutil.copystat(origen, temporal)
+        os.replace(temporal, destino)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    _sincronizar_directorio(directorio_destino)
+    os.remove(origen)
+    return destino
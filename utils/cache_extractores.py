@@ -0,0 +1,152 @@
+"""
+Directorio de caché de yt-dlp administrado por la aplicación.
+
+yt-dlp puede guardar en disco el código del reproductor y las funciones de
+firma ya resueltas. Aquí se fija ese directorio dentro de BASE_DIR (compartido
+por todas las sesiones y procesos; yt-dlp escribe cada entrada de forma
+atómica), se limita su tamaño y se cuentan los aciertos de la caché.
+"""
+
+import os
+import threading
+import time
+from typing import Dict
+
+from yt_dlp.cache import Cache
+
+from utils.config import CACHE_YTDLP_DIR, TAMANO_MAXIMO_CACHE_MB
+
+# Contadores por sección de la caché: seccion -> {'aciertos': n, 'fallos': n}
+_contadores: Dict[str, Dict[str, int]] = {}
+_lock_contadores = threading.Lock()
+
+# Antigüedad mínima de un temporal '.tmp' para considerarlo abandonado
+_ANTIGUEDAD_TEMPORALES = 3600  # segundos
+
+def _registrar_consulta(seccion: str, acierto: bool) -> None:
+    """Suma una consulta a los contadores de una sección."""
+    with _lock_contadores:
+        contador = _contadores.setdefault(seccion, {'aciertos': 0, 'fallos': 0})
+        contador['aciertos' if acierto else 'fallos'] += 1
+
+def instrumentar_cache() -> None:
+    """
+    Envuelve Cache.load de yt-dlp para contar aciertos y fallos por sección.
+
+    Puede llamarse varias veces; solo se instala una vez por proceso.
+    """
+    if getattr(Cache.load, '_instrumentado', False):
+        return
+
+    carga_original = Cache.load
+
+    def load(self, section, key, dtype='json', default=None, **kwargs):
+        resultado = carga_original(self, section, key, dtype, default, **kwargs)
+        if self.enabled:
+            _registrar_consulta(section, resultado is not default)
+        return resultado
+
+    load._instrumentado = True
+    Cache.load = load
+
+def tomar_contadores() -> Dict[str, Dict[str, int]]:
+    """
+    Devuelve los contadores acumulados y los reinicia.
+
+    Lo usan los procesos de extracción para enviar sus contadores al
+    proceso principal junto con cada resultado.
+
+    Returns:
+        Copia de los contadores por sección
+    """
+    with _lock_contadores:
+        copia = {seccion: dict(valores) for seccion, valores in _contadores.items()}
+        _contadores.clear()
+    return copia
+
+def sumar_contadores(contadores: Dict[str, Dict[str, int]]) -> None:
+    """
+    Suma contadores recibidos de otro proceso a los de este.
+
+    Args:
+        contadores: Contadores por sección devueltos por tomar_contadores
+    """
+    with _lock_contadores:
+        for seccion, valores in contadores.items():
+            contador = _contadores.setdefault(seccion, {'aciertos': 0, 'fallos': 0})
+            contador['aciertos'] += valores.get('aciertos', 0)
+            contador['fallos'] += valores.get('fallos', 0)
+
+def contadores_cache() -> Dict[str, Dict[str, int]]:
+    """
+    Devuelve los contadores de aciertos y fallos de la caché por sección.
+
+    Returns:
+        Diccionario seccion -> {'aciertos': n, 'fallos': n}
+    """
+    with _lock_contadores:
+        return {seccion: dict(valores) for seccion, valores in _contadores.items()}
+
+def resumen_cache() -> str:
+    """
+    Resume los contadores en una línea legible.
+
+    Returns:
+        Texto con el porcentaje de aciertos de cada sección
+    """
+    partes = []
+    for seccion, valores in sorted(contadores_cache().items()):
+        total = valores['aciertos'] + valores['fallos']
+        if total:
+            partes.append(f"{seccion}: {valores['aciertos']}/{total} desde caché")
+    return ", ".join(partes) if partes else "sin consultas"
+
+def podar_cache(tamano_max_mb: float = TAMANO_MAXIMO_CACHE_MB) -> int:
+    """
+    Elimina las entradas más antiguas hasta que la caché no supere el tamaño máximo.
+
+    Args:
+        tamano_max_mb: Tamaño máximo permitido en MB
+
+    Returns:
+        Número de archivos eliminados
+    """
+    if not os.path.isdir(CACHE_YTDLP_DIR):
+        return 0
+
+    ahora = time.time()
+    archivos = []
+    eliminados = 0
+    for raiz, _, nombres in os.walk(CACHE_YTDLP_DIR):
+        for nombre in nombres:
+            ruta = os.path.join(raiz, nombre)
+            try:
+                estado = os.stat(ruta)
+            except OSError:
+                continue
+            # Temporales abandonados por un proceso que terminó a mitad de escritura
+            if nombre.endswith('.tmp'):
+                if ahora - estado.st_mtime > _ANTIGUEDAD_TEMPORALES:
+                    try:
+                        os.remove(ruta)
+                        eliminados += 1
+                    except OSError:
+                        pass
+                continue
+            archivos.append((estado.st_mtime, estado.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in archivos)
+    limite = tamano_max_mb * 1024 * 1024
+    for _, tamano, ruta in sorted(archivos):
+        if total <= limite:
+            break
+        try:
+            os.remove(ruta)
+            total -= tamano
+            eliminados += 1
+        except OSError as e:
+            print(f"Error al podar la caché: {str(e)}")
+
+    if eliminados:
+        print(f"Caché de yt-dlp podada: {eliminados} archivos eliminados")
+    return eliminados
@@ -0,0 +1,221 @@
+"""
+Cola de trabajos compartida entre varios nodos de descarga.
+
+La cola es un archivo SQLite que puede estar en un volumen compartido por
+las máquinas; no hace falta ningún servicio aparte. Cada trabajo (una URL
+con su calidad) se reclama con un arrendamiento: el nodo que lo toma
+guarda un testigo propio y una fecha de caducidad que renueva con latidos
+mientras descarga. Si el nodo se cae, el arrendamiento caduca y otro nodo
+vuelve a reclamar el trabajo. Las escrituras que no llevan el testigo
+vigente no tienen efecto, así que un nodo que perdió su trabajo no puede
+darlo por terminado ni devolverlo a la cola.
+
+No se usa el modo WAL de SQLite porque necesita memoria compartida, que
+no funciona en volúmenes de red; las escrituras son pocas y cortas.
+"""
+
+import contextlib
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils.config import DURACION_ARRENDAMIENTO, INTENTOS_MAXIMOS_COLA
+from utils.urls import clave_canonica
+
+# Estados de un trabajo
+TRABAJO_PENDIENTE = 'pendiente'
+TRABAJO_EN_CURSO = 'en_curso'
+TRABAJO_COMPLETADO = 'completado'
+TRABAJO_FALLIDO = 'fallido'
+
+# Segundos que se espera a que otro nodo libere la base antes de dar error
+_ESPERA_BLOQUEO = 60
+
+_lock_bd = threading.Lock()
+
+@contextlib.contextmanager
+def _conectar(ruta: str):
+    """Abre la cola (creando la tabla si no existe) y confirma los cambios al salir."""
+    with _lock_bd:
+        conexion = sqlite3.connect(ruta, timeout=_ESPERA_BLOQUEO)
+        conexion.row_factory = sqlite3.Row
+        try:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS trabajos ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " url TEXT NOT NULL,"
+                " calidad TEXT NOT NULL DEFAULT '',"
+                " clave TEXT NOT NULL,"
+                " estado TEXT NOT NULL,"
+                " nodo TEXT,"
+                " testigo TEXT,"
+                " arrendado_hasta REAL,"
+                " intentos INTEGER NOT NULL DEFAULT 0,"
+                " error TEXT,"
+                " resultado TEXT,"
+                " creado REAL NOT NULL,"
+                " actualizado REAL NOT NULL,"
+                " UNIQUE (clave, calidad))")
+            conexion.execute("CREATE INDEX IF NOT EXISTS trabajos_estado ON trabajos (estado, id)")
+            yield conexion
+            conexion.commit()
+        finally:
+            conexion.close()
+
+def encolar_trabajos(ruta: str, urls: Iterable[str], calidad: str = "") -> Tuple[int, int]:
+    """
+    Añade URLs a la cola compartida, sin repetir las que ya están (en cualquier estado).
+
+    Args:
+        ruta: Ruta del archivo SQLite de la cola
+        urls: URLs a descargar
+        calidad: ID del formato a descargar
+
+    Returns:
+        Tupla (añadidas, repetidas)
+    """
+    ahora = time.time()
+    anadidas = repetidas = 0
+    with _conectar(ruta) as conexion:
+        for url in urls:
+            cursor = conexion.execute(
+                "INSERT OR IGNORE INTO trabajos (url, calidad, clave, estado, creado, actualizado)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (url, calidad or '', clave_canonica(url), TRABAJO_PENDIENTE, ahora, ahora))
+            if cursor.rowcount:
+                anadidas += 1
+            else:
+                repetidas += 1
+    return anadidas, repetidas
+
+def reclamar_trabajo(ruta: str, nodo: str) -> Optional[Dict]:
+    """
+    Toma el trabajo pendiente más antiguo (o uno cuyo arrendamiento caducó).
+
+    La reclamación es una única sentencia UPDATE, así que dos nodos nunca
+    obtienen el mismo trabajo: SQLite serializa las escrituras.
+
+    Args:
+        ruta: Ruta del archivo SQLite de la cola
+        nodo: Nombre del nodo que lo reclama
+
+    Returns:
+        Diccionario con las columnas del trabajo (incluido su 'testigo'),
+        o None si no hay trabajo disponible
+    """
+    ahora = time.time()
+    testigo = uuid.uuid4().hex
+    with _conectar(ruta) as conexion:
+        # Trabajos que agotaron sus intentos sin que su nodo diera señales
+        conexion.execute(
+            "UPDATE trabajos SET estado = ?, error = 'El nodo dejó de enviar latidos', actualizado = ?"
+            " WHERE estado = ? AND arrendado_hasta < ? AND intentos >= ?",
+            (TRABAJO_FALLIDO, ahora, TRABAJO_EN_CURSO, ahora, INTENTOS_MAXIMOS_COLA))
+        conexion.execute(
+            "UPDATE trabajos SET estado = ?, nodo = ?, testigo = ?, arrendado_hasta = ?,"
+            " intentos = intentos + 1, actualizado = ?"
+            " WHERE id = (SELECT id FROM trabajos"
+            "   WHERE estado = ? OR (estado = ? AND arrendado_hasta < ?)"
+            "   ORDER BY id LIMIT 1)",
+            (TRABAJO_EN_CURSO, nodo, testigo, ahora + DURACION_ARRENDAMIENTO, ahora,
+             TRABAJO_PENDIENTE, TRABAJO_EN_CURSO, ahora))
+        fila = conexion.execute("SELECT * FROM trabajos WHERE testigo = ?", (testigo,)).fetchone()
+    return dict(fila) if fila else None
+
+def renovar_trabajo(ruta: str, id_trabajo: int, testigo: str) -> bool:
+    """
+    Prolonga el arrendamiento de un trabajo en curso (latido).
+
+    Args:
+        ruta: Ruta del archivo SQLite de la cola
+        id_trabajo: ID del trabajo
+        testigo: Testigo obtenido al reclamarlo
+
+    Returns:
+        False si el trabajo ya no pertenece a este nodo (otro lo reclamó)
+    """
+    ahora = time.time()
+    with _conectar(ruta) as conexion:
+        cursor = conexion.execute(
+            "UPDATE trabajos SET arrendado_hasta = ?, actualizado = ?"
+            " WHERE id = ? AND testigo = ? AND estado = ?",
+            (ahora + DURACION_ARRENDAMIENTO, ahora, id_trabajo, testigo, TRABAJO_EN_CURSO))
+        return cursor.rowcount > 0
+
+def completar_trabajo(ruta: str, id_trabajo: int, testigo: str, resultado: str = "") -> bool:
+    """
+    Marca un trabajo como terminado.
+
+    Args:
+        ruta: Ruta del archivo SQLite de la cola
+        id_trabajo: ID del trabajo
+        testigo: Testigo obtenido al reclamarlo
+        resultado: Ruta del archivo descargado
+
+    Returns:
+        False si el trabajo ya no pertenecía a este nodo
+    """
+    with _conectar(ruta) as conexion:
+        cursor = conexion.execute(
+            "UPDATE trabajos SET estado = ?, resultado = ?, error = NULL, arrendado_hasta = NULL,"
+            " actualizado = ? WHERE id = ? AND testigo = ? AND estado = ?",
+            (TRABAJO_COMPLETADO, resultado, time.time(), id_trabajo, testigo, TRABAJO_EN_CURSO))
+        return cursor.rowcount > 0
+
+def fallar_trabajo(ruta: str, id_trabajo: int, testigo: str, error: str) -> Optional[str]:
+    """
+    Registra el fallo de un trabajo: vuelve a la cola si le quedan intentos.
+
+    Args:
+        ruta: Ruta del archivo SQLite de la cola
+        id_trabajo: ID del trabajo
+        testigo: Testigo obtenido al reclamarlo
+        error: Mensaje del error
+
+    Returns:
+        Nuevo estado del trabajo, o None si ya no pertenecía a este nodo
+    """
+    with _conectar(ruta) as conexion:
+        cursor = conexion.execute(
+            "UPDATE trabajos SET estado = CASE WHEN intentos >= ? THEN ? ELSE ? END,"
+            " error = ?, testigo = NULL, arrendado_hasta = NULL, actualizado = ?"
+            " WHERE id = ? AND testigo = ? AND estado = ?",
+            (INTENTOS_MAXIMOS_COLA, TRABAJO_FALLIDO, TRABAJO_PENDIENTE, error, time.time(),
+             id_trabajo, testigo, TRABAJO_EN_CURSO))
+        if not cursor.rowcount:
+            return None
+        return conexion.execute("SELECT estado FROM trabajos WHERE id = ?", (id_trabajo,)).fetchone()[0]
+
+def liberar_trabajo(ruta: str, id_trabajo: int, testigo: str) -> None:
+    """
+    Devuelve a la cola un trabajo sin contar el intento (p. ej. al detener el nodo).
+
+    Args:
+        ruta: Ruta del archivo SQLite de la cola
+        id_trabajo: ID del trabajo
+        testigo: Testigo obtenido al reclamarlo
+    """
+    with _conectar(ruta) as conexion:
+        conexion.execute(
+            "UPDATE trabajos SET estado = ?, intentos = MAX(0, intentos - 1), testigo = NULL,"
+            " arrendado_hasta = NULL, actualizado = ? WHERE id = ? AND testigo = ? AND estado = ?",
+            (TRABAJO_PENDIENTE, time.time(), id_trabajo, testigo, TRABAJO_EN_CURSO))
+
+def contar_trabajos(ruta: str) -> Dict[str, int]:
+    """
+    Cuenta los trabajos de la cola en cada estado.
+
+    Args:
+        ruta: Ruta del archivo SQLite de la cola
+
+    Returns:
+        Diccionario estado -> número de trabajos (con todos los estados)
+    """
+    with _conectar(ruta) as conexion:
+        filas = conexion.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado")
+        conteo = {estado: total for estado, total in filas}
+    for estado in (TRABAJO_PENDIENTE, TRABAJO_EN_CURSO, TRABAJO_COMPLETADO, TRABAJO_FALLIDO):
+        conteo.setdefault(estado, 0)
+    return conteo
@@ -15,7 +15,52 @@ CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
 # Valores predeterminados
 DEFAULT_DOWNLOADS_DIR = os.path.join(BASE_DIR, "downloads")
 FORMATO_VIDEO = 'bestvideo+bestaudio/best'
+CALIDAD_REGLAS = 'reglas'  # Valor de calidad que elige el formato según las reglas
+CALIDAD_ADAPTATIVA = 'adaptativa'  # Valor de calidad que se ajusta al ancho de banda medido
+FORMATO_AUDIO = 'bestaudio/best'
+CALIDAD_AUDIO = 'audio'  # Solo el mejor audio, remuxado sin recodificar (m4a/opus)
+CALIDAD_AUDIO_MP3 = 'audio-mp3'  # Solo el mejor audio, recodificado a MP3
+PRESUPUESTO_TIEMPO_PREDETERMINADO = 10  # minutos máximos por video en modo adaptativo
+FACTOR_SUAVIZADO_VELOCIDAD = 0.2  # peso de cada nueva muestra en la media móvil (EWMA)
+
+# Reglas de preferencia de formato (None = sin límite)
+REGLAS_FORMATO_PREDETERMINADAS = {
+    'altura_max': None,               # Altura máxima en píxeles (p. ej. 1080)
+    'codecs': ['av1', 'vp9', 'h264'],  # Orden de preferencia de códecs de video
+    'fps_max': None,                  # Cuadros por segundo máximos
+    'tamano_max_mb': None,            # Tamaño estimado máximo (video + audio) en MB
+    'contenedor': None,               # 'mp4', 'webm' o None para cualquiera
+}
 INTERVALO_ACTUALIZACION_UI = 50  # milisegundos
+RETARDO_PRECARGA_FORMATOS = 700  # milisegundos de espera tras escribir/pegar una URL
+DURACION_CACHE_METADATOS = 1800  # segundos que se conserva la información de un video
+PROCESOS_EXTRACCION = min(4, max(2, (os.cpu_count() or 1) // 2))  # procesos para consultar información (cada uno carga yt-dlp)
+HILOS_PLANIFICACION = 2 * PROCESOS_EXTRACCION  # videos que se planifican a la vez al estimar un lote
+TIEMPO_MAXIMO_EXTRACCION = 120  # segundos máximos para obtener la información de un video
+SESIONES_MAXIMAS = 4  # sesiones de yt-dlp libres que se conservan para reutilizar
+MAX_DESCARGAS_SIMULTANEAS = 3  # descargas transfiriendo datos a la vez
+PROCESOS_POSTPROCESO = 2  # procesos para unir, remuxar y renombrar las descargas
+REINTENTOS_MAXIMOS = 5  # reintentos de una descarga tras errores transitorios
+ESPERA_BASE_REINTENTO = 2  # segundos; se duplica en cada reintento
+ESPERA_MAXIMA_REINTENTO = 60  # segundos máximos entre reintentos
+ENFRIAMIENTO_BASE_HOST = 30  # segundos sin descargar de un host que limita (429/403)
+ENFRIAMIENTO_MAXIMO_HOST = 600  # segundos máximos de enfriamiento de un host
+VENTANA_ESTANCAMIENTO_PREDETERMINADA = 60  # segundos sin avance para dar una transferencia por estancada
+AVANCE_MINIMO_ESTANCAMIENTO = 64 * 1024  # bytes que cuentan como avance real
+TIEMPO_ESPERA_SOCKET = 20  # segundos máximos bloqueado en una lectura de red
+MARGEN_ESPACIO_DISCO = 0.1  # fracción extra reservada por error en el tamaño estimado
+ESPACIO_MINIMO_LIBRE_MB = 200  # espacio que se deja siempre libre en cada disco
+INTERVALO_OCUPACION_UI = 1000  # milisegundos entre actualizaciones de la ocupación
+HILOS_SINCRONIZACION = 8  # suscripciones que se consultan a la vez
+MAXIMO_NUEVOS_SUSCRIPCION = 50  # videos nuevos como máximo por suscripción y sincronización
+DIAS_ENTRE_SINCRONIZACIONES = 7  # días tras los que se sincroniza una suscripción al iniciar
+TAMANO_LOTE_IMPORTACION = 500  # URLs por lote al importar una lista
+IMPORTADAS_EN_CURSO = 6  # descargas importadas lanzadas a la vez (el resto espera en cola)
+INTERVALO_PROGRAMADOR_UI = 15000  # milisegundos entre revisiones de las descargas programadas
+DURACION_ARRENDAMIENTO = 60  # segundos que un nodo conserva un trabajo de la cola compartida sin latir
+INTERVALO_LATIDO = 15  # segundos entre renovaciones de los trabajos en curso de un nodo
+INTERVALO_SONDEO_COLA = 5  # segundos de espera de un nodo cuando la cola compartida está vacía
+INTENTOS_MAXIMOS_COLA = 3  # veces que se reclama un trabajo de la cola compartida antes de darlo por fallido
 ANCHO_VENTANA = 565
 ALTO_VENTANA = 500
 TITULO_APP = "Descargador de YouTube"
@@ -24,6 +69,28 @@ ICONO_APP = os.path.join(ASSETS_DIR, "ico-youtube.ico")
 # Archivo de historial
 HISTORIAL_ARCHIVO = os.path.join(BASE_DIR, "historial_descargas.json")
 
+# Índice de videos descargados (una línea "extractor id", como --download-archive de yt-dlp)
+ARCHIVO_DESCARGAS = os.path.join(BASE_DIR, "archivo_descargas.txt")
+
+# Índice de contenido (hash SHA-256 -> archivo) para deduplicar descargas
+INDICE_CONTENIDO_ARCHIVO = os.path.join(BASE_DIR, "indice_contenido.json")
+
+# Cola de descargas programadas en franjas horarias
+DESCARGAS_PROGRAMADAS_ARCHIVO = os.path.join(BASE_DIR, "descargas_programadas.json")
+
+# Registro de descargas fallidas (SQLite)
+FALLOS_BD = os.path.join(BASE_DIR, "fallos.sqlite3")
+
+# Cola de trabajos compartida entre nodos (SQLite; puede estar en un volumen compartido)
+COLA_COMPARTIDA_BD = os.path.join(BASE_DIR, "cola_compartida.sqlite3")
+
+# Caché de yt-dlp (código del reproductor y funciones de firma)
+CACHE_YTDLP_DIR = os.path.join(BASE_DIR, "cache_ytdlp")
+TAMANO_MAXIMO_CACHE_MB = 50
+
+# Archivo con las velocidades medidas por host
+ESTADISTICAS_RED_ARCHIVO = os.path.join(BASE_DIR, "estadisticas_red.json")
+
 # Carpeta de descargas (puede cambiar durante la ejecución)
 DOWNLOADS_DIR = DEFAULT_DOWNLOADS_DIR
 
@@ -65,6 +132,40 @@ def cargar_configuracion():
             print(f"Error al crear directorio de descargas: {str(e)}")
             DOWNLOADS_DIR = DEFAULT_DOWNLOADS_DIR
 
+def leer_configuracion():
+    """
+    Lee el archivo de configuración completo.
+    
+    Returns:
+        dict: Configuración guardada (vacía si no existe o no es válida)
+    """
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as archivo:
+            configuracion = json.load(archivo)
+            return configuracion if isinstance(configuracion, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def actualizar_configuracion(**cambios):
+    """
+    Actualiza una o varias claves del archivo de configuración, conservando el resto.
+    
+    Args:
+        **cambios: Claves y valores a guardar
+    
+    Returns:
+        bool: True si se guardó correctamente, False en caso contrario
+    """
+    try:
+        configuracion = leer_configuracion()
+        configuracion.update(cambios)
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as archivo:
+            json.dump(configuracion, archivo, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        print(f"Error al actualizar la configuración: {str(e)}")
+        return False
+
 def guardar_configuracion(downloads_dir=None):
     """Guarda la configuración en un archivo JSON."""
     global DOWNLOADS_DIR
@@ -75,9 +176,9 @@ def guardar_configuracion(downloads_dir=None):
     if downloads_dir and os.path.isdir(downloads_dir):
         DOWNLOADS_DIR = downloads_dir
     
-    config = {
-        'downloads_dir': DOWNLOADS_DIR
-    }
+    # Conservar el resto de opciones guardadas (calidad, reglas, etc.)
+    config = leer_configuracion()
+    config['downloads_dir'] = DOWNLOADS_DIR
     
     try:
         with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
@@ -159,5 +260,121 @@ def guardar_calidad_video(format_id):
         print(f"Error al guardar la calidad de video: {str(e)}")
         return False
 
+def obtener_reglas_formato():
+    """
+    Obtiene las reglas de preferencia de formato configuradas.
+    
+    Returns:
+        dict: Reglas guardadas combinadas con los valores predeterminados
+    """
+    reglas = dict(REGLAS_FORMATO_PREDETERMINADAS)
+    guardadas = leer_configuracion().get('reglas_formato')
+    if isinstance(guardadas, dict):
+        reglas.update(guardadas)
+    return reglas
+
+def guardar_reglas_formato(reglas):
+    """
+    Guarda las reglas de preferencia de formato.
+    
+    Args:
+        reglas: Diccionario con las reglas (ver REGLAS_FORMATO_PREDETERMINADAS)
+    
+    Returns:
+        bool: True si se guardó correctamente, False en caso contrario
+    """
+    return actualizar_configuracion(reglas_formato=reglas)
+
+def obtener_presupuesto_tiempo():
+    """
+    Obtiene el tiempo máximo por video para la calidad adaptativa.
+    
+    Returns:
+        float: Minutos que puede tardar como máximo cada descarga
+    """
+    try:
+        return float(leer_configuracion().get('presupuesto_tiempo_min', PRESUPUESTO_TIEMPO_PREDETERMINADO))
+    except (TypeError, ValueError):
+        return PRESUPUESTO_TIEMPO_PREDETERMINADO
+
+def guardar_presupuesto_tiempo(minutos):
+    """
+    Guarda el tiempo máximo por video para la calidad adaptativa.
+    
+    Args:
+        minutos: Minutos que puede tardar como máximo cada descarga
+    
+    Returns:
+        bool: True si se guardó correctamente, False en caso contrario
+    """
+    return actualizar_configuracion(presupuesto_tiempo_min=minutos)
+
+def obtener_suscripciones():
+    """
+    Obtiene los canales y listas suscritos.
+    
+    Returns:
+        list: Suscripciones guardadas (diccionarios con 'url', 'nombre',
+              'ultimo_visto' y 'ultima_sincronizacion')
+    """
+    suscripciones = leer_configuracion().get('suscripciones')
+    return suscripciones if isinstance(suscripciones, list) else []
+
+def guardar_suscripciones(suscripciones):
+    """
+    Guarda los canales y listas suscritos.
+    
+    Args:
+        suscripciones: Lista de suscripciones (ver obtener_suscripciones)
+    
+    Returns:
+        bool: True si se guardó correctamente, False en caso contrario
+    """
+    return actualizar_configuracion(suscripciones=suscripciones)
+
+def obtener_ventana_estancamiento():
+    """
+    Obtiene los segundos sin avance tras los que una transferencia se da por estancada.
+    
+    Returns:
+        float: Segundos de la ventana de vigilancia
+    """
+    try:
+        return float(leer_configuracion().get('ventana_estancamiento_s', VENTANA_ESTANCAMIENTO_PREDETERMINADA))
+    except (TypeError, ValueError):
+        return VENTANA_ESTANCAMIENTO_PREDETERMINADA
+
+def obtener_directorio_temporal():
+    """
+    Obtiene el directorio para los archivos parciales e intermedios.
+    
+    Se configura con la clave 'directorio_temporal' (p. ej. un SSD local o un
+    tmpfs) para no escribir los parciales en una carpeta sincronizada. Si no
+    está configurado o no se puede crear, se usa el directorio de descargas.
+    
+    Returns:
+        str: Ruta al directorio temporal
+    """
+    directorio = leer_configuracion().get('directorio_temporal')
+    if directorio:
+        try:
+            os.makedirs(directorio, exist_ok=True)
+            return directorio
+        except OSError as e:
+            print(f"No se pudo usar el directorio temporal {directorio}: {str(e)}")
+    return obtener_directorio_descargas()
+
+def guardar_directorio_temporal(directorio):
+    """
+    Guarda el directorio para los archivos parciales e intermedios.
+    
+    Args:
+        directorio: Ruta del directorio, o None para usar el de descargas
+    
+    Returns:
+        bool: True si se guardó correctamente, False en caso contrario
+    """
+    return actualizar_configuracion(directorio_temporal=directorio)
+
 # Cargar configuración al iniciar
 cargar_configuracion()
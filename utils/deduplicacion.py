@@ -0,0 +1,191 @@
+"""
+Deduplicación de descargas por contenido.
+
+El hash SHA-256 de cada descarga se calcula a medida que yt-dlp escribe el
+archivo (leyendo solo los bytes recién añadidos, que aún están en la caché
+de páginas del sistema), así que no hace falta una segunda lectura completa.
+Un índice guarda qué archivo corresponde a cada hash; si una descarga nueva
+coincide con uno existente, se sustituye por un reflink o un enlace duro.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Dict, Optional
+
+from utils.config import INDICE_CONTENIDO_ARCHIVO
+
+# Tamaño de los bloques leídos al actualizar el hash
+_TAMANO_BLOQUE = 1024 * 1024
+
+# ioctl de Linux para clonar un archivo compartiendo sus bloques (btrfs, XFS...)
+_FICLONE = 0x40049409
+
+_lock_indice = threading.Lock()
+
+class HashIncremental:
+    """
+    Calcula el hash de las partes de una descarga mientras se escriben.
+
+    Attributes:
+        valido: False si no se pudo seguir alguna parte (el hash no sirve)
+    """
+
+    def __init__(self):
+        """Inicializa el hash vacío."""
+        self._hash = hashlib.sha256()
+        self._posicion = 0
+        self.valido = True
+
+    def nueva_parte(self) -> None:
+        """Indica que empieza a descargarse otra parte (otro archivo)."""
+        self._posicion = 0
+
+    def actualizar(self, ruta: Optional[str]) -> None:
+        """
+        Añade al hash los bytes escritos en el archivo desde la última llamada.
+
+        Args:
+            ruta: Archivo que se está escribiendo
+        """
+        if not self.valido or not ruta:
+            return
+        try:
+            with open(ruta, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self._posicion:
+                    # El archivo volvió a empezar: el hash ya no corresponde
+                    self.valido = False
+                    return
+                f.seek(self._posicion)
+                while True:
+                    bloque = f.read(_TAMANO_BLOQUE)
+                    if not bloque:
+                        break
+                    self._hash.update(bloque)
+                    self._posicion += len(bloque)
+        except OSError as e:
+            print(f"No se pudo calcular el hash de la descarga: {str(e)}")
+            self.valido = False
+
+    def resultado(self, partes: int = 1, extension: str = "", titulo: str = "",
+                  audio: Optional[str] = None) -> Optional[str]:
+        """
+        Devuelve el hash del contenido.
+
+        Con una sola parte que se mueve sin tocar es el SHA-256 del archivo.
+        Si el archivo final lo escribe ffmpeg (video y audio unidos con el
+        título en los metadatos, o solo el audio extraído o recodificado),
+        sus bytes no son los descargados: el hash identifica las partes y
+        además todo lo que decide el archivo final (contenedor, modo de
+        audio y título), para no enlazar dos archivos distintos.
+
+        Args:
+            partes: Número de partes descargadas
+            extension: Extensión del archivo final
+            titulo: Título que se escribe en los metadatos al unir
+            audio: Modo de solo audio (None para video)
+
+        Returns:
+            Hash en hexadecimal o None si no es válido
+        """
+        if not self.valido:
+            return None
+        if partes == 1 and not audio:
+            return self._hash.hexdigest()
+        combinado = self._hash.copy()
+        combinado.update(f"|{partes} partes|{extension}|{audio or 'video'}|{titulo}".encode('utf-8'))
+        return combinado.hexdigest()
+
+def _cargar_indice() -> Dict[str, str]:
+    """Carga el índice hash -> ruta del archivo."""
+    if not os.path.exists(INDICE_CONTENIDO_ARCHIVO):
+        return {}
+    try:
+        with open(INDICE_CONTENIDO_ARCHIVO, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error al cargar el índice de contenido: {str(e)}")
+        return {}
+
+def _guardar_indice(indice: Dict[str, str]) -> None:
+    """Guarda el índice hash -> ruta del archivo."""
+    try:
+        with open(INDICE_CONTENIDO_ARCHIVO, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"Error al guardar el índice de contenido: {str(e)}")
+
+def _clonar(origen: str, destino: str) -> bool:
+    """
+    Crea 'destino' como reflink de 'origen' si el sistema de archivos lo admite.
+
+    Returns:
+        True si se creó el reflink
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        with open(origen, 'rb') as f_origen, open(destino, 'wb') as f_destino:
+            fcntl.ioctl(f_destino.fileno(), _FICLONE, f_origen.fileno())
+        return True
+    except OSError:
+        if os.path.exists(destino):
+            os.remove(destino)
+        return False
+
+def deduplicar(ruta: str, hash_contenido: Optional[str]) -> int:
+    """
+    Registra el archivo en el índice o lo sustituye por un enlace al que ya tiene ese contenido.
+
+    Args:
+        ruta: Archivo recién descargado
+        hash_contenido: Hash calculado durante la descarga
+
+    Returns:
+        Bytes liberados (0 si no había duplicado o no se pudo enlazar)
+    """
+    if not hash_contenido:
+        return 0
+
+    with _lock_indice:
+        indice = _cargar_indice()
+        existente = indice.get(hash_contenido)
+
+        try:
+            duplicado = (
+                existente and existente != ruta and os.path.exists(existente)
+                and os.path.getsize(existente) == os.path.getsize(ruta)
+            )
+        except OSError:
+            duplicado = False
+
+        if not duplicado:
+            indice[hash_contenido] = ruta
+            _guardar_indice(indice)
+            return 0
+
+        if os.path.samefile(existente, ruta):
+            return 0
+
+        tamano = os.path.getsize(ruta)
+        temporal = ruta + ".dedup"
+        try:
+            if _clonar(existente, temporal):
+                tipo = "reflink"
+            else:
+                os.link(existente, temporal)
+                tipo = "enlace duro"
+            os.replace(temporal, ruta)
+        except OSError as e:
+            # Distinto volumen o sistema de archivos sin enlaces: conservar la copia
+            print(f"No se pudo deduplicar {ruta}: {str(e)}")
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return 0
+
+    print(f"Contenido duplicado de {existente}: sustituido por {tipo} ({tamano} bytes liberados)")
+    return tamano
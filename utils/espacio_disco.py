@@ -0,0 +1,176 @@
+"""
+Comprobación y reserva de espacio en disco para las descargas.
+
+Antes de empezar una descarga se calcula cuánto ocupará en cada sistema de
+archivos (el temporal y el de destino) y se reserva en un libro compartido
+por todas las descargas en curso. Si no cabe ahora pero cabrá cuando
+terminen las demás, la descarga espera; si no cabe ni así, se rechaza.
+
+El espacio libre que informa el sistema ya descuenta lo que cada descarga
+ha escrito, así que de cada reserva solo cuenta la parte que falta por
+escribir (lo mismo al continuar un archivo .part de una sesión anterior).
+"""
+
+import os
+import shutil
+import threading
+from typing import Callable, Dict, List, Optional
+
+from utils.config import MARGEN_ESPACIO_DISCO, ESPACIO_MINIMO_LIBRE_MB
+from utils.historial import formatear_tamano
+
+class EspacioInsuficienteError(Exception):
+    """La descarga no cabe en el disco aunque terminen las demás."""
+
+class LibroReservas:
+    """
+    Reservas de espacio de las descargas en curso, por sistema de archivos.
+
+    Attributes:
+        reservas: Descarga -> {dispositivo: bytes reservados}
+        escritos: Descarga -> función que mide lo que ya escribió en cada directorio
+    """
+
+    def __init__(self):
+        """Inicializa el libro vacío."""
+        self.reservas: Dict[int, Dict[int, int]] = {}
+        self.escritos: Dict[int, Callable[[], Dict[str, int]]] = {}
+        self._condicion = threading.Condition()
+
+    def _escritos_por_dispositivo(self, medir: Optional[Callable[[], Dict[str, int]]]) -> Dict[int, int]:
+        """Agrupa por dispositivo los bytes que una descarga ya tiene en disco."""
+        por_dispositivo: Dict[int, int] = {}
+        if medir is None:
+            return por_dispositivo
+        try:
+            for directorio, escritos in medir().items():
+                dispositivo = os.stat(directorio).st_dev
+                por_dispositivo[dispositivo] = por_dispositivo.get(dispositivo, 0) + escritos
+        except OSError:
+            pass
+        return por_dispositivo
+
+    def _reservado(self, dispositivo: int) -> int:
+        """Bytes que las descargas en curso aún escribirán en un dispositivo."""
+        pendiente = 0
+        for id_descarga, reserva in self.reservas.items():
+            escritos = self._escritos_por_dispositivo(self.escritos.get(id_descarga))
+            pendiente += max(0, reserva.get(dispositivo, 0) - escritos.get(dispositivo, 0))
+        return pendiente
+
+    def reservar(self, id_descarga: int, necesidades: Dict[str, int],
+                 cancelada: Optional[Callable[[], bool]] = None,
+                 escritos: Optional[Callable[[], Dict[str, int]]] = None) -> None:
+        """
+        Reserva espacio para una descarga, esperando si hace falta.
+
+        Args:
+            id_descarga: ID de la descarga
+            necesidades: Directorio -> bytes que se escribirán en él
+            cancelada: Función que indica si hay que dejar de esperar
+            escritos: Función que devuelve directorio -> bytes que la descarga
+                      ya tiene en disco (parciales de un intento anterior y lo
+                      que vaya escribiendo); se descuentan de su reserva
+
+        Raises:
+            EspacioInsuficienteError: Si no cabe aunque se liberen las demás reservas
+            Exception: Si la descarga se cancela mientras espera
+        """
+        minimo = ESPACIO_MINIMO_LIBRE_MB * 1024 * 1024
+
+        # Agrupar por dispositivo: el temporal y el destino pueden ser el mismo disco
+        por_dispositivo: Dict[int, int] = {}
+        directorios: Dict[int, str] = {}
+        for directorio, tamano in necesidades.items():
+            dispositivo = os.stat(directorio).st_dev
+            por_dispositivo[dispositivo] = por_dispositivo.get(dispositivo, 0) + tamano
+            directorios[dispositivo] = directorio
+
+        with self._condicion:
+            while True:
+                falta = None
+                ya_escritos = self._escritos_por_dispositivo(escritos)
+                for dispositivo, total in por_dispositivo.items():
+                    # Lo que ya está en disco no cuenta: el espacio libre ya lo descuenta
+                    tamano = max(0, total - ya_escritos.get(dispositivo, 0))
+                    libre = shutil.disk_usage(directorios[dispositivo]).free
+                    reservado = self._reservado(dispositivo)
+                    if libre - minimo < tamano:
+                        # Ni liberando las demás reservas habría sitio
+                        raise EspacioInsuficienteError(
+                            f"Espacio insuficiente en {directorios[dispositivo]}: "
+                            f"se necesitan {formatear_tamano(tamano)} y hay "
+                            f"{formatear_tamano(max(libre - minimo, 0))} disponibles")
+                    if libre - minimo - reservado < tamano:
+                        falta = dispositivo
+
+                if falta is None:
+                    self.reservas[id_descarga] = por_dispositivo
+                    if escritos is not None:
+                        self.escritos[id_descarga] = escritos
+                    return
+
+                if cancelada and cancelada():
+                    raise Exception("Descarga cancelada por el usuario")
+                # Esperar a que otra descarga libere su reserva (o volver a mirar en un rato)
+                self._condicion.wait(timeout=0.5)
+
+    def liberar(self, id_descarga: int) -> None:
+        """
+        Libera la reserva de una descarga.
+
+        Args:
+            id_descarga: ID de la descarga
+        """
+        with self._condicion:
+            self.escritos.pop(id_descarga, None)
+            if self.reservas.pop(id_descarga, None) is not None:
+                self._condicion.notify_all()
+
+# Libro compartido por todas las descargas
+libro_reservas = LibroReservas()
+
+def calcular_necesidades(tamano: int, directorio_temporal: str, directorio_destino: str,
+                         partes: int = 1) -> Dict[str, int]:
+    """
+    Calcula cuánto espacio necesita una descarga en cada directorio.
+
+    En el temporal se escriben las partes y, si hay que unirlas, también el
+    archivo unido mientras las partes siguen existiendo. El destino solo
+    necesita espacio propio si está en otro sistema de archivos.
+
+    Args:
+        tamano: Tamaño estimado de la descarga en bytes
+        directorio_temporal: Directorio de los parciales
+        directorio_destino: Carpeta de descargas
+        partes: Número de partes que se descargan por separado
+
+    Returns:
+        Directorio -> bytes necesarios (con el margen por error de estimación)
+    """
+    con_margen = int(tamano * (1 + MARGEN_ESPACIO_DISCO))
+    necesidades = {directorio_temporal: con_margen * (2 if partes > 1 else 1)}
+    if os.stat(directorio_temporal).st_dev != os.stat(directorio_destino).st_dev:
+        necesidades[directorio_destino] = con_margen
+    return necesidades
+
+def bytes_en_disco(directorio: str, prefijos: List[str]) -> int:
+    """
+    Suma el tamaño de los archivos de un directorio que empiezan por alguno de los prefijos.
+
+    Args:
+        directorio: Directorio donde están los archivos de la descarga
+        prefijos: Comienzos de nombre de los archivos de la descarga
+
+    Returns:
+        Bytes ocupados por esos archivos
+    """
+    total = 0
+    try:
+        with os.scandir(directorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.startswith(tuple(prefijos)) and entrada.is_file():
+                    total += entrada.stat().st_size
+    except OSError:
+        pass
+    return total
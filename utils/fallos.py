@@ -0,0 +1,177 @@
+"""
+Registro persistente de las descargas fallidas.
+
+Cada fallo se guarda en una base SQLite (una fila por URL y calidad) con la
+clase del error, el número de intentos acumulados y las fechas del primer y
+último fallo. Así las descargas que fallan durante la noche se pueden
+revisar y reintentar en bloque sin volver a pegar las URLs. Cuando una
+descarga termina bien, su fila se borra.
+"""
+
+import contextlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from utils.config import FALLOS_BD
+from utils.reintentos import clasificar_error, ERROR_LIMITADO, ERROR_TRANSITORIO
+
+# Clases de fallo, con su descripción para la interfaz
+FALLO_GEO = 'geo'
+FALLO_PRIVADO = 'privado'
+FALLO_LIMITADO = 'limitado'
+FALLO_RED = 'red'
+FALLO_EXTRACTOR = 'extractor'
+FALLO_OTRO = 'otro'
+
+DESCRIPCION_FALLOS = {
+    FALLO_GEO: "Bloqueado en el país",
+    FALLO_PRIVADO: "Privado o restringido",
+    FALLO_LIMITADO: "Límite del servidor",
+    FALLO_RED: "Error de red",
+    FALLO_EXTRACTOR: "Error del extractor",
+    FALLO_OTRO: "Otro error",
+}
+
+_PATRON_GEO = re.compile(
+    r'not available in your country|geo.?restrict|blocked it in your country|'
+    r'not made this video available in your country', re.IGNORECASE)
+_PATRON_PRIVADO = re.compile(
+    r'private video|video is private|members.only|join this channel|sign in to confirm your age|'
+    r'age.restricted|login required|requires authentication', re.IGNORECASE)
+_PATRON_EXTRACTOR = re.compile(
+    r'unsupported url|unable to extract|unable to download (webpage|api)|nsig|signature|'
+    r'requested format is not available|no video formats found|ExtractorError', re.IGNORECASE)
+
+_lock_bd = threading.Lock()
+
+def clasificar_fallo(mensaje: str) -> str:
+    """
+    Clasifica el mensaje de error de una descarga fallida.
+
+    Args:
+        mensaje: Mensaje del error
+
+    Returns:
+        Una de las claves de DESCRIPCION_FALLOS
+    """
+    if _PATRON_GEO.search(mensaje):
+        return FALLO_GEO
+    if _PATRON_PRIVADO.search(mensaje):
+        return FALLO_PRIVADO
+    tipo = clasificar_error(Exception(mensaje))
+    if tipo == ERROR_LIMITADO:
+        return FALLO_LIMITADO
+    if tipo == ERROR_TRANSITORIO:
+        return FALLO_RED
+    if _PATRON_EXTRACTOR.search(mensaje):
+        return FALLO_EXTRACTOR
+    return FALLO_OTRO
+
+@contextlib.contextmanager
+def _conectar():
+    """Abre la base de fallos (creando la tabla si no existe) y confirma los cambios al salir."""
+    with _lock_bd:
+        conexion = sqlite3.connect(FALLOS_BD)
+        conexion.row_factory = sqlite3.Row
+        try:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS fallos ("
+                " url TEXT NOT NULL,"
+                " calidad TEXT NOT NULL DEFAULT '',"
+                " clase TEXT NOT NULL,"
+                " mensaje TEXT NOT NULL,"
+                " intentos INTEGER NOT NULL,"
+                " primer_fallo REAL NOT NULL,"
+                " ultimo_fallo REAL NOT NULL,"
+                " PRIMARY KEY (url, calidad))")
+            conexion.execute("CREATE INDEX IF NOT EXISTS fallos_clase ON fallos (clase, ultimo_fallo)")
+            yield conexion
+            conexion.commit()
+        finally:
+            conexion.close()
+
+def registrar_fallo(url: str, calidad: str, mensaje: str, intentos: int = 1) -> str:
+    """
+    Registra el fallo de una descarga, acumulando los intentos si ya había fallado.
+
+    Args:
+        url: URL del video
+        calidad: ID del formato pedido
+        mensaje: Mensaje del error
+        intentos: Intentos hechos en esta ejecución
+
+    Returns:
+        Clase del fallo
+    """
+    clase = clasificar_fallo(mensaje)
+    ahora = time.time()
+    try:
+        with _conectar() as conexion:
+            conexion.execute(
+                "INSERT INTO fallos (url, calidad, clase, mensaje, intentos, primer_fallo, ultimo_fallo)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (url, calidad) DO UPDATE SET"
+                " clase = excluded.clase, mensaje = excluded.mensaje,"
+                " intentos = intentos + excluded.intentos, ultimo_fallo = excluded.ultimo_fallo",
+                (url, calidad or '', clase, mensaje, max(1, intentos), ahora, ahora))
+    except sqlite3.Error as e:
+        print(f"Error al registrar el fallo de {url}: {str(e)}")
+    return clase
+
+def quitar_fallo(url: str, calidad: Optional[str] = None) -> None:
+    """
+    Borra los fallos de una URL (por ejemplo, al completarse su descarga).
+
+    Args:
+        url: URL del video
+        calidad: ID del formato, o None para todas las calidades
+    """
+    try:
+        with _conectar() as conexion:
+            if calidad is None:
+                conexion.execute("DELETE FROM fallos WHERE url = ?", (url,))
+            else:
+                conexion.execute("DELETE FROM fallos WHERE url = ? AND calidad = ?", (url, calidad))
+    except sqlite3.Error as e:
+        print(f"Error al quitar el fallo de {url}: {str(e)}")
+
+def listar_fallos(clase: Optional[str] = None) -> List[Dict]:
+    """
+    Devuelve los fallos registrados, del más reciente al más antiguo.
+
+    Args:
+        clase: Clase de fallo por la que filtrar, o None para todas
+
+    Returns:
+        Lista de diccionarios con 'url', 'calidad', 'clase', 'mensaje',
+        'intentos', 'primer_fallo' y 'ultimo_fallo'
+    """
+    try:
+        with _conectar() as conexion:
+            if clase:
+                filas = conexion.execute(
+                    "SELECT * FROM fallos WHERE clase = ? ORDER BY ultimo_fallo DESC", (clase,))
+            else:
+                filas = conexion.execute("SELECT * FROM fallos ORDER BY ultimo_fallo DESC")
+            return [dict(fila) for fila in filas]
+    except sqlite3.Error as e:
+        print(f"Error al leer los fallos: {str(e)}")
+        return []
+
+def contar_fallos() -> Dict[str, int]:
+    """
+    Cuenta los fallos registrados de cada clase.
+
+    Returns:
+        Diccionario clase -> número de fallos
+    """
+    try:
+        with _conectar() as conexion:
+            filas = conexion.execute("SELECT clase, COUNT(*) FROM fallos GROUP BY clase")
+            return {clase: total for clase, total in filas}
+    except sqlite3.Error as e:
+        print(f"Error al contar los fallos: {str(e)}")
+        return {}
@@ -7,6 +7,7 @@ import os
 import time
 from typing import List, Dict, Any, Tuple, Optional
 
+from utils.archivo_descargas import clave_archivo, registrar_descarga, quitar_descarga
 from utils.config import HISTORIAL_ARCHIVO
 
 def guardar_historial(videos_descargados: List[Dict[str, Any]]) -> None:
@@ -75,13 +76,16 @@ def formatear_tamano(tamano_bytes: int) -> str:
     else:
         return f"{tamano_bytes/(1024*1024*1024):.1f} GB"
 
-def agregar_video_historial(nombre_video: str, ruta_guardado: str) -> float:
+def agregar_video_historial(nombre_video: str, ruta_guardado: str,
+                            extractor: str = "", id_video: str = "") -> float:
     """
-    Agrega un nuevo video al historial de descargas.
+    Agrega un nuevo video al historial de descargas y al índice de descargados.
     
     Args:
         nombre_video: Nombre del video
         ruta_guardado: Ruta donde se guardó el archivo
+        extractor: Extractor de yt-dlp que obtuvo el video
+        id_video: ID del video en ese extractor
         
     Returns:
         El timestamp de la fecha de descarga que se ha agregado
@@ -93,17 +97,25 @@ def agregar_video_historial(nombre_video: str, ruta_guardado: str) -> float:
     tamano_bytes = os.path.getsize(ruta_guardado)
     tamano_formateado = formatear_tamano(tamano_bytes)
     
+    # Una descarga repetida sobrescribe el mismo archivo: no duplicar su entrada
+    historial = [video for video in historial if video.get("ruta") != ruta_guardado]
+    
     # Añadir al inicio para que aparezca primero en la lista
     historial.insert(0, {
         "nombre": nombre_video,
         "ruta": ruta_guardado,
         "fecha": timestamp,
         "tamano_bytes": tamano_bytes,
-        "tamano": tamano_formateado
+        "tamano": tamano_formateado,
+        "extractor": extractor,
+        "id_video": id_video
     })
     
     guardar_historial(historial)
     
+    if extractor and id_video:
+        registrar_descarga(clave_archivo(extractor, id_video))
+    
     # Devolver el timestamp para que pueda ser utilizado
     return timestamp
 
@@ -131,9 +143,16 @@ def eliminar_video_historial(ruta_archivo: str, eliminar_archivo: bool = False)
         return False, "El video no se encontró en el historial"
     
     # Eliminar del historial
-    historial.pop(indice_a_eliminar)
+    video = historial.pop(indice_a_eliminar)
     guardar_historial(historial)
     
+    # Mantener sincronizado el índice de descargados (salvo que otra entrada sea el mismo video)
+    if video.get("extractor") and video.get("id_video"):
+        clave = clave_archivo(video["extractor"], video["id_video"])
+        if not any(clave_archivo(v.get("extractor") or "", v.get("id_video") or "") == clave
+                   for v in historial):
+            quitar_descarga(clave)
+    
     mensaje = "Video eliminado del historial"
     
     # Si se solicitó, eliminar también el archivo físico
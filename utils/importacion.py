@@ -0,0 +1,112 @@
+"""
+Importación masiva de URLs desde un texto pegado o un archivo .txt/.csv.
+
+El texto se recorre línea a línea (un archivo no se carga entero en
+memoria) buscando URLs en cualquier posición, así que sirve tanto una URL
+por línea como un CSV con la URL en alguna columna. Cada URL se reduce a su
+clave "extractor id", de modo que youtu.be/X, watch?v=X&t=10 y shorts/X
+cuentan como el mismo video; los repetidos dentro de la importación y los
+que ya están en el índice de descargados se descartan, y el resto se
+entrega en lotes.
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.archivo_descargas import esta_descargado
+from utils.config import TAMANO_LOTE_IMPORTACION
+from utils.urls import clave_canonica
+
+# URL http(s) dentro de un texto (termina en espacio, separador de CSV o comillas)
+_PATRON_URL_EN_TEXTO = re.compile(r'https?://[^\s,;"\'<>]+', re.IGNORECASE)
+
+# Signos que suelen quedar pegados al final de una URL copiada de un texto
+_SIGNOS_FINALES = '.),]'
+
+def lineas_de_archivo(ruta: str) -> Iterator[str]:
+    """
+    Lee un archivo de texto línea a línea.
+
+    Args:
+        ruta: Ruta del archivo .txt o .csv
+
+    Yields:
+        Cada línea del archivo
+    """
+    with open(ruta, 'r', encoding='utf-8-sig', errors='replace') as f:
+        yield from f
+
+def urls_en_lineas(lineas: Iterable[str]) -> Iterator[str]:
+    """
+    Busca las URLs que aparecen en unas líneas de texto.
+
+    Args:
+        lineas: Líneas de texto (se consumen de una en una)
+
+    Yields:
+        Cada URL encontrada, en orden
+    """
+    for linea in lineas:
+        for coincidencia in _PATRON_URL_EN_TEXTO.finditer(linea):
+            yield coincidencia.group(0).rstrip(_SIGNOS_FINALES)
+
+def canonizar_url(url: str) -> Tuple[str, str]:
+    """
+    Reduce una URL a su forma canónica y a su clave canónica.
+
+    Args:
+        url: URL del video
+
+    Returns:
+        Tupla (URL canónica, clave "extractor id" o la URL si no se puede deducir)
+    """
+    clave = clave_canonica(url)
+    extractor, _, id_video = clave.partition(' ')
+    if extractor == 'youtube':
+        url = f"https://www.youtube.com/watch?v={id_video}"
+    return url, clave
+
+def importar_urls(lineas: Iterable[str], resumen: Optional[Dict[str, int]] = None,
+                  tamano_lote: int = TAMANO_LOTE_IMPORTACION) -> Iterator[List[str]]:
+    """
+    Extrae de unas líneas de texto las URLs que hay que descargar.
+
+    Args:
+        lineas: Líneas de texto (se consumen de una en una)
+        resumen: Diccionario donde contar las URLs 'encontradas', 'repetidas',
+                 'descargadas' (ya en el índice) y 'nuevas'
+        tamano_lote: Número de URLs de cada lote
+
+    Yields:
+        Lotes de URLs canónicas sin repetir, en el orden en que aparecen
+    """
+    if resumen is None:
+        resumen = {}
+    for clave in ('encontradas', 'repetidas', 'descargadas', 'nuevas'):
+        resumen.setdefault(clave, 0)
+
+    vistas = set()
+    urls_vistas = set()
+    lote = []
+    for url in urls_en_lineas(lineas):
+        resumen['encontradas'] += 1
+        # Una URL idéntica a otra ya vista no necesita identificarse de nuevo
+        if url in urls_vistas:
+            resumen['repetidas'] += 1
+            continue
+        urls_vistas.add(url)
+        url, clave = canonizar_url(url)
+        if clave in vistas:
+            resumen['repetidas'] += 1
+            continue
+        vistas.add(clave)
+        if esta_descargado(clave):
+            resumen['descargadas'] += 1
+            continue
+        resumen['nuevas'] += 1
+        lote.append(url)
+        if len(lote) >= tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
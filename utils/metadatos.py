@@ -0,0 +1,539 @@
+"""
+Obtención y caché de la información (metadatos) de los videos.
+
+La extracción con yt-dlp (mucho código Python puro y, en algunos sitios,
+resolución de firmas en JS) se ejecuta en un grupo de procesos aparte, para
+que no compita por el GIL con la interfaz de Tkinter. Los procesos devuelven
+un diccionario recortado y serializable.
+
+La información obtenida se guarda en memoria durante DURACION_CACHE_METADATOS
+segundos, de modo que el diálogo de calidad y la descarga reutilicen la
+consulta hecha al pegar la URL. Si se pide la información de un video
+mientras ya se está extrayendo (por ejemplo, la precarga y la descarga a la
+vez), la segunda petición espera a la primera en lugar de repetirla.
+"""
+
+import functools
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import (
+    CancelledError, Future, ProcessPoolExecutor, TimeoutError as FuturesTimeoutError, wait
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from utils.cache_extractores import tomar_contadores, sumar_contadores, resumen_cache, podar_cache
+from utils.config import (
+    DURACION_CACHE_METADATOS, PROCESOS_EXTRACCION, TIEMPO_MAXIMO_EXTRACCION, leer_configuracion
+)
+from utils.sesiones import sesion_youtube_dl
+from utils.urls import clave_canonica
+
+# Claves pesadas de la información que no se usan para elegir formato ni descargar
+_CLAVES_DESCARTADAS = (
+    'automatic_captions',
+    'subtitles',
+    'thumbnails',
+    'heatmap',
+    'comments',
+    'description',
+    'tags',
+    'categories',
+)
+
+# Grupo de procesos para la extracción (se crea al primer uso)
+_pool_extraccion: Optional[ProcessPoolExecutor] = None
+_lock_pool = threading.Lock()
+
+# Extracciones sin terminar de cada grupo, para retirarlo sin interrumpirlas
+_futuros_por_pool: Dict[ProcessPoolExecutor, Set[Future]] = {}
+
+# Cola de cada grupo por la que sus procesos avisan de la tarea que empiezan, y
+# tareas enviadas -> (futuro, momento en que empezó o None si espera turno):
+# el tiempo máximo no cuenta la espera de turno
+_colas_inicio: Dict[ProcessPoolExecutor, "multiprocessing.Queue"] = {}
+_inicios_tarea: Dict[int, Tuple[Future, Optional[float]]] = {}
+_numeros_tarea = itertools.count()
+
+# En cada proceso del grupo: cola por la que avisar del inicio de una tarea
+_cola_inicio_proceso = None
+
+# Caché de información por video: clave canónica -> (momento de obtención, info)
+_cache_info: Dict[str, Tuple[float, dict]] = {}
+_lock_cache = threading.Lock()
+
+# Extracciones en curso por clave canónica, para que las peticiones repetidas se unan:
+# (futuro que esperan las peticiones unidas, número de tarea de la extracción)
+_extracciones_en_curso: Dict[str, Tuple[Future, int]] = {}
+
+# Estado de la precarga en segundo plano (solo se atiende la última URL pedida)
+_condicion_precarga = threading.Condition()
+_url_precarga_pendiente: Optional[str] = None
+_generacion_precarga = 0  # Aumenta con cada URL pedida o descartada; invalida la precarga en curso
+_url_precargando: Optional[str] = None  # URL cuya precarga está en curso
+_hilo_precarga: Optional[threading.Thread] = None
+
+def obtener_info_en_cache(url: str) -> Optional[dict]:
+    """
+    Devuelve la información de un video si está en caché y no ha caducado.
+    
+    Args:
+        url: URL del video
+        
+    Returns:
+        Diccionario de información de yt-dlp o None si no está disponible
+    """
+    clave = clave_canonica(url)
+    with _lock_cache:
+        entrada = _cache_info.get(clave)
+        if entrada is None:
+            return None
+        momento, info = entrada
+        if time.time() - momento > DURACION_CACHE_METADATOS:
+            del _cache_info[clave]
+            return None
+        return info
+
+def guardar_info_en_cache(url: str, info: dict) -> None:
+    """
+    Guarda la información de un video en la caché.
+    
+    Args:
+        url: URL del video
+        info: Diccionario de información de yt-dlp
+    """
+    with _lock_cache:
+        _cache_info[clave_canonica(url)] = (time.time(), info)
+
+def recortar_info(info: dict) -> dict:
+    """
+    Elimina de la información las claves pesadas que la aplicación no necesita.
+    
+    Args:
+        info: Diccionario de información de yt-dlp ya saneado
+        
+    Returns:
+        Diccionario con la información necesaria para elegir formato y descargar
+    """
+    return {clave: valor for clave, valor in info.items() if clave not in _CLAVES_DESCARTADAS}
+
+def _iniciar_proceso(cola_inicio) -> None:
+    """Guarda en un proceso nuevo del grupo la cola por la que avisa del inicio de cada tarea."""
+    global _cola_inicio_proceso
+    _cola_inicio_proceso = cola_inicio
+
+def extraer_info_en_proceso(url: str, opciones: dict,
+                            tarea: Optional[int] = None) -> Tuple[dict, Dict[str, Dict[str, int]]]:
+    """
+    Extrae la información de un video. Se ejecuta dentro de un proceso del grupo.
+    
+    Args:
+        url: URL del video
+        opciones: Opciones para yt_dlp.YoutubeDL
+        tarea: Número de la tarea, que se avisa al empezar para medir su tiempo máximo
+        
+    Returns:
+        Tupla (información recortada y serializable, contadores de la caché de yt-dlp)
+    """
+    if tarea is not None and _cola_inicio_proceso is not None:
+        _cola_inicio_proceso.put(tarea)
+    try:
+        # Las sesiones se conservan en cada proceso, con los extractores ya cargados
+        with sesion_youtube_dl(opciones) as ydl:
+            info = ydl.extract_info(url, download=False)
+            if not info:
+                raise Exception("No se pudo obtener información del video")
+            # Convertir a un diccionario simple que pueda enviarse entre procesos
+            return recortar_info(ydl.sanitize_info(info)), tomar_contadores()
+    except Exception as e:
+        # Las excepciones de yt-dlp no siempre se pueden enviar al proceso principal
+        raise Exception(str(e)) from None
+
+def _calentar_proceso() -> None:
+    """Crea una sesión en un proceso del grupo para tener los extractores cargados."""
+    with sesion_youtube_dl({'quiet': True, 'no_warnings': True}):
+        pass
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    """Devuelve el grupo de procesos de extracción, creándolo si no existe."""
+    global _pool_extraccion
+    
+    with _lock_pool:
+        if _pool_extraccion is None:
+            # 'spawn' evita copiar el estado de Tkinter y de los hilos con fork
+            contexto = multiprocessing.get_context('spawn')
+            cola_inicio = contexto.Queue()
+            _pool_extraccion = ProcessPoolExecutor(
+                max_workers=PROCESOS_EXTRACCION,
+                mp_context=contexto,
+                initializer=_iniciar_proceso,
+                initargs=(cola_inicio,)
+            )
+            _colas_inicio[_pool_extraccion] = cola_inicio
+        return _pool_extraccion
+
+def _momento_inicio(tarea: Optional[int]) -> Optional[float]:
+    """
+    Devuelve cuándo empezó un proceso del grupo una tarea.
+    
+    Args:
+        tarea: Número de la tarea
+        
+    Returns:
+        Momento (time.monotonic) en que empezó, o None si aún espera turno
+    """
+    with _lock_pool:
+        for cola in _colas_inicio.values():
+            while True:
+                try:
+                    iniciada = cola.get_nowait()
+                except queue.Empty:
+                    break
+                # Los avisos de tareas ya terminadas se descartan
+                if iniciada in _inicios_tarea:
+                    _inicios_tarea[iniciada] = (_inicios_tarea[iniciada][0], time.monotonic())
+        return _inicios_tarea.get(tarea, (None, None))[1]
+
+def _olvidar_tarea(tarea: int, futuro: Future) -> None:
+    """Olvida una tarea terminada (salvo que ya se haya vuelto a enviar con otro futuro)."""
+    with _lock_pool:
+        if _inicios_tarea.get(tarea, (None, None))[0] is futuro:
+            del _inicios_tarea[tarea]
+
+def _quitar_futuro(pool: ProcessPoolExecutor, futuro: Future) -> None:
+    """Olvida una extracción terminada de un grupo."""
+    with _lock_pool:
+        pendientes = _futuros_por_pool.get(pool)
+        if pendientes is not None:
+            pendientes.discard(futuro)
+
+def _reiniciar_pool(pool: ProcessPoolExecutor, atascado: Optional[Future] = None) -> None:
+    """
+    Descarta un grupo de procesos roto o bloqueado para que se cree uno nuevo.
+    
+    Las peticiones nuevas van enseguida a un grupo nuevo. Los procesos del
+    grupo descartado se terminan cuando acaban las demás extracciones que
+    tenía en curso (o se agota su tiempo), para no interrumpirlas por culpa
+    de la que se bloqueó.
+    
+    Args:
+        pool: Grupo que falló (si ya fue reemplazado no se hace nada)
+        atascado: Extracción bloqueada, que no se espera
+    """
+    global _pool_extraccion
+    
+    with _lock_pool:
+        if _pool_extraccion is not pool:
+            return
+        _pool_extraccion = None
+        otros = set(_futuros_por_pool.get(pool, ())) - {atascado}
+    
+    threading.Thread(target=_retirar_pool, args=(pool, otros), daemon=True).start()
+
+def _retirar_pool(pool: ProcessPoolExecutor, otros: Set[Future]) -> None:
+    """
+    Termina los procesos de un grupo descartado cuando acaban sus demás extracciones.
+    
+    Args:
+        pool: Grupo descartado
+        otros: Extracciones del grupo que hay que dejar terminar
+    """
+    if otros:
+        wait(otros, timeout=TIEMPO_MAXIMO_EXTRACCION)
+    
+    # Terminar los procesos que sigan bloqueados en una extracción
+    for proceso in list((getattr(pool, '_processes', None) or {}).values()):
+        try:
+            proceso.terminate()
+        except Exception:
+            pass
+    pool.shutdown(wait=False, cancel_futures=True)
+    with _lock_pool:
+        _futuros_por_pool.pop(pool, None)
+        _colas_inicio.pop(pool, None)
+
+def cerrar_pool_extraccion() -> None:
+    """Detiene el grupo de procesos de extracción (al cerrar la aplicación)."""
+    global _pool_extraccion
+    
+    with _lock_pool:
+        pool, _pool_extraccion = _pool_extraccion, None
+        _colas_inicio.pop(pool, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _esperar_resultado(futuro, cancelada: Optional[Callable[[], bool]] = None,
+                       compartido: bool = False, tarea: Optional[int] = None):
+    """
+    Espera el resultado de una extracción comprobando la cancelación.
+    
+    TIEMPO_MAXIMO_EXTRACCION se cuenta desde que un proceso empieza la
+    tarea, no desde que se pide: una consulta que espera turno detrás de
+    otras no se da por bloqueada (ni se retira el grupo por ella).
+    
+    Args:
+        futuro: Futuro de la extracción
+        cancelada: Función que indica si hay que dejar de esperar
+        compartido: Si es True, otras peticiones esperan el mismo futuro y no
+                    se cancela al abandonar la espera
+        tarea: Número de la tarea en el grupo de procesos (None para esperar
+               sin tiempo máximo)
+        
+    Returns:
+        Resultado del futuro
+        
+    Raises:
+        FuturesTimeoutError: Si se agota TIEMPO_MAXIMO_EXTRACCION
+        Exception: Si se cancela mientras espera
+    """
+    maximo = TIEMPO_MAXIMO_EXTRACCION
+    while True:
+        try:
+            return futuro.result(timeout=0.2)
+        except FuturesTimeoutError:
+            if cancelada is not None and cancelada():
+                # Si la consulta aún no empezó se anula; si ya está en un proceso,
+                # termina por su cuenta y su resultado se guarda en la caché
+                if not compartido:
+                    futuro.cancel()
+                raise Exception("Descarga cancelada por el usuario")
+            inicio = _momento_inicio(tarea) if tarea is not None else None
+            if inicio is not None and time.monotonic() - inicio >= maximo:
+                raise
+
+def obtener_info_video(url: str, usar_cache: bool = True,
+                       cancelada: Optional[Callable[[], bool]] = None) -> dict:
+    """
+    Obtiene la información de un video, usando la caché si es posible.
+    
+    Args:
+        url: URL del video
+        usar_cache: Si es False se fuerza una nueva consulta
+        cancelada: Función que indica si hay que abandonar la espera
+        
+    Returns:
+        Diccionario de información de yt-dlp (sin descargar el video)
+        
+    Raises:
+        Exception: Si yt-dlp no puede obtener la información o se agota el tiempo
+    """
+    if usar_cache:
+        info = obtener_info_en_cache(url)
+        if info is not None:
+            print(f"Información en caché para: {url}")
+            return info
+    
+    # Unirse a la extracción del mismo video si ya hay una en curso
+    clave = clave_canonica(url)
+    while True:
+        with _lock_cache:
+            en_curso, tarea = _extracciones_en_curso.get(clave, (None, None))
+            if en_curso is None:
+                en_curso, tarea = Future(), next(_numeros_tarea)
+                _extracciones_en_curso[clave] = (en_curso, tarea)
+                break
+        print(f"Esperando la extracción en curso de: {url}")
+        try:
+            return _esperar_resultado(en_curso, cancelada, compartido=True, tarea=tarea)
+        except Exception as e:
+            # Si quien la pidió la canceló, repetirla (salvo que esta petición también se cancelara)
+            if "cancelada por el usuario" not in str(e).lower() or (cancelada and cancelada()):
+                raise
+    
+    abandonadas = []
+    try:
+        info = _extraer_info(url, cancelada, abandonadas.append, tarea)
+    except BaseException as e:
+        if abandonadas:
+            # El proceso sigue con la consulta: su resultado llegará a la caché y
+            # a las peticiones que se unan mientras tanto (p. ej. la descarga)
+            abandonadas[0].add_done_callback(
+                functools.partial(_terminar_extraccion_abandonada, url, clave, en_curso))
+        else:
+            with _lock_cache:
+                _extracciones_en_curso.pop(clave, None)
+            en_curso.set_exception(e)
+        raise
+    
+    guardar_info_en_cache(url, info)
+    with _lock_cache:
+        _extracciones_en_curso.pop(clave, None)
+    en_curso.set_result(info)
+    return info
+
+def _terminar_extraccion_abandonada(url: str, clave: str, en_curso: Future, futuro: Future) -> None:
+    """
+    Recoge el resultado de una extracción cuya espera se abandonó.
+    
+    Args:
+        url: URL del video
+        clave: Clave canónica del video
+        en_curso: Futuro que esperan las peticiones unidas
+        futuro: Futuro de la extracción en el grupo de procesos
+    """
+    try:
+        if futuro.cancelled():
+            raise Exception("Descarga cancelada por el usuario")
+        info, contadores = futuro.result()
+    except BaseException as e:
+        with _lock_cache:
+            _extracciones_en_curso.pop(clave, None)
+        en_curso.set_exception(e)
+        return
+    sumar_contadores(contadores)
+    guardar_info_en_cache(url, info)
+    with _lock_cache:
+        _extracciones_en_curso.pop(clave, None)
+    en_curso.set_result(info)
+    print(f"Información de una consulta abandonada guardada en caché: {url}")
+
+def _extraer_info(url: str, cancelada: Optional[Callable[[], bool]] = None,
+                  al_abandonar: Optional[Callable[[Future], None]] = None,
+                  tarea: Optional[int] = None) -> dict:
+    """
+    Extrae la información de un video en el grupo de procesos.
+    
+    Args:
+        url: URL del video
+        cancelada: Función que indica si hay que abandonar la espera
+        al_abandonar: Función que recibe el futuro de la extracción si se deja
+                      de esperar mientras un proceso aún la está haciendo
+        tarea: Número de la tarea (las peticiones unidas miden con él su espera)
+        
+    Returns:
+        Diccionario de información de yt-dlp recortado
+    """
+    opciones = {
+        'quiet': True,
+        'no_warnings': True,
+    }
+    
+    if tarea is None:
+        tarea = next(_numeros_tarea)
+    
+    # Si un proceso muere (fallo de yt-dlp o del intérprete) se reintenta una vez
+    for intento in range(2):
+        pool = _obtener_pool()
+        futuro = None
+        try:
+            # Anotar la tarea antes de que nadie pueda leer el aviso de su inicio
+            with _lock_pool:
+                futuro = pool.submit(extraer_info_en_proceso, url, opciones, tarea)
+                _futuros_por_pool.setdefault(pool, set()).add(futuro)
+                _inicios_tarea[tarea] = (futuro, None)
+            futuro.add_done_callback(functools.partial(_quitar_futuro, pool))
+            futuro.add_done_callback(functools.partial(_olvidar_tarea, tarea))
+            info, contadores = _esperar_resultado(futuro, cancelada, tarea=tarea)
+            sumar_contadores(contadores)
+            print(f"Caché de yt-dlp: {resumen_cache()}")
+            break
+        except FuturesTimeoutError:
+            _reiniciar_pool(pool, futuro)
+            raise Exception(f"Se agotó el tiempo ({TIEMPO_MAXIMO_EXTRACCION} s) al obtener la información del video")
+        except BrokenProcessPool:
+            print("El proceso de extracción terminó inesperadamente, se reinicia el grupo")
+            _reiniciar_pool(pool)
+            if intento == 1:
+                raise Exception("El proceso de extracción terminó inesperadamente")
+        except CancelledError:
+            # Esperaba turno en un grupo que se retiró sin llegar a empezar: repetirla en el nuevo
+            print("La extracción no llegó a empezar en el grupo retirado, se repite")
+            if intento == 1:
+                raise Exception("La extracción se anuló antes de empezar")
+        except Exception:
+            # Espera abandonada (cancelación) con la consulta ya en marcha en un proceso
+            if futuro is not None and not futuro.done() and al_abandonar:
+                al_abandonar(futuro)
+            raise
+    
+    return info
+
+def calentar_extraccion() -> None:
+    """
+    Prepara la extracción al iniciar la aplicación (pensada para un hilo aparte).
+    
+    Poda la caché de yt-dlp, arranca los procesos del grupo con los
+    extractores cargados y, si la configuración define 'url_calentamiento',
+    consulta esa URL para dejar en caché el reproductor y las firmas actuales.
+    """
+    try:
+        podar_cache()
+        
+        pool = _obtener_pool()
+        for futuro in [pool.submit(_calentar_proceso) for _ in range(PROCESOS_EXTRACCION)]:
+            futuro.result(timeout=TIEMPO_MAXIMO_EXTRACCION)
+        
+        url = leer_configuracion().get('url_calentamiento')
+        if url:
+            obtener_info_video(url, usar_cache=False)
+        print("Extracción preparada")
+    except Exception as e:
+        print(f"Error al preparar la extracción: {str(e)}")
+
+def programar_precarga(url: str) -> None:
+    """
+    Pide obtener en segundo plano la información de una URL.
+    
+    Si ya había una URL pendiente de precargar, se reemplaza por la nueva, y
+    si se estaba precargando otra se deja de esperar por ella.
+    
+    Args:
+        url: URL del video a precargar
+    """
+    global _url_precarga_pendiente, _hilo_precarga, _generacion_precarga
+    
+    with _condicion_precarga:
+        _url_precarga_pendiente = url
+        _generacion_precarga += 1
+        if _hilo_precarga is None:
+            _hilo_precarga = threading.Thread(target=_bucle_precarga, daemon=True)
+            _hilo_precarga.start()
+        _condicion_precarga.notify()
+
+def cancelar_precarga(excepto: Optional[str] = None) -> None:
+    """
+    Descarta la precarga pendiente o en curso (por ejemplo, si el texto cambió).
+    
+    Args:
+        excepto: URL que se acaba de enviar a descargar; si es la que se está
+                 precargando, la precarga sigue y la descarga se une a ella
+    """
+    global _url_precarga_pendiente, _generacion_precarga
+    
+    with _condicion_precarga:
+        _url_precarga_pendiente = None
+        if excepto and _url_precargando and clave_canonica(excepto) == clave_canonica(_url_precargando):
+            return
+        _generacion_precarga += 1
+
+def _bucle_precarga() -> None:
+    """Atiende las precargas pendientes una a una en un hilo propio."""
+    global _url_precarga_pendiente, _url_precargando
+    
+    while True:
+        with _condicion_precarga:
+            _url_precargando = None
+            while _url_precarga_pendiente is None:
+                _condicion_precarga.wait()
+            url = _url_precargando = _url_precarga_pendiente
+            _url_precarga_pendiente = None
+            generacion = _generacion_precarga
+        
+        if obtener_info_en_cache(url) is not None:
+            continue
+        
+        def obsoleta(generacion=generacion) -> bool:
+            # El texto cambió: abandonar la espera para atender la URL nueva
+            return _generacion_precarga != generacion
+        
+        try:
+            print(f"Precargando información de: {url}")
+            obtener_info_video(url, cancelada=obsoleta)
+        except Exception as e:
+            if obsoleta():
+                print(f"Precarga descartada (el texto cambió): {url}")
+            else:
+                print(f"Error al precargar información: {str(e)}")
@@ -0,0 +1,119 @@
+"""
+Etapas del proceso de descarga y su ocupación.
+
+Cada descarga pasa por la etapa de descarga (transferencia de bytes) y la de
+posprocesamiento (unión, remux, metadatos y renombrado). Cada etapa tiene su
+propio número de plazas, de modo que una descarga libera su plaza de red en
+cuanto terminan de llegar los bytes.
+"""
+
+import contextlib
+import threading
+from typing import Callable, List, Optional
+
+from utils.config import MAX_DESCARGAS_SIMULTANEAS, PROCESOS_POSTPROCESO
+
+class EtapaPipeline:
+    """
+    Etapa con un número limitado de plazas.
+
+    Attributes:
+        nombre: Nombre visible de la etapa
+        capacidad: Número de trabajos que pueden estar activos a la vez
+        activos: Trabajos ocupando una plaza
+        en_espera: Trabajos esperando una plaza
+        en_espera_prioritarios: Trabajos en primer plano esperando una plaza
+    """
+
+    def __init__(self, nombre: str, capacidad: int):
+        """
+        Inicializa la etapa.
+
+        Args:
+            nombre: Nombre visible de la etapa
+            capacidad: Número de plazas
+        """
+        self.nombre = nombre
+        self.capacidad = capacidad
+        self.activos = 0
+        self.en_espera = 0
+        self.en_espera_prioritarios = 0
+        self._condicion = threading.Condition()
+
+    @contextlib.contextmanager
+    def ocupar(self, cancelada: Optional[Callable[[], bool]] = None, segundo_plano: bool = False):
+        """
+        Ocupa una plaza de la etapa durante el bloque 'with', esperando si no hay libres.
+        
+        Un trabajo en segundo plano solo toma una plaza libre si no hay
+        trabajos en primer plano esperando.
+        
+        Args:
+            cancelada: Función que indica si hay que dejar de esperar
+            segundo_plano: Si es True, cede el paso a los trabajos en primer plano
+        """
+        with self._condicion:
+            self.en_espera += 1
+            if not segundo_plano:
+                self.en_espera_prioritarios += 1
+            try:
+                while (self.activos >= self.capacidad
+                       or (segundo_plano and self.en_espera_prioritarios)):
+                    if cancelada and cancelada():
+                        raise Exception("Descarga cancelada por el usuario")
+                    self._condicion.wait(timeout=0.2 if cancelada else None)
+            finally:
+                self.en_espera -= 1
+                if not segundo_plano:
+                    self.en_espera_prioritarios -= 1
+            self.activos += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self.activos -= 1
+                # Despertar a todos: el primero en la cola puede estar en segundo plano
+                self._condicion.notify_all()
+
+    def ocupacion(self) -> dict:
+        """
+        Devuelve la ocupación actual de la etapa.
+
+        Returns:
+            Diccionario con 'nombre', 'activos', 'en_espera' y 'capacidad'
+        """
+        with self._condicion:
+            return {
+                'nombre': self.nombre,
+                'activos': self.activos,
+                'en_espera': self.en_espera,
+                'capacidad': self.capacidad,
+            }
+
+# Etapas compartidas por todas las descargas
+etapa_descarga = EtapaPipeline("Descarga", MAX_DESCARGAS_SIMULTANEAS)
+etapa_postproceso = EtapaPipeline("Posproceso", PROCESOS_POSTPROCESO)
+
+def ocupacion_pipeline() -> List[dict]:
+    """
+    Devuelve la ocupación de todas las etapas, en orden.
+
+    Returns:
+        Lista con la ocupación de cada etapa
+    """
+    return [etapa_descarga.ocupacion(), etapa_postproceso.ocupacion()]
+
+def resumen_ocupacion() -> str:
+    """
+    Resume la ocupación de las etapas en una línea legible.
+
+    Returns:
+        Texto como "Descarga 2/3 (1 en espera) · Posproceso 0/2"
+    """
+    partes = []
+    for etapa in ocupacion_pipeline():
+        texto = f"{etapa['nombre']} {etapa['activos']}/{etapa['capacidad']}"
+        if etapa['en_espera']:
+            texto += f" ({etapa['en_espera']} en espera)"
+        partes.append(texto)
+    return " · ".join(partes)
@@ -0,0 +1,102 @@
+"""
+Planificación de un lote de descargas antes de empezarlo.
+
+Para cada URL se obtiene la información del video (de la caché de
+metadatos si ya se consultó, y en paralelo si no), se aplica la calidad
+elegida o las reglas de formato y se estima el tamaño. Con la velocidad
+medida para cada host se proyecta la duración, y con el espacio libre se
+comprueba si el lote cabe en el disco.
+"""
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from utils.ancho_banda import estimador_ancho_banda
+from utils.config import (
+    HILOS_PLANIFICACION, MAX_DESCARGAS_SIMULTANEAS, MARGEN_ESPACIO_DISCO, ESPACIO_MINIMO_LIBRE_MB,
+    obtener_directorio_descargas
+)
+from utils.metadatos import obtener_info_video
+from utils.seleccion_formato import resolver_formato, estimar_tamano_descarga
+from utils.urls import host_de_url
+
+def planificar_elemento(url: str, calidad: str) -> Dict:
+    """
+    Estima el tamaño y la duración de la descarga de un video.
+
+    Args:
+        url: URL del video
+        calidad: ID del formato, CALIDAD_REGLAS, CALIDAD_ADAPTATIVA o vacío
+
+    Returns:
+        Diccionario con 'url', 'titulo', 'host', 'formato', 'bytes' y
+        'segundos' (None si no se pudieron estimar) y 'error'
+    """
+    elemento = {'url': url, 'titulo': '', 'host': host_de_url(url), 'formato': '',
+                'bytes': None, 'segundos': None, 'error': ''}
+    try:
+        info = obtener_info_video(url)
+    except Exception as e:
+        elemento['error'] = str(e)
+        return elemento
+
+    elemento['titulo'] = info.get('title') or ''
+    try:
+        elemento['formato'] = resolver_formato(calidad, info)
+    except Exception as e:
+        elemento['error'] = str(e)
+        return elemento
+    elemento['bytes'] = estimar_tamano_descarga(info, elemento['formato'])
+
+    velocidad = estimador_ancho_banda.obtener(elemento['host'])
+    if elemento['bytes'] and velocidad:
+        elemento['segundos'] = elemento['bytes'] / velocidad
+    return elemento
+
+def planificar_lote(urls: List[str], calidad: str,
+                    progreso_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Estima los bytes, la duración y el espacio en disco de un lote de descargas.
+
+    La duración total supone que cada descarga va a la velocidad medida para
+    su host y que se ejecutan MAX_DESCARGAS_SIMULTANEAS a la vez.
+
+    Args:
+        urls: URLs del lote
+        calidad: Calidad que se aplicará a todas
+        progreso_callback: Función a la que notificar (planificados, total)
+
+    Returns:
+        Diccionario con 'elementos' (ver planificar_elemento), 'bytes' (suma
+        de los estimados), 'sin_estimar', 'sin_velocidad' (sin mediciones
+        para su host), 'errores', 'segundos', 'libre', 'necesario' y 'cabe'
+    """
+    elementos: List[Dict] = []
+    with ThreadPoolExecutor(max_workers=HILOS_PLANIFICACION) as pool:
+        for elemento in pool.map(lambda url: planificar_elemento(url, calidad), urls):
+            elementos.append(elemento)
+            if progreso_callback:
+                progreso_callback(len(elementos), len(urls))
+
+    total = sum(e['bytes'] for e in elementos if e['bytes'])
+    segundos = sum(e['segundos'] for e in elementos if e['segundos'])
+
+    # Los archivos terminados se quedan en la carpeta de descargas
+    directorio = obtener_directorio_descargas()
+    os.makedirs(directorio, exist_ok=True)
+    libre = shutil.disk_usage(directorio).free - ESPACIO_MINIMO_LIBRE_MB * 1024 * 1024
+    necesario = int(total * (1 + MARGEN_ESPACIO_DISCO))
+
+    return {
+        'elementos': elementos,
+        'bytes': total,
+        'sin_estimar': sum(1 for e in elementos if not e['error'] and not e['bytes']),
+        'sin_velocidad': sum(1 for e in elementos if e['bytes'] and not e['segundos']),
+        'errores': sum(1 for e in elementos if e['error']),
+        'segundos': segundos / max(1, min(MAX_DESCARGAS_SIMULTANEAS, len(elementos))),
+        'libre': max(0, libre),
+        'necesario': necesario,
+        'cabe': necesario <= libre,
+    }
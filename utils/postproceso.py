@@ -0,0 +1,240 @@
+"""
+Posprocesamiento de las descargas en un grupo de procesos propio.
+
+La unión de video y audio, el remux (o la extracción del audio), la
+incrustación de metadatos y el renombrado final se ejecutan en procesos de baja prioridad (CPU y E/S),
+fuera de los hilos de descarga.
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+from utils.archivos import mover_archivo_final
+from utils.config import PROCESOS_POSTPROCESO
+
+# Grupo de procesos de posprocesamiento (se crea al primer uso)
+_pool_postproceso: Optional[ProcessPoolExecutor] = None
+_lock_pool = threading.Lock()
+
+# Valor de 'audio' que extrae la pista de audio sin recodificarla
+AUDIO_COPIA = 'copiar'
+
+# Argumentos de ffmpeg para cada tratamiento de la pista de audio
+_CODIFICACION_AUDIO = {
+    AUDIO_COPIA: ['-c:a', 'copy'],
+    'mp3': ['-c:a', 'libmp3lame', '-q:a', '2'],
+}
+
+# Segundos entre comprobaciones de la cancelación mientras se espera a ffmpeg
+_INTERVALO_CANCELACION = 0.2
+
+def _bajar_prioridad() -> None:
+    """Reduce la prioridad de CPU del proceso (la heredan los ffmpeg que lance)."""
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+def _comando_baja_prioridad(comando: List[str]) -> List[str]:
+    """
+    Antepone 'ionice' al comando para bajar la prioridad de E/S si está disponible.
+
+    Args:
+        comando: Comando a ejecutar
+
+    Returns:
+        Comando, precedido de 'ionice -c 3' en sistemas que lo tienen
+    """
+    if sys.platform.startswith('linux') and shutil.which('ionice'):
+        return ['ionice', '-c', '3'] + comando
+    return comando
+
+def _ejecutar_ffmpeg(argumentos: List[str], ruta_cancelacion: Optional[str] = None) -> None:
+    """
+    Ejecuta ffmpeg con baja prioridad.
+
+    Args:
+        argumentos: Argumentos para ffmpeg (sin el ejecutable)
+        ruta_cancelacion: Archivo cuya aparición indica que hay que detener ffmpeg
+
+    Raises:
+        Exception: Si ffmpeg no está instalado, termina con error o se cancela
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        raise Exception("Se necesita ffmpeg para unir el video y el audio o convertir el audio")
+
+    opciones = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.PIPE}
+    if sys.platform == 'win32':
+        opciones['creationflags'] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+
+    comando = _comando_baja_prioridad([ffmpeg, '-y', '-loglevel', 'error', '-nostdin'] + argumentos)
+    proceso = subprocess.Popen(comando, **opciones)
+    try:
+        while True:
+            try:
+                _, error = proceso.communicate(timeout=_INTERVALO_CANCELACION)
+                break
+            except subprocess.TimeoutExpired:
+                if ruta_cancelacion and os.path.exists(ruta_cancelacion):
+                    raise Exception("Descarga cancelada por el usuario")
+    except BaseException:
+        # Cancelación o error: no dejar ffmpeg ejecutándose
+        proceso.kill()
+        proceso.wait()
+        raise
+
+    if proceso.returncode != 0:
+        error = error.decode('utf-8', errors='replace').strip()
+        raise Exception(f"ffmpeg terminó con error: {error[-500:]}")
+
+def postprocesar_en_proceso(partes: List[str], ruta_temporal: str, ruta_final: str,
+                            titulo: str = "", ruta_cancelacion: Optional[str] = None,
+                            audio: Optional[str] = None, concatenar: bool = False) -> str:
+    """
+    Une o renombra las partes descargadas. Se ejecuta dentro de un proceso del grupo.
+
+    Con una sola parte basta con renombrarla. Con varias (video y audio) se
+    unen con ffmpeg copiando los flujos, sin recodificar, y se incrusta el
+    título en los metadatos. En las descargas de solo audio se extrae la
+    pista de audio al contenedor de ruta_final, copiándola o recodificándola.
+    Los tramos de un recorte (cada uno ya con video y audio) se concatenan.
+
+    Args:
+        partes: Archivos descargados (video primero)
+        ruta_temporal: Ruta del archivo unido antes de moverlo a su sitio
+        ruta_final: Ruta definitiva del archivo
+        titulo: Título del video para los metadatos
+        ruta_cancelacion: Archivo cuya aparición indica que hay que detener ffmpeg
+        audio: None para video, AUDIO_COPIA o el códec al que recodificar ('mp3')
+        concatenar: Si es True, las partes son tramos que se ponen uno tras otro
+
+    Returns:
+        Ruta definitiva del archivo
+    """
+    lista_tramos = ruta_temporal + ".tramos.txt"
+    try:
+        if len(partes) == 1 and not audio:
+            origen = partes[0]
+        elif audio == AUDIO_COPIA and len(partes) == 1 and not shutil.which('ffmpeg'):
+            # Sin ffmpeg no se puede remuxar: se conserva el contenedor descargado
+            origen = partes[0]
+            ruta_final = os.path.splitext(ruta_final)[0] + os.path.splitext(origen)[1]
+        else:
+            origen = ruta_temporal
+            argumentos = []
+            if concatenar:
+                with open(lista_tramos, 'w', encoding='utf-8') as lista:
+                    for parte in partes:
+                        lista.write("file '{}'\n".format(os.path.abspath(parte).replace("'", "'\\''")))
+                argumentos += ['-f', 'concat', '-safe', '0', '-i', lista_tramos]
+                entradas = 1
+            else:
+                for parte in partes:
+                    argumentos += ['-i', parte]
+                entradas = len(partes)
+            if audio:
+                argumentos += ['-vn', '-map', '0:a:0'] + _CODIFICACION_AUDIO[audio]
+            else:
+                for i in range(entradas):
+                    argumentos += ['-map', f'{i}']
+                argumentos += ['-c', 'copy']
+            if titulo:
+                argumentos += ['-metadata', f'title={titulo}']
+            try:
+                _ejecutar_ffmpeg(argumentos + [origen], ruta_cancelacion)
+            except Exception:
+                if os.path.exists(origen):
+                    os.remove(origen)
+                raise
+
+            for parte in partes:
+                os.remove(parte)
+
+        # Colocar el archivo en la carpeta de descargas (reemplaza si ya existe)
+        return mover_archivo_final(origen, ruta_final)
+    except Exception as e:
+        # Enviar una excepción simple que siempre pueda pasar al proceso principal
+        raise Exception(str(e)) from None
+    finally:
+        if os.path.exists(lista_tramos):
+            os.remove(lista_tramos)
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    """Devuelve el grupo de procesos de posprocesamiento, creándolo si no existe."""
+    global _pool_postproceso
+
+    with _lock_pool:
+        if _pool_postproceso is None:
+            _pool_postproceso = ProcessPoolExecutor(
+                max_workers=PROCESOS_POSTPROCESO,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_bajar_prioridad
+            )
+        return _pool_postproceso
+
+def postprocesar(partes: List[str], ruta_temporal: str, ruta_final: str, titulo: str = "",
+                 cancelada: Optional[Callable[[], bool]] = None, audio: Optional[str] = None,
+                 concatenar: bool = False) -> str:
+    """
+    Envía el posprocesamiento de una descarga al grupo de procesos y espera el resultado.
+
+    Si la descarga se cancela mientras tanto, se crea un archivo de marca
+    junto al temporal para que el proceso detenga ffmpeg.
+
+    Args:
+        partes: Archivos descargados (video primero)
+        ruta_temporal: Ruta del archivo unido antes de moverlo a su sitio
+        ruta_final: Ruta definitiva del archivo
+        titulo: Título del video para los metadatos
+        cancelada: Función que indica si se canceló la descarga
+        audio: None para video, AUDIO_COPIA o el códec al que recodificar ('mp3')
+        concatenar: Si es True, las partes son tramos que se ponen uno tras otro
+
+    Returns:
+        Ruta definitiva del archivo
+
+    Raises:
+        Exception: Si falla la unión o el renombrado, o se cancela
+    """
+    global _pool_postproceso
+
+    ruta_cancelacion = ruta_temporal + ".cancelar"
+    pool = _obtener_pool()
+    try:
+        futuro = pool.submit(postprocesar_en_proceso, partes, ruta_temporal, ruta_final, titulo,
+                             ruta_cancelacion, audio, concatenar)
+        marcada = False
+        while True:
+            try:
+                return futuro.result(timeout=_INTERVALO_CANCELACION)
+            except FuturesTimeoutError:
+                if not marcada and cancelada and cancelada():
+                    open(ruta_cancelacion, 'w').close()
+                    marcada = True
+    except BrokenProcessPool:
+        # Un proceso murió: descartar el grupo para que se cree otro
+        with _lock_pool:
+            if _pool_postproceso is pool:
+                _pool_postproceso = None
+        raise Exception("El proceso de posprocesamiento terminó inesperadamente")
+    finally:
+        if os.path.exists(ruta_cancelacion):
+            os.remove(ruta_cancelacion)
+
+def cerrar_pool_postproceso() -> None:
+    """Detiene el grupo de procesos de posprocesamiento (al cerrar la aplicación)."""
+    global _pool_postproceso
+
+    with _lock_pool:
+        pool, _pool_postproceso = _pool_postproceso, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
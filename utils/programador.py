@@ -0,0 +1,223 @@
+"""
+Descargas programadas en franjas horarias.
+
+Una descarga programada puede tener:
+- solo hora de inicio ("a partir de las 22:00"): empieza la primera vez que
+  se alcanza esa hora y, una vez empezada, no se detiene;
+- inicio y fin ("solo entre 22:00 y 07:00"): se ejecuta únicamente dentro
+  de la franja, que se repite cada día y puede cruzar la medianoche; al
+  cerrarse la franja la descarga se pausa conservando el archivo parcial.
+
+Cada descarga puede llevar un límite de velocidad que se aplica mientras se
+ejecuta. La cola se guarda en disco para sobrevivir a un reinicio, y cada
+entrada usa un nombre fijo para sus archivos parciales, de modo que tras
+reiniciar la descarga continúa desde los bytes ya descargados.
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.config import DESCARGAS_PROGRAMADAS_ARCHIVO
+
+def normalizar_hora(texto: str) -> Optional[str]:
+    """
+    Valida una hora escrita como "H:MM" o "HH:MM".
+
+    Args:
+        texto: Hora escrita por el usuario
+
+    Returns:
+        Hora con la forma "HH:MM", o None si el texto está vacío
+
+    Raises:
+        ValueError: Si el texto no es una hora válida
+    """
+    texto = (texto or "").strip()
+    if not texto:
+        return None
+    horas, _, minutos = texto.partition(":")
+    horas, minutos = int(horas), int(minutos or 0)
+    if not (0 <= horas < 24 and 0 <= minutos < 60):
+        raise ValueError(f"Hora no válida: {texto}")
+    return f"{horas:02d}:{minutos:02d}"
+
+def _minutos_del_dia(hora: str) -> int:
+    """Convierte "HH:MM" en minutos desde la medianoche."""
+    horas, minutos = hora.split(":")
+    return int(horas) * 60 + int(minutos)
+
+def en_franja(inicio: str, fin: Optional[str], momento: Optional[datetime.datetime] = None) -> bool:
+    """
+    Indica si un momento cae dentro de la franja diaria [inicio, fin).
+
+    Args:
+        inicio: Hora de apertura "HH:MM"
+        fin: Hora de cierre "HH:MM" (si es menor que el inicio, la franja cruza la medianoche)
+        momento: Momento a comprobar (ahora si no se indica)
+
+    Returns:
+        True si el momento está dentro de la franja
+    """
+    momento = momento or datetime.datetime.now()
+    actual = momento.hour * 60 + momento.minute
+    desde = _minutos_del_dia(inicio)
+    if fin is None:
+        return actual >= desde
+    hasta = _minutos_del_dia(fin)
+    if desde == hasta:
+        return True  # Franja de 24 horas
+    if desde < hasta:
+        return desde <= actual < hasta
+    return actual >= desde or actual < hasta
+
+def _primer_inicio(inicio: str) -> float:
+    """
+    Calcula el momento a partir del cual puede empezar una descarga "a partir de" una hora.
+
+    Si la hora ya pasó hoy, puede empezar en seguida; si no, espera a que llegue.
+    """
+    ahora = datetime.datetime.now()
+    if en_franja(inicio, None, ahora):
+        return ahora.timestamp()
+    horas, minutos = (int(v) for v in inicio.split(":"))
+    return ahora.replace(hour=horas, minute=minutos, second=0, microsecond=0).timestamp()
+
+def describir_franja(entrada: Dict[str, Any]) -> str:
+    """
+    Describe la franja y el límite de una descarga programada.
+
+    Args:
+        entrada: Entrada de la cola
+
+    Returns:
+        Texto como "22:00-07:00, máx. 500 KB/s"
+    """
+    if entrada.get('fin'):
+        texto = f"{entrada['inicio']}-{entrada['fin']}"
+    else:
+        texto = f"desde las {entrada['inicio']}"
+    if entrada.get('limite_kbs'):
+        texto += f", máx. {entrada['limite_kbs']} KB/s"
+    return texto
+
+class ColaProgramada:
+    """
+    Cola persistente de descargas programadas.
+
+    Attributes:
+        archivo: Ruta del archivo JSON donde se guarda la cola
+    """
+
+    def __init__(self, archivo: str = DESCARGAS_PROGRAMADAS_ARCHIVO):
+        """
+        Inicializa la cola y carga las entradas guardadas.
+
+        Args:
+            archivo: Ruta del archivo JSON de la cola
+        """
+        self.archivo = archivo
+        self._lock = threading.Lock()
+        self._entradas: List[Dict[str, Any]] = []
+        self._cargar()
+
+    def _cargar(self) -> None:
+        """Carga las entradas guardadas en disco."""
+        if not os.path.exists(self.archivo):
+            return
+        try:
+            with open(self.archivo, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            self._entradas = [e for e in datos.get('entradas', []) if e.get('url') and e.get('inicio')]
+        except Exception as e:
+            print(f"Error al cargar las descargas programadas: {str(e)}")
+
+    def _guardar(self) -> None:
+        """Guarda la cola en disco (se llama con el lock tomado)."""
+        temporal = self.archivo + ".tmp"
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({'entradas': self._entradas}, f, ensure_ascii=False, indent=2)
+            os.replace(temporal, self.archivo)
+        except Exception as e:
+            print(f"Error al guardar las descargas programadas: {str(e)}")
+
+    def agregar(self, url: str, calidad: str, inicio: str, fin: Optional[str] = None,
+                limite_kbs: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Añade una descarga a la cola.
+
+        Args:
+            url: URL del video
+            calidad: ID del formato a descargar
+            inicio: Hora de inicio "HH:MM"
+            fin: Hora de fin "HH:MM" o None para no detenerla
+            limite_kbs: Velocidad máxima en KB/s o None para no limitarla
+
+        Returns:
+            Entrada añadida
+        """
+        with self._lock:
+            nuevo_id = max((e['id'] for e in self._entradas), default=0) + 1
+            entrada = {
+                'id': nuevo_id,
+                'url': url,
+                'calidad': calidad,
+                'inicio': inicio,
+                'fin': fin,
+                'limite_kbs': limite_kbs,
+                # Solo cuenta para las descargas sin hora de fin
+                'no_antes_de': _primer_inicio(inicio),
+                # Nombre fijo de los parciales, para continuar tras un reinicio
+                'clave_temporal': f"prog{nuevo_id}_{int(time.time())}",
+            }
+            self._entradas.append(entrada)
+            self._guardar()
+        print(f"Descarga programada ({describir_franja(entrada)}): {url}")
+        return dict(entrada)
+
+    def quitar(self, id_entrada: int) -> None:
+        """
+        Quita una descarga de la cola (terminada, fallida o cancelada).
+
+        Args:
+            id_entrada: ID de la entrada
+        """
+        with self._lock:
+            restantes = [e for e in self._entradas if e['id'] != id_entrada]
+            if len(restantes) != len(self._entradas):
+                self._entradas = restantes
+                self._guardar()
+
+    def entradas(self) -> List[Dict[str, Any]]:
+        """
+        Devuelve una copia de las entradas de la cola.
+
+        Returns:
+            Lista de entradas en orden de llegada
+        """
+        with self._lock:
+            return [dict(e) for e in self._entradas]
+
+    @staticmethod
+    def puede_ejecutarse(entrada: Dict[str, Any], momento: Optional[datetime.datetime] = None) -> bool:
+        """
+        Indica si una descarga programada debe estar ejecutándose en un momento dado.
+
+        Args:
+            entrada: Entrada de la cola
+            momento: Momento a comprobar (ahora si no se indica)
+
+        Returns:
+            True si la franja de la descarga está abierta
+        """
+        momento = momento or datetime.datetime.now()
+        if entrada.get('fin'):
+            return en_franja(entrada['inicio'], entrada['fin'], momento)
+        return momento.timestamp() >= entrada.get('no_antes_de', 0)
+
+# Cola compartida por la aplicación
+cola_programada = ColaProgramada()
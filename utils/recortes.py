@@ -0,0 +1,265 @@
+"""
+Descarga de tramos de un video (recortes) sin descargar el video entero.
+
+Los tramos se escriben como "1:30-2:45, 1:02:00-1:05:00" (un tramo sin fin
+llega hasta el final del video) o se toman del parámetro t= de la URL.
+Cada tramo se descarga con ffmpeg buscando en la entrada (-ss antes de -i),
+así que solo se piden los bytes o los fragmentos que lo cubren; los flujos
+se copian sin recodificar y el corte cae en el fotograma clave anterior al
+inicio pedido.
+"""
+
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# Tramo de un video: (inicio, fin) en segundos; fin None llega hasta el final
+Tramo = Tuple[float, Optional[float]]
+
+# Protocolos que ffmpeg puede leer buscando directamente el inicio del tramo
+_PROTOCOLOS_RECORTABLES = {'http', 'https', 'm3u8', 'm3u8_native'}
+
+# Segundos entre comprobaciones de la cancelación y del avance de ffmpeg
+_INTERVALO_PROGRESO = 0.2
+
+def ffmpeg_disponible() -> bool:
+    """Indica si ffmpeg está instalado (sin él no se pueden descargar tramos)."""
+    return shutil.which('ffmpeg') is not None
+
+_PATRON_HMS = re.compile(r'^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+(?:\.\d+)?)s?)?$', re.IGNORECASE)
+
+def segundos_de_tiempo(texto: str) -> float:
+    """
+    Convierte un tiempo ("90", "1:30", "1:02:03", "1m30s", "1h2m") a segundos.
+
+    Args:
+        texto: Tiempo escrito por el usuario o tomado de una URL
+
+    Returns:
+        Segundos desde el inicio del video
+
+    Raises:
+        ValueError: Si el texto no es un tiempo válido
+    """
+    texto = texto.strip()
+    try:
+        if ':' in texto:
+            segundos = 0.0
+            for campo in texto.split(':'):
+                segundos = segundos * 60 + float(campo)
+            return segundos
+        coincidencia = _PATRON_HMS.match(texto)
+        if texto and coincidencia:
+            horas, minutos, segundos = coincidencia.groups()
+            return int(horas or 0) * 3600 + int(minutos or 0) * 60 + float(segundos or 0)
+    except ValueError:
+        pass
+    raise ValueError(f"Tiempo no válido: '{texto}'")
+
+def parsear_tramos(texto: str) -> List[Tramo]:
+    """
+    Interpreta una lista de tramos ("1:30-2:45, 10:00-").
+
+    Args:
+        texto: Tramos separados por comas, punto y coma o saltos de línea
+
+    Returns:
+        Tramos ordenados y sin solaparse (vacía si el texto está vacío)
+
+    Raises:
+        ValueError: Si algún tramo no es válido
+    """
+    tramos = []
+    for parte in re.split(r'[,;\n]', texto):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if '-' not in parte:
+            raise ValueError(f"Falta el guion entre inicio y fin en '{parte}'")
+        inicio, fin = (campo.strip() for campo in parte.split('-', 1))
+        inicio = segundos_de_tiempo(inicio) if inicio else 0.0
+        fin = segundos_de_tiempo(fin) if fin else None
+        if fin is not None and fin <= inicio:
+            raise ValueError(f"El fin del tramo '{parte}' no es posterior a su inicio")
+        tramos.append((inicio, fin))
+
+    # Unir los tramos que se solapan para no descargar dos veces los mismos bytes
+    unidos: List[Tramo] = []
+    for inicio, fin in sorted(tramos, key=lambda tramo: tramo[0]):
+        if unidos and (unidos[-1][1] is None or inicio <= unidos[-1][1]):
+            anterior_inicio, anterior_fin = unidos[-1]
+            unidos[-1] = (anterior_inicio, None if fin is None or anterior_fin is None
+                          else max(anterior_fin, fin))
+        else:
+            unidos.append((inicio, fin))
+    return unidos
+
+def inicio_de_url(url: str) -> Optional[float]:
+    """
+    Devuelve el instante de inicio indicado en una URL (t=90, t=1m30s, #t=...).
+
+    Args:
+        url: URL del video
+
+    Returns:
+        Segundos de inicio, o None si la URL no indica ninguno
+    """
+    partes = urlparse(url)
+    parametros = parse_qs(partes.query)
+    parametros.update(parse_qs(partes.fragment))
+    for nombre in ('t', 'start'):
+        if parametros.get(nombre):
+            try:
+                return segundos_de_tiempo(parametros[nombre][0]) or None
+            except ValueError:
+                return None
+    return None
+
+def formatear_tiempo(segundos: float) -> str:
+    """
+    Formatea unos segundos como "m:ss" o "h:mm:ss".
+
+    Args:
+        segundos: Segundos desde el inicio del video
+
+    Returns:
+        Tiempo formateado
+    """
+    horas, resto = divmod(int(segundos), 3600)
+    minutos, enteros = divmod(resto, 60)
+    decimales = f"{segundos % 1:.1f}"[1:] if segundos % 1 >= 0.05 else ""
+    if horas:
+        return f"{horas}:{minutos:02d}:{enteros:02d}{decimales}"
+    return f"{minutos}:{enteros:02d}{decimales}"
+
+def describir_tramos(tramos: List[Tramo]) -> str:
+    """
+    Describe unos tramos con el mismo formato que acepta parsear_tramos.
+
+    Args:
+        tramos: Tramos del video
+
+    Returns:
+        Texto como "1:30-2:45, 10:00-"
+    """
+    return ", ".join(f"{formatear_tiempo(inicio)}-{formatear_tiempo(fin) if fin is not None else ''}"
+                     for inicio, fin in tramos)
+
+def duracion_tramos(tramos: List[Tramo], duracion: Optional[float]) -> Optional[float]:
+    """
+    Suma la duración de unos tramos.
+
+    Args:
+        tramos: Tramos del video
+        duracion: Duración del video (para los tramos sin fin)
+
+    Returns:
+        Segundos en total, o None si algún tramo no tiene fin y no se conoce la duración
+    """
+    total = 0.0
+    for inicio, fin in tramos:
+        if fin is None:
+            if not duracion:
+                return None
+            fin = duracion
+        total += max(0.0, min(fin, duracion or fin) - inicio)
+    return total
+
+def descargar_tramo(formatos: List[dict], tramo: Tramo, destino: str,
+                    progreso_callback: Callable[[Dict], None]) -> str:
+    """
+    Descarga un tramo de uno o varios formatos (video y audio) en un solo archivo.
+
+    El avance se notifica con diccionarios como los de los hooks de
+    progreso de yt-dlp; si el callback lanza una excepción (cancelación,
+    pausa o transferencia estancada), ffmpeg se detiene.
+
+    Args:
+        formatos: Formatos a descargar (de 'requested_formats' o el seleccionado)
+        tramo: (inicio, fin) en segundos
+        destino: Archivo de salida (su extensión decide el contenedor)
+        progreso_callback: Función a la que notificar el avance
+
+    Returns:
+        Ruta del archivo descargado
+
+    Raises:
+        Exception: Si falta ffmpeg, el formato no admite tramos o ffmpeg falla
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        raise Exception("Se necesita ffmpeg para descargar tramos de un video")
+
+    inicio, fin = tramo
+    comando = [ffmpeg, '-y', '-loglevel', 'error', '-nostdin', '-nostats', '-progress', 'pipe:1']
+    for formato in formatos:
+        if not formato.get('url') or formato.get('protocol', 'https') not in _PROTOCOLOS_RECORTABLES:
+            raise Exception(f"El formato {formato.get('format_id')} no se puede descargar por tramos")
+        cabeceras = ''.join(f"{clave}: {valor}\r\n"
+                            for clave, valor in (formato.get('http_headers') or {}).items())
+        if cabeceras:
+            comando += ['-headers', cabeceras]
+        comando += ['-ss', f"{inicio:.3f}"]
+        if fin is not None:
+            comando += ['-t', f"{fin - inicio:.3f}"]
+        comando += ['-i', formato['url']]
+    for indice in range(len(formatos)):
+        comando += ['-map', str(indice)]
+    comando += ['-c', 'copy', destino]
+
+    opciones = {'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE}
+    if sys.platform == 'win32':
+        opciones['creationflags'] = subprocess.CREATE_NO_WINDOW
+    proceso = subprocess.Popen(comando, **opciones)
+
+    # ffmpeg escribe su avance como líneas "clave=valor" en la salida estándar
+    avance: Dict[str, str] = {}
+
+    def leer_avance():
+        for linea in proceso.stdout:
+            clave, _, valor = linea.decode('utf-8', errors='replace').strip().partition('=')
+            avance[clave] = valor
+
+    threading.Thread(target=leer_avance, daemon=True).start()
+
+    duracion = (fin - inicio) if fin is not None else None
+    bytes_anteriores, momento_anterior = 0, time.monotonic()
+    try:
+        while True:
+            try:
+                proceso.wait(timeout=_INTERVALO_PROGRESO)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            try:
+                escritos = int(avance.get('total_size') or 0)
+                segundos = int(avance.get('out_time_us') or 0) / 1_000_000
+            except ValueError:
+                continue
+            ahora = time.monotonic()
+            velocidad = (escritos - bytes_anteriores) / (ahora - momento_anterior)
+            bytes_anteriores, momento_anterior = escritos, ahora
+            porcentaje = min(segundos / duracion * 100, 100.0) if duracion else 0
+            progreso_callback({
+                'status': 'downloading',
+                'downloaded_bytes': escritos,
+                'speed': velocidad,
+                '_percent_str': f"{porcentaje:.1f}%",
+            })
+    except BaseException:
+        # Cancelación, pausa o estancamiento: no dejar ffmpeg ejecutándose
+        proceso.kill()
+        proceso.wait()
+        raise
+
+    if proceso.returncode != 0:
+        error = proceso.stderr.read().decode('utf-8', errors='replace').strip()
+        raise Exception(f"ffmpeg terminó con error al descargar el tramo: {error[-500:]}")
+
+    progreso_callback({'status': 'finished', 'filename': destino})
+    return destino
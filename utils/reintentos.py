@@ -0,0 +1,178 @@
+"""
+Política de reintentos de las descargas.
+
+Los errores se clasifican según su causa:
+- transitorio: cortes de red, errores 5xx y transferencias estancadas; se
+  reintenta con espera exponencial y variación aleatoria ("full jitter").
+- limitado: el servidor limita el ritmo (429, 403); además de reintentar,
+  el host entra en un periodo de enfriamiento que respetan todas las
+  descargas antes de ocupar una plaza.
+- cancelado y permanente: no se reintentan.
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from utils.config import (
+    REINTENTOS_MAXIMOS, ESPERA_BASE_REINTENTO, ESPERA_MAXIMA_REINTENTO,
+    ENFRIAMIENTO_BASE_HOST, ENFRIAMIENTO_MAXIMO_HOST
+)
+
+ERROR_TRANSITORIO = 'transitorio'
+ERROR_LIMITADO = 'limitado'
+ERROR_CANCELADO = 'cancelado'
+ERROR_PERMANENTE = 'permanente'
+
+# Descripción de cada tipo para el historial de intentos
+DESCRIPCION_ERRORES = {
+    ERROR_TRANSITORIO: "error de red",
+    ERROR_LIMITADO: "límite del servidor",
+    ERROR_CANCELADO: "cancelada",
+    ERROR_PERMANENTE: "error",
+}
+
+_PATRON_LIMITADO = re.compile(r'HTTP Error (429|403)|Too Many Requests|rate.?limit', re.IGNORECASE)
+_PATRON_TRANSITORIO = re.compile(
+    r'HTTP Error 5\d\d|timed? ?out|Connection (reset|aborted|refused)|Remote end closed|'
+    r'IncompleteRead|Temporary failure|Network is unreachable|EOF occurred|'
+    r'ConnectionError|Read timed out|giving up after|Transferencia estancada',
+    re.IGNORECASE)
+
+# Enfriamiento por host: host -> (momento hasta el que esperar, limitaciones seguidas)
+_enfriamientos: Dict[str, tuple] = {}
+_lock_enfriamientos = threading.Lock()
+
+def clasificar_error(error: BaseException) -> str:
+    """
+    Clasifica un error de descarga.
+
+    Args:
+        error: Excepción producida
+
+    Returns:
+        ERROR_TRANSITORIO, ERROR_LIMITADO, ERROR_CANCELADO o ERROR_PERMANENTE
+    """
+    texto = str(error)
+    if "cancelada por el usuario" in texto.lower():
+        return ERROR_CANCELADO
+    if _PATRON_LIMITADO.search(texto):
+        return ERROR_LIMITADO
+    if isinstance(error, (ConnectionError, TimeoutError)) or _PATRON_TRANSITORIO.search(texto):
+        return ERROR_TRANSITORIO
+    return ERROR_PERMANENTE
+
+def espera_reintento(intento: int) -> float:
+    """
+    Calcula la espera antes de un reintento (exponencial con variación aleatoria completa).
+
+    Args:
+        intento: Número de reintento, empezando en 1
+
+    Returns:
+        Segundos a esperar
+    """
+    tope = min(ESPERA_MAXIMA_REINTENTO, ESPERA_BASE_REINTENTO * 2 ** (intento - 1))
+    return random.uniform(0, tope)
+
+def registrar_limitacion(host: str) -> float:
+    """
+    Pone un host en enfriamiento tras una respuesta de limitación.
+
+    Cada limitación seguida duplica el enfriamiento, hasta ENFRIAMIENTO_MAXIMO_HOST.
+
+    Args:
+        host: Host que limitó las peticiones
+
+    Returns:
+        Segundos de enfriamiento aplicados
+    """
+    with _lock_enfriamientos:
+        _, seguidas = _enfriamientos.get(host, (0.0, 0))
+        duracion = min(ENFRIAMIENTO_MAXIMO_HOST, ENFRIAMIENTO_BASE_HOST * 2 ** seguidas)
+        _enfriamientos[host] = (time.time() + duracion, seguidas + 1)
+    print(f"Host {host or '(desconocido)'} en enfriamiento durante {duracion:.0f} s")
+    return duracion
+
+def registrar_exito(host: str) -> None:
+    """
+    Reinicia el contador de limitaciones de un host tras una descarga correcta.
+
+    Args:
+        host: Host de la descarga
+    """
+    with _lock_enfriamientos:
+        _enfriamientos.pop(host, None)
+
+def enfriamiento_restante(host: str) -> float:
+    """
+    Devuelve los segundos que quedan de enfriamiento de un host.
+
+    Args:
+        host: Host a consultar
+
+    Returns:
+        Segundos restantes (0 si no está en enfriamiento)
+    """
+    with _lock_enfriamientos:
+        hasta, _ = _enfriamientos.get(host, (0.0, 0))
+    return max(0.0, hasta - time.time())
+
+def esperar(segundos: float, cancelada: Optional[Callable[[], bool]] = None) -> None:
+    """
+    Espera unos segundos comprobando la cancelación.
+
+    Args:
+        segundos: Tiempo a esperar
+        cancelada: Función que indica si hay que dejar de esperar
+
+    Raises:
+        Exception: Si la descarga se cancela durante la espera
+    """
+    fin = time.monotonic() + segundos
+    while True:
+        if cancelada and cancelada():
+            raise Exception("Descarga cancelada por el usuario")
+        restante = fin - time.monotonic()
+        if restante <= 0:
+            return
+        time.sleep(min(restante, 0.5))
+
+def esperar_enfriamiento(host: str, cancelada: Optional[Callable[[], bool]] = None,
+                         estado_callback: Optional[Callable[[str], None]] = None) -> None:
+    """
+    Espera a que termine el enfriamiento de un host antes de ocupar una plaza.
+
+    Args:
+        host: Host de la descarga
+        cancelada: Función que indica si hay que dejar de esperar
+        estado_callback: Función a la que notificar la espera
+    """
+    restante = enfriamiento_restante(host)
+    while restante > 0:
+        if estado_callback:
+            estado_callback(f"{host} limita las descargas, esperando {restante:.0f} s...")
+        esperar(min(restante, 5), cancelada)
+        restante = enfriamiento_restante(host)
+
+def decidir_reintento(error: BaseException, intento: int, host: str) -> Optional[float]:
+    """
+    Decide si se reintenta una descarga fallida y cuánto esperar.
+
+    Args:
+        error: Excepción producida
+        intento: Número del intento que falló, empezando en 1
+        host: Host de la descarga
+
+    Returns:
+        Segundos a esperar antes de reintentar, o None si no se reintenta
+    """
+    tipo = clasificar_error(error)
+    if tipo in (ERROR_CANCELADO, ERROR_PERMANENTE) or intento > REINTENTOS_MAXIMOS:
+        return None
+    if tipo == ERROR_LIMITADO:
+        # El enfriamiento del host se respeta al volver a pedir plaza
+        registrar_limitacion(host)
+    return espera_reintento(intento)
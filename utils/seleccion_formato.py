@@ -0,0 +1,464 @@
+"""
+Selección automática del formato de descarga a partir de reglas de preferencia.
+
+Las reglas se compilan una sola vez y luego se evalúan sobre la tabla completa
+de formatos de cada video, en lugar de guardar un ``format_id`` global que
+puede no existir en otros videos.
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from utils.ancho_banda import estimador_ancho_banda
+from utils.config import (
+    FORMATO_VIDEO, FORMATO_AUDIO, CALIDAD_REGLAS, CALIDAD_ADAPTATIVA, CALIDAD_AUDIO, CALIDAD_AUDIO_MP3,
+    obtener_reglas_formato, obtener_presupuesto_tiempo
+)
+from utils.urls import host_de_url
+
+# Nombres normalizados de los códecs según el prefijo que reporta yt-dlp
+_PREFIJOS_CODEC = {
+    'av01': 'av1',
+    'av1': 'av1',
+    'vp09': 'vp9',
+    'vp9': 'vp9',
+    'vp8': 'vp8',
+    'avc1': 'h264',
+    'avc3': 'h264',
+    'h264': 'h264',
+    'hev1': 'h265',
+    'hvc1': 'h265',
+    'h265': 'h265',
+    'mp4a': 'aac',
+    'aac': 'aac',
+    'opus': 'opus',
+    'vorbis': 'vorbis',
+}
+
+# Extensión de audio compatible con cada contenedor de video
+_AUDIO_POR_CONTENEDOR = {
+    'mp4': 'm4a',
+    'webm': 'webm',
+}
+
+# Archivo de audio en el que cabe cada códec sin recodificar
+_EXTENSION_POR_CODEC_AUDIO = {
+    'aac': 'm4a',
+    'opus': 'opus',
+    'vorbis': 'ogg',
+    'mp3': 'mp3',
+    'flac': 'flac',
+}
+
+# Reglas ya compiladas, indexadas por su representación JSON
+_reglas_compiladas: Dict[str, 'ReglasFormato'] = {}
+
+# Reglas que se dejan de exigir, una a una, si ningún formato las cumple todas.
+# Los códecs solo ordenan las preferencias y el tamaño máximo nunca se relaja
+_ORDEN_RELAJACION = ('contenedor', 'fps_max', 'altura_max')
+
+def normalizar_codec(codec: Optional[str]) -> str:
+    """
+    Convierte un códec de yt-dlp (p. ej. 'avc1.64001F') a un nombre simple ('h264').
+
+    Args:
+        codec: Cadena de códec reportada por yt-dlp
+
+    Returns:
+        Nombre normalizado del códec, 'none' si no tiene o la cadena original
+    """
+    if not codec or codec == 'none':
+        return 'none'
+    prefijo = codec.split('.')[0].lower()
+    return _PREFIJOS_CODEC.get(prefijo, prefijo)
+
+def tamano_formato(formato: dict, duracion: Optional[float] = None) -> Optional[float]:
+    """
+    Devuelve el tamaño de un formato en bytes, estimándolo si yt-dlp no lo reporta.
+
+    Si no hay 'filesize' ni 'filesize_approx', se calcula a partir de la tasa
+    de bits ('tbr', o 'vbr' + 'abr') multiplicada por la duración.
+
+    Args:
+        formato: Diccionario de formato de yt-dlp
+        duracion: Duración del video en segundos (si el formato no la trae)
+
+    Returns:
+        Tamaño en bytes o None si no hay datos para estimarlo
+    """
+    tamano = formato.get('filesize') or formato.get('filesize_approx')
+    if tamano:
+        return tamano
+
+    duracion = formato.get('duration') or duracion
+    tasa = formato.get('tbr') or ((formato.get('vbr') or 0) + (formato.get('abr') or 0))
+    if duracion and tasa:
+        # Las tasas de yt-dlp están en kbit/s
+        return tasa * 1000 / 8 * duracion
+    return None
+
+def tamano_es_estimado(formato: dict) -> bool:
+    """Indica si el tamaño del formato es una estimación y no el valor reportado."""
+    return not formato.get('filesize')
+
+def estimar_tamano_descarga(info: dict, especificacion: str) -> Optional[float]:
+    """
+    Estima los bytes que ocupará la descarga de un video con un formato dado.
+
+    Args:
+        info: Información del video obtenida con yt-dlp
+        especificacion: Especificación de formato (p. ej. '137+140' o 'bestvideo+bestaudio')
+
+    Returns:
+        Tamaño estimado en bytes o None si no se puede estimar
+    """
+    duracion = info.get('duration')
+    formatos = {f.get('format_id'): f for f in info.get('formats') or []}
+
+    # Usar la primera alternativa cuyos IDs existan en el video
+    for alternativa in especificacion.split('/'):
+        partes = alternativa.split('+')
+        if all(p in formatos for p in partes):
+            tamanos = [tamano_formato(formatos[p], duracion) for p in partes]
+            if all(t is not None for t in tamanos):
+                return sum(tamanos)
+
+    # Selectores genéricos: usar los formatos que yt-dlp eligió al consultar
+    elegidos = info.get('requested_formats') or [info]
+    tamanos = [tamano_formato(f, duracion) for f in elegidos]
+    if tamanos and all(t is not None for t in tamanos):
+        return sum(tamanos)
+    return None
+
+def es_formato_video(formato: dict) -> bool:
+    """Indica si el formato contiene una pista de video."""
+    return normalizar_codec(formato.get('vcodec')) != 'none'
+
+def es_formato_solo_audio(formato: dict) -> bool:
+    """Indica si el formato contiene únicamente audio."""
+    return (not es_formato_video(formato)
+            and normalizar_codec(formato.get('acodec')) != 'none')
+
+def es_calidad_audio(calidad: str) -> bool:
+    """Indica si la calidad elegida descarga solo el audio."""
+    return calidad in (CALIDAD_AUDIO, CALIDAD_AUDIO_MP3)
+
+def seleccionar_mejor_audio(formatos: List[dict]) -> Optional[dict]:
+    """
+    Devuelve el mejor formato de solo audio de un video.
+
+    Args:
+        formatos: Lista 'formats' de la información de yt-dlp (de peor a mejor)
+
+    Returns:
+        Formato de solo audio preferido por yt-dlp, o None si no hay ninguno
+    """
+    audios = [f for f in formatos if es_formato_solo_audio(f)]
+    return audios[-1] if audios else None
+
+def extension_audio(calidad: str, formato: dict) -> str:
+    """
+    Devuelve la extensión del archivo de audio que se obtendrá de un formato.
+
+    Args:
+        calidad: CALIDAD_AUDIO (sin recodificar) o CALIDAD_AUDIO_MP3
+        formato: Formato descargado
+
+    Returns:
+        'mp3' si se recodifica; si no, el contenedor propio del códec de audio
+    """
+    if calidad == CALIDAD_AUDIO_MP3:
+        return 'mp3'
+    return _EXTENSION_POR_CODEC_AUDIO.get(normalizar_codec(formato.get('acodec')),
+                                          formato.get('ext') or 'm4a')
+
+class ReglasFormato:
+    """
+    Reglas de preferencia de formato ya compiladas.
+
+    Attributes:
+        altura_max: Altura máxima admitida (None para sin límite)
+        rango_codecs: Posición de cada códec en el orden de preferencia
+        fps_max: Cuadros por segundo máximos (None para sin límite)
+        tamano_max: Tamaño estimado máximo en bytes (None para sin límite)
+        contenedor: Extensión de video exigida (None para cualquiera)
+    """
+
+    def __init__(self, altura_max: Optional[int] = None, codecs: Optional[List[str]] = None,
+                 fps_max: Optional[float] = None, tamano_max_mb: Optional[float] = None,
+                 contenedor: Optional[str] = None):
+        """
+        Compila las reglas de preferencia.
+
+        Args:
+            altura_max: Altura máxima en píxeles
+            codecs: Códecs de video en orden de preferencia (p. ej. ['av1', 'vp9', 'h264'])
+            fps_max: Cuadros por segundo máximos
+            tamano_max_mb: Tamaño estimado máximo (video + audio) en MB
+            contenedor: 'mp4', 'webm' o None
+        """
+        self.altura_max = int(altura_max) if altura_max else None
+        self.fps_max = float(fps_max) if fps_max else None
+        self.tamano_max = float(tamano_max_mb) * 1024 * 1024 if tamano_max_mb else None
+        self.contenedor = contenedor.lower() if contenedor else None
+
+        # Cuanto menor el rango, más preferido; los códecs no listados van al final
+        codecs = [normalizar_codec(c) for c in (codecs or [])]
+        self.rango_codecs = {codec: i for i, codec in enumerate(codecs)}
+        self._rango_desconocido = len(codecs)
+
+    def _admite_video(self, formato: dict) -> bool:
+        """Comprueba los límites de altura, fps y contenedor de un formato de video."""
+        if self.altura_max and (formato.get('height') or 0) > self.altura_max:
+            return False
+        if self.fps_max and (formato.get('fps') or 0) > self.fps_max:
+            return False
+        if self.contenedor and formato.get('ext') != self.contenedor:
+            return False
+        return True
+
+    def _clave_video(self, formato: dict) -> tuple:
+        """Clave de orden: mayor altura, códec preferido, más fps y mayor tasa de bits."""
+        rango = self.rango_codecs.get(normalizar_codec(formato.get('vcodec')), self._rango_desconocido)
+        return (
+            formato.get('height') or 0,
+            -rango,
+            formato.get('fps') or 0,
+            formato.get('tbr') or 0,
+        )
+
+    def _clave_audio(self, formato: dict) -> tuple:
+        """Clave de orden: contenedor compatible primero y luego mayor tasa de bits."""
+        compatible = True
+        if self.contenedor:
+            compatible = formato.get('ext') == _AUDIO_POR_CONTENEDOR.get(self.contenedor, self.contenedor)
+        return (compatible, formato.get('abr') or formato.get('tbr') or 0)
+
+    def candidatos(self, formatos: List[dict], duracion: Optional[float] = None) -> List[tuple]:
+        """
+        Lista las combinaciones que cumplen las reglas, de la más a la menos preferida.
+
+        Args:
+            formatos: Lista 'formats' de la información de yt-dlp
+            duracion: Duración del video, para estimar tamaños no reportados
+
+        Returns:
+            Lista de tuplas (especificación de formato, tamaño estimado en bytes o None)
+        """
+        audios = sorted((f for f in formatos if es_formato_solo_audio(f)),
+                        key=self._clave_audio, reverse=True)
+        mejor_audio = audios[0] if audios else None
+
+        videos = sorted((f for f in formatos if es_formato_video(f) and self._admite_video(f)),
+                        key=self._clave_video, reverse=True)
+
+        resultado = []
+        for video in videos:
+            lleva_audio = normalizar_codec(video.get('acodec')) != 'none'
+            audio = None if lleva_audio else mejor_audio
+
+            # Tamaño total estimado (video + audio)
+            tamano = tamano_formato(video, duracion)
+            if tamano is not None and audio is not None:
+                tamano_audio = tamano_formato(audio, duracion)
+                tamano = tamano + tamano_audio if tamano_audio is not None else None
+
+            # Comprobar el tamaño total estimado si hay un límite
+            if self.tamano_max and tamano is not None and tamano > self.tamano_max:
+                continue
+
+            if audio is not None:
+                resultado.append((f"{video['format_id']}+{audio['format_id']}", tamano))
+            else:
+                resultado.append((video['format_id'], tamano))
+
+        return resultado
+
+    def seleccionar(self, formatos: List[dict], bytes_max: Optional[float] = None,
+                    duracion: Optional[float] = None) -> Optional[str]:
+        """
+        Elige el mejor formato de la tabla que cumple las reglas.
+
+        Args:
+            formatos: Lista 'formats' de la información de yt-dlp
+            bytes_max: Límite adicional de tamaño; si ningún formato de tamaño
+                       conocido cabe en él, se elige el más pequeño
+            duracion: Duración del video, para estimar tamaños no reportados
+
+        Returns:
+            Especificación de formato (p. ej. '399+251') o None si ninguno cumple
+        """
+        candidatos = self.candidatos(formatos, duracion)
+        if not candidatos:
+            return None
+        if bytes_max is None:
+            return candidatos[0][0]
+
+        con_tamano = [(spec, tamano) for spec, tamano in candidatos if tamano is not None]
+        for spec, tamano in con_tamano:
+            if tamano <= bytes_max:
+                return spec
+
+        # Nada cabe en el límite: el más pequeño es el que antes termina
+        if con_tamano:
+            return min(con_tamano, key=lambda c: c[1])[0]
+        return candidatos[-1][0]
+
+def compilar_reglas(reglas: Optional[dict] = None) -> ReglasFormato:
+    """
+    Compila las reglas de preferencia, reutilizando la compilación previa si no cambiaron.
+
+    Args:
+        reglas: Diccionario de reglas; si es None se usan las de la configuración
+
+    Returns:
+        Reglas compiladas listas para evaluar
+    """
+    if reglas is None:
+        reglas = obtener_reglas_formato()
+
+    clave = json.dumps(reglas, sort_keys=True)
+    if clave not in _reglas_compiladas:
+        _reglas_compiladas[clave] = ReglasFormato(
+            altura_max=reglas.get('altura_max'),
+            codecs=reglas.get('codecs'),
+            fps_max=reglas.get('fps_max'),
+            tamano_max_mb=reglas.get('tamano_max_mb'),
+            contenedor=reglas.get('contenedor'),
+        )
+    return _reglas_compiladas[clave]
+
+def seleccionar_con_reglas(formatos: List[dict], bytes_max: Optional[float] = None,
+                           duracion: Optional[float] = None) -> Optional[str]:
+    """
+    Elige un formato con las reglas de la configuración, relajándolas si ninguno las cumple.
+
+    Si ningún formato cumple todas las reglas, se deja de exigir el
+    contenedor, luego los fps y luego la altura, hasta que alguno las cumpla.
+    El tamaño máximo no se relaja: si ningún formato cabe, es un error.
+
+    Args:
+        formatos: Lista 'formats' de la información de yt-dlp
+        bytes_max: Límite adicional de tamaño (ver ReglasFormato.seleccionar)
+        duracion: Duración del video, para estimar tamaños no reportados
+
+    Returns:
+        Especificación de formato, o None si el video no tiene formatos de video
+
+    Raises:
+        Exception: Si ningún formato cabe en el tamaño máximo de las reglas
+    """
+    reglas = dict(obtener_reglas_formato())
+    seleccion = compilar_reglas(reglas).seleccionar(formatos, bytes_max, duracion)
+    for regla in _ORDEN_RELAJACION:
+        if seleccion:
+            break
+        if reglas.get(regla):
+            reglas[regla] = None
+            seleccion = compilar_reglas(reglas).seleccionar(formatos, bytes_max, duracion)
+            if seleccion:
+                print(f"Ningún formato cumple todas las reglas: se deja de exigir '{regla}'")
+
+    if seleccion is None and reglas.get('tamano_max_mb'):
+        tamanos = [tamano for _, tamano in compilar_reglas({**reglas, 'tamano_max_mb': None})
+                   .candidatos(formatos, duracion) if tamano is not None]
+        if tamanos:
+            raise Exception(f"Ningún formato cabe en el tamaño máximo de {reglas['tamano_max_mb']} MB "
+                            f"(el más pequeño ocupa unos {min(tamanos) / 1048576:.0f} MB)")
+    return seleccion
+
+def formato_disponible(especificacion: str, formatos: List[dict]) -> bool:
+    """
+    Indica si todos los IDs concretos de una especificación existen en la tabla.
+
+    Los selectores genéricos de yt-dlp ('best', 'bestaudio', ...) siempre se
+    consideran disponibles.
+
+    Args:
+        especificacion: Especificación de formato (p. ej. '311+bestaudio')
+        formatos: Lista 'formats' de la información de yt-dlp
+
+    Returns:
+        True si la especificación puede usarse con este video
+    """
+    ids = {f.get('format_id') for f in formatos}
+    for alternativa in especificacion.split('/'):
+        partes = alternativa.split('+')
+        if all(p.startswith(('best', 'worst')) or p in ids for p in partes):
+            return True
+    return False
+
+def seleccionar_formato_adaptativo(info: dict) -> Optional[str]:
+    """
+    Elige el formato de mayor calidad que termine dentro del tiempo máximo configurado.
+
+    Usa la velocidad medida (EWMA) para el host del video y el tamaño de cada
+    formato. Como se evalúa al iniciar cada descarga, si la conexión empeora
+    las siguientes descargas de la cola eligen formatos más pequeños.
+
+    Args:
+        info: Información del video obtenida con yt-dlp
+
+    Returns:
+        Especificación de formato o None si el video no tiene formatos de video
+
+    Raises:
+        Exception: Si ningún formato cabe en el tamaño máximo de las reglas
+    """
+    velocidad = estimador_ancho_banda.obtener(host_de_url(info.get('webpage_url') or ''))
+    if not velocidad:
+        print("Sin mediciones de velocidad todavía, se aplican solo las reglas de formato")
+        return seleccionar_con_reglas(info.get('formats') or [], duracion=info.get('duration'))
+
+    presupuesto = obtener_presupuesto_tiempo() * 60
+    bytes_max = velocidad * presupuesto
+    print(f"Velocidad estimada: {velocidad / 1048576:.2f} MB/s, "
+          f"tamaño máximo para {presupuesto / 60:.0f} min: {bytes_max / 1048576:.0f} MB")
+    return seleccionar_con_reglas(info.get('formats') or [], bytes_max=bytes_max,
+                                  duracion=info.get('duration'))
+
+def resolver_formato(calidad: str, info: dict) -> str:
+    """
+    Traduce la calidad elegida por el usuario a la especificación de formato de un video.
+
+    Args:
+        calidad: Cadena vacía (mejor calidad), CALIDAD_REGLAS, CALIDAD_ADAPTATIVA,
+                 CALIDAD_AUDIO, CALIDAD_AUDIO_MP3 o un ID de formato
+        info: Información del video obtenida con yt-dlp
+
+    Returns:
+        Especificación de formato para la opción 'format' de yt-dlp
+
+    Raises:
+        Exception: Si ningún formato cabe en el tamaño máximo de las reglas
+    """
+    if not calidad:
+        return FORMATO_VIDEO
+
+    formatos = info.get('formats') or []
+
+    if es_calidad_audio(calidad):
+        # Con el ID concreto el tamaño se puede estimar antes de descargar
+        audio = seleccionar_mejor_audio(formatos)
+        return f"{audio['format_id']}/{FORMATO_AUDIO}" if audio else FORMATO_AUDIO
+
+    if calidad == CALIDAD_ADAPTATIVA:
+        seleccion = seleccionar_formato_adaptativo(info)
+        if seleccion:
+            print(f"Formato elegido según el ancho de banda: {seleccion}")
+            return seleccion
+        return FORMATO_VIDEO
+
+    # Un ID guardado de otro video puede no existir en este: usar las reglas
+    if calidad != CALIDAD_REGLAS and formato_disponible(calidad, formatos):
+        return calidad
+    if calidad != CALIDAD_REGLAS:
+        print(f"El formato '{calidad}' no está disponible, se aplican las reglas de formato")
+
+    seleccion = seleccionar_con_reglas(formatos, duracion=info.get('duration'))
+    if seleccion:
+        print(f"Formato elegido por las reglas: {seleccion}")
+        return seleccion
+
+    print("La tabla no tiene formatos de video, se deja elegir a yt-dlp")
+    return FORMATO_VIDEO
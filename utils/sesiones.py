@@ -0,0 +1,193 @@
+"""
+Grupo de sesiones yt_dlp.YoutubeDL reutilizables.
+
+Crear un YoutubeDL carga la lista de extractores, los manejadores HTTP y el
+almacén de cookies, y al cerrarlo se pierden las conexiones persistentes.
+Este módulo mantiene unas pocas sesiones vivas que se prestan de forma
+exclusiva a un hilo cada vez; las opciones propias de cada trabajo (formato,
+plantilla de salida, hooks...) se aplican al prestarla.
+"""
+
+import contextlib
+import threading
+import time
+from typing import Dict, List
+
+import yt_dlp
+from yt_dlp.postprocessor import get_postprocessor
+from yt_dlp.utils import POSTPROCESS_WHEN
+
+from utils.cache_extractores import instrumentar_cache
+from utils.config import SESIONES_MAXIMAS, CACHE_YTDLP_DIR
+
+# Opciones que cambian en cada trabajo y se aplican al prestar la sesión.
+# El resto (tiempo de espera, cabeceras, proxy...) define la conexión, y
+# las sesiones solo se comparten entre trabajos con las mismas.
+_OPCIONES_POR_TRABAJO = frozenset((
+    'format',
+    'outtmpl',
+    'paths',
+    'progress_hooks',
+    'postprocessor_hooks',
+    'postprocessors',
+    'merge_output_format',
+    'ratelimit',
+    'download_ranges',
+    'force_keyframes_at_cuts',
+    'continuedl',
+    'quiet',
+    'no_warnings',
+    'noprogress',
+    'logger',
+))
+
+# Contar los aciertos de la caché de yt-dlp en este proceso
+instrumentar_cache()
+
+# Sesiones libres, agrupadas por sus opciones de conexión
+_sesiones_libres: Dict[str, List[yt_dlp.YoutubeDL]] = {}
+_lock_sesiones = threading.Lock()
+
+# Mediciones para estimar el tiempo ahorrado
+_estadisticas = {
+    'creadas': 0,
+    'reutilizadas': 0,
+    'tiempo_creacion': 0.0,  # segundos acumulados creando sesiones
+}
+
+def _separar_opciones(opciones: dict):
+    """
+    Separa las opciones del trabajo de las opciones de conexión.
+
+    Args:
+        opciones: Opciones completas para yt_dlp.YoutubeDL
+
+    Returns:
+        Tupla (opciones de conexión, opciones del trabajo, clave de la conexión)
+    """
+    conexion = {k: v for k, v in opciones.items() if k not in _OPCIONES_POR_TRABAJO}
+    trabajo = {k: v for k, v in opciones.items() if k in _OPCIONES_POR_TRABAJO}
+    clave = repr(sorted(conexion.items()))
+    return conexion, trabajo, clave
+
+def _aplicar_opciones(ydl: yt_dlp.YoutubeDL, trabajo: dict) -> None:
+    """
+    Aplica las opciones de un trabajo a una sesión ya creada.
+
+    Reproduce lo que YoutubeDL.__init__ deriva de estas opciones: plantilla
+    de salida, selector de formato, hooks y posprocesadores. Para ello toca
+    atributos privados de YoutubeDL, comprobados con la versión de yt-dlp
+    fijada en requirements.txt (2025.2.19); al actualizarla hay que revisar
+    este código (tests/test_sesiones.py lo compara con una sesión nueva).
+
+    Args:
+        ydl: Sesión a preparar
+        trabajo: Opciones propias del trabajo
+    """
+    # Quitar las opciones del trabajo anterior
+    for clave in _OPCIONES_POR_TRABAJO:
+        ydl.params.pop(clave, None)
+    ydl.params.update({k: v for k, v in trabajo.items()
+                       if k not in ('progress_hooks', 'postprocessor_hooks', 'postprocessors')})
+
+    ydl._parse_outtmpl()
+    formato = ydl.params.get('format')
+    ydl.format_selector = (
+        formato if formato in (None, '-') or callable(formato)
+        else ydl.build_format_selector(formato))
+
+    ydl._progress_hooks = []
+    for hook in trabajo.get('progress_hooks', []):
+        ydl.add_progress_hook(hook)
+    ydl._postprocessor_hooks = []
+    for hook in trabajo.get('postprocessor_hooks', []):
+        ydl.add_postprocessor_hook(hook)
+
+    ydl._pps = {momento: [] for momento in POSTPROCESS_WHEN}
+    for definicion in trabajo.get('postprocessors', []):
+        definicion = dict(definicion)
+        momento = definicion.pop('when', 'post_process')
+        ydl.add_post_processor(get_postprocessor(definicion.pop('key'))(ydl, **definicion), when=momento)
+
+    ydl._download_retcode = 0
+
+@contextlib.contextmanager
+def sesion_youtube_dl(opciones: dict):
+    """
+    Presta una sesión YoutubeDL con las opciones indicadas.
+
+    Se usa igual que ``with yt_dlp.YoutubeDL(opciones) as ydl``, pero la
+    sesión vuelve al grupo al terminar en lugar de cerrarse.
+
+    Args:
+        opciones: Opciones para yt_dlp.YoutubeDL
+
+    Yields:
+        Sesión de uso exclusivo del hilo que la pidió
+    """
+    # Todas las sesiones comparten el directorio de caché de la aplicación
+    opciones = {'cachedir': CACHE_YTDLP_DIR, **opciones}
+    conexion, trabajo, clave = _separar_opciones(opciones)
+
+    with _lock_sesiones:
+        libres = _sesiones_libres.get(clave)
+        ydl = libres.pop() if libres else None
+
+    if ydl is None:
+        inicio = time.perf_counter()
+        ydl = yt_dlp.YoutubeDL(dict(conexion))
+        duracion = time.perf_counter() - inicio
+        with _lock_sesiones:
+            _estadisticas['creadas'] += 1
+            _estadisticas['tiempo_creacion'] += duracion
+        print(f"Sesión de yt-dlp creada en {duracion * 1000:.0f} ms")
+    else:
+        with _lock_sesiones:
+            _estadisticas['reutilizadas'] += 1
+
+    _aplicar_opciones(ydl, trabajo)
+    try:
+        yield ydl
+    finally:
+        # No conservar referencias a los hooks del trabajo terminado
+        _aplicar_opciones(ydl, {})
+        with _lock_sesiones:
+            libres = _sesiones_libres.setdefault(clave, [])
+            devolver = sum(len(l) for l in _sesiones_libres.values()) < SESIONES_MAXIMAS
+            if devolver:
+                libres.append(ydl)
+        if not devolver:
+            ydl.close()
+
+def estadisticas_sesiones() -> dict:
+    """
+    Devuelve cuántas sesiones se crearon y reutilizaron, y el tiempo ahorrado.
+
+    El ahorro se estima como el tiempo medio de creación de una sesión por
+    el número de veces que se reutilizó una (sin contar las conexiones
+    persistentes reaprovechadas, que no se pueden medir aquí).
+
+    Returns:
+        Diccionario con 'creadas', 'reutilizadas', 'creacion_media_ms' y 'ahorro_ms'
+    """
+    with _lock_sesiones:
+        creadas = _estadisticas['creadas']
+        reutilizadas = _estadisticas['reutilizadas']
+        media = _estadisticas['tiempo_creacion'] / creadas if creadas else 0.0
+    return {
+        'creadas': creadas,
+        'reutilizadas': reutilizadas,
+        'creacion_media_ms': media * 1000,
+        'ahorro_ms': media * reutilizadas * 1000,
+    }
+
+def cerrar_sesiones() -> None:
+    """Cierra todas las sesiones libres del grupo."""
+    with _lock_sesiones:
+        sesiones = [ydl for libres in _sesiones_libres.values() for ydl in libres]
+        _sesiones_libres.clear()
+    for ydl in sesiones:
+        try:
+            ydl.close()
+        except Exception as e:
+            print(f"Error al cerrar sesión de yt-dlp: {str(e)}")
@@ -0,0 +1,164 @@
+"""
+Suscripciones a canales y listas.
+
+Sincronizar una suscripción enumera su listado con extracción plana (sin
+consultar la página de cada video) y de forma perezosa: las páginas del
+listado se piden a medida que se recorren, y el recorrido se detiene en el
+primer video que ya está en el índice de descargados. Un canal sin novedades
+cuesta así una sola petición, y las suscripciones se consultan en paralelo.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from utils.archivo_descargas import clave_archivo, esta_descargado
+from utils.config import (
+    HILOS_SINCRONIZACION, MAXIMO_NUEVOS_SUSCRIPCION, DIAS_ENTRE_SINCRONIZACIONES,
+    TIEMPO_ESPERA_SOCKET, obtener_suscripciones, guardar_suscripciones
+)
+from utils.sesiones import sesion_youtube_dl
+from utils.urls import url_de_listado
+
+# Listado plano y perezoso: solo se piden las páginas que se llegan a recorrer
+_OPCIONES_LISTADO = {
+    'extract_flat': 'in_playlist',
+    'lazy_playlist': True,
+    'quiet': True,
+    'no_warnings': True,
+    'socket_timeout': TIEMPO_ESPERA_SOCKET,
+}
+
+# Evita que dos cambios simultáneos pisen la lista guardada
+_lock_suscripciones = threading.Lock()
+
+def agregar_suscripcion(url: str) -> bool:
+    """
+    Añade un canal o lista a las suscripciones.
+
+    Args:
+        url: URL del canal o de la lista
+
+    Returns:
+        True si se añadió, False si ya existía o no se pudo guardar
+    """
+    url = url_de_listado(url)
+    with _lock_suscripciones:
+        suscripciones = obtener_suscripciones()
+        if any(s.get('url') == url for s in suscripciones):
+            return False
+        suscripciones.append({'url': url, 'nombre': '', 'ultima_sincronizacion': 0})
+        return guardar_suscripciones(suscripciones)
+
+def quitar_suscripcion(url: str) -> bool:
+    """
+    Quita un canal o lista de las suscripciones.
+
+    Args:
+        url: URL guardada de la suscripción
+
+    Returns:
+        True si se guardó el cambio
+    """
+    with _lock_suscripciones:
+        suscripciones = [s for s in obtener_suscripciones() if s.get('url') != url]
+        return guardar_suscripciones(suscripciones)
+
+def _url_de_entrada(entrada: dict) -> Optional[str]:
+    """Obtiene la URL de un video a partir de su entrada plana del listado."""
+    url = entrada.get('url') or entrada.get('webpage_url')
+    if url and url.startswith('http'):
+        return url
+    if entrada.get('ie_key') == 'Youtube':
+        return f"https://www.youtube.com/watch?v={entrada['id']}"
+    return url
+
+def listar_nuevos(url: str) -> Tuple[List[str], str]:
+    """
+    Enumera los videos de un listado que aún no se han descargado.
+
+    Los listados van del más reciente al más antiguo, así que el recorrido
+    termina en el primer video ya descargado (o tras MAXIMO_NUEVOS_SUSCRIPCION
+    videos, para que una suscripción nueva no encole el canal entero).
+
+    Args:
+        url: URL del canal o de la lista
+
+    Returns:
+        Tupla (URLs nuevas del más antiguo al más reciente, nombre del listado)
+    """
+    nuevos = []
+    with sesion_youtube_dl(_OPCIONES_LISTADO) as ydl:
+        resultado = ydl.extract_info(url, download=False, process=False)
+        # Algunos extractores remiten a otra URL antes de dar el listado
+        for _ in range(3):
+            if resultado.get('_type') not in ('url', 'url_transparent'):
+                break
+            resultado = ydl.extract_info(resultado['url'], download=False, process=False,
+                                         ie_key=resultado.get('ie_key'))
+
+        nombre = resultado.get('title') or resultado.get('uploader') or ''
+        extractor_listado = resultado.get('extractor_key') or ''
+        for entrada in itertools.islice(resultado.get('entries') or [], MAXIMO_NUEVOS_SUSCRIPCION):
+            if not entrada or not entrada.get('id'):
+                continue
+            extractor = entrada.get('ie_key') or extractor_listado
+            if esta_descargado(clave_archivo(extractor, entrada['id'])):
+                break
+            url_video = _url_de_entrada(entrada)
+            if url_video:
+                nuevos.append(url_video)
+
+    # Descargar en orden de publicación
+    nuevos.reverse()
+    return nuevos, nombre
+
+def sincronizar_suscripciones(solo_vencidas: bool = False) -> List[str]:
+    """
+    Busca videos nuevos en las suscripciones.
+
+    Args:
+        solo_vencidas: Si es True, solo se consultan las suscripciones que no se
+                       sincronizan desde hace DIAS_ENTRE_SINCRONIZACIONES días
+
+    Returns:
+        URLs de los videos nuevos de todas las suscripciones
+    """
+    suscripciones = obtener_suscripciones()
+    if solo_vencidas:
+        limite = time.time() - DIAS_ENTRE_SINCRONIZACIONES * 86400
+        suscripciones = [s for s in suscripciones if s.get('ultima_sincronizacion', 0) < limite]
+    if not suscripciones:
+        return []
+
+    def sincronizar(suscripcion: dict):
+        try:
+            return suscripcion['url'], listar_nuevos(suscripcion['url'])
+        except Exception as e:
+            print(f"Error al sincronizar {suscripcion['url']}: {str(e)}")
+            return suscripcion['url'], None
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=HILOS_SINCRONIZACION) as pool:
+        resultados = dict(pool.map(sincronizar, suscripciones))
+
+    # Guardar el momento de la sincronización (y el nombre la primera vez)
+    nuevos = []
+    with _lock_suscripciones:
+        guardadas = obtener_suscripciones()
+        for suscripcion in guardadas:
+            resultado = resultados.get(suscripcion.get('url'))
+            if resultado is None:
+                continue
+            urls, nombre = resultado
+            nuevos.extend(urls)
+            if nombre and not suscripcion.get('nombre'):
+                suscripcion['nombre'] = nombre
+            suscripcion['ultima_sincronizacion'] = time.time()
+        guardar_suscripciones(guardadas)
+
+    print(f"Sincronizadas {len(suscripciones)} suscripciones en "
+          f"{time.perf_counter() - inicio:.1f} s: {len(nuevos)} videos nuevos")
+    return nuevos
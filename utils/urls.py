@@ -0,0 +1,165 @@
+"""
+Utilidades para validar y analizar URLs de videos.
+"""
+
+import functools
+import re
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# Patrón sencillo para reconocer una URL http(s) completa
+_PATRON_URL = re.compile(r'^https?://[^\s/$.?#][^\s]*\.[^\s]+$', re.IGNORECASE)
+
+# Formas habituales de una URL de un video de YouTube (ID de 11 caracteres)
+_PATRON_YOUTUBE = re.compile(
+    r'^https?://(?:(?:www\.|m\.|music\.)?youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)'
+    r'|youtu\.be/)([0-9A-Za-z_-]{11})(?![0-9A-Za-z_-])', re.IGNORECASE)
+
+# Hosts que sirven el mismo sitio: comparten enfriamiento y velocidad medida
+_ALIAS_HOSTS = {
+    'youtu.be': 'youtube.com',
+    'youtube-nocookie.com': 'youtube.com',
+}
+
+# Extractores de yt-dlp que ya reconocieron alguna URL de cada host, en el orden
+# en que aparecieron: se prueban antes que la lista completa (más de 1800 clases)
+_extractores_por_host: Dict[str, tuple] = {}
+
+# Página principal de un canal de YouTube (sin pestaña: /videos, /shorts...)
+_PATRON_CANAL_YOUTUBE = re.compile(
+    r'^(https?://(?:www\.|m\.)?youtube\.com/(?:@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+))/?$',
+    re.IGNORECASE)
+
+def es_url_valida(url: str) -> bool:
+    """
+    Indica si el texto tiene forma de URL http(s) que vale la pena consultar.
+    
+    Args:
+        url: Texto introducido por el usuario
+        
+    Returns:
+        True si el texto parece una URL válida, False en caso contrario
+    """
+    if not url:
+        return False
+    return bool(_PATRON_URL.match(url.strip()))
+
+def host_de_url(url: str) -> str:
+    """
+    Obtiene el host de una URL normalizado como clave por sitio.
+    
+    Se quitan los prefijos 'www.' y 'm.', y los alias de un mismo sitio
+    (youtu.be, music.youtube.com...) dan el mismo host, para que el
+    enfriamiento y la velocidad medida se compartan sea cual sea la forma
+    de la URL.
+    
+    Args:
+        url: URL de la que extraer el host
+        
+    Returns:
+        Host en minúsculas o cadena vacía si no se puede determinar
+    """
+    try:
+        host = (urlparse(url.strip()).hostname or '').lower()
+    except ValueError:
+        return ''
+    for prefijo in ('www.', 'm.'):
+        if host.startswith(prefijo):
+            host = host[len(prefijo):]
+    if host.endswith('.youtube.com'):
+        host = 'youtube.com'
+    return _ALIAS_HOSTS.get(host, host)
+
+def clave_canonica(url: str) -> str:
+    """
+    Obtiene una clave que identifica al video de una URL, sin acceder a la red.
+    
+    Es la misma clave "extractor id" del índice de descargados, así que las
+    distintas formas de una URL (youtu.be/X, watch?v=X&t=10, shorts/X,
+    vimeo.com/N?autoplay=1...) dan la misma clave en la caché de metadatos,
+    al unir descargas repetidas y al importar. Si el ID no se puede deducir
+    de la URL, se usa la propia URL.
+    
+    Args:
+        url: URL del video
+        
+    Returns:
+        Clave "extractor id" o la propia URL sin espacios
+    """
+    url = (url or '').strip()
+    identificacion = identificar_video(url)
+    return "{} {}".format(*identificacion) if identificacion else url
+
+def identificar_video(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Obtiene el extractor y el ID de un video a partir de su URL, sin acceder a la red.
+    
+    Las URLs de YouTube se reconocen con una expresión regular; para el resto
+    se pregunta a los extractores de yt-dlp si pueden deducir el ID de la URL.
+    Recorrerlos todos cuesta varios milisegundos, así que primero se prueban
+    los que ya reconocieron otra URL del mismo host.
+    
+    Args:
+        url: URL del video
+        
+    Returns:
+        Tupla (extractor en minúsculas, ID del video) o None si no se puede deducir
+    """
+    return _identificar_url((url or '').strip())
+
+@functools.lru_cache(maxsize=4096)
+def _identificar_url(url: str) -> Optional[Tuple[str, str]]:
+    """Identifica una URL ya sin espacios (las repetidas se resuelven una sola vez)."""
+    coincidencia = _PATRON_YOUTUBE.match(url)
+    if coincidencia:
+        return 'youtube', coincidencia.group(1)
+    
+    host = host_de_url(url)
+    conocidos = _extractores_por_host.get(host, ())
+    for extractor in conocidos:
+        identificacion = _probar_extractor(extractor, url)
+        if identificacion:
+            return identificacion if identificacion[1] else None
+    
+    from yt_dlp.extractor import gen_extractor_classes
+    for extractor in gen_extractor_classes():
+        if extractor in conocidos or extractor.ie_key() == 'Generic':
+            continue
+        identificacion = _probar_extractor(extractor, url)
+        if identificacion:
+            _extractores_por_host[host] = conocidos + (extractor,)
+            return identificacion if identificacion[1] else None
+    return None
+
+def _probar_extractor(extractor, url: str) -> Optional[Tuple[str, str]]:
+    """
+    Pregunta a un extractor de yt-dlp por el ID de un video, sin acceder a la red.
+    
+    Returns:
+        Tupla (extractor en minúsculas, ID o cadena vacía) si el extractor
+        acepta la URL, o None si no la acepta o falla
+    """
+    try:
+        if not extractor.suitable(url):
+            return None
+        return extractor.ie_key().lower(), extractor.get_temp_id(url) or ''
+    except Exception:
+        return None
+
+def url_de_listado(url: str) -> str:
+    """
+    Normaliza la URL de un canal o lista para enumerar sus videos.
+    
+    La página principal de un canal de YouTube agrupa varias pestañas
+    (videos, shorts, directos); se usa la de videos, que está ordenada de
+    más reciente a más antiguo.
+    
+    Args:
+        url: URL del canal o de la lista
+        
+    Returns:
+        URL que enumera directamente los videos
+    """
+    url = (url or '').strip()
+    coincidencia = _PATRON_CANAL_YOUTUBE.match(url)
+    return f"{coincidencia.group(1)}/videos" if coincidencia else url
@@ -2,7 +2,60 @@
 Utilidades para obtener y manejar la calidad de video.
 """
 
-import yt_dlp
+from utils.config import (
+    CALIDAD_REGLAS, CALIDAD_ADAPTATIVA, CALIDAD_AUDIO, CALIDAD_AUDIO_MP3, obtener_presupuesto_tiempo
+)
+from utils.metadatos import obtener_info_video
+from utils.seleccion_formato import (
+    seleccionar_con_reglas, tamano_formato, tamano_es_estimado, seleccionar_mejor_audio, extension_audio
+)
+
+# Opciones que siempre aparecen al principio de la lista
+_IDS_PREDEFINIDOS = ['best', 'bestvideo+bestaudio', CALIDAD_REGLAS, CALIDAD_ADAPTATIVA,
+                     CALIDAD_AUDIO, CALIDAD_AUDIO_MP3]
+
+def _describir_seleccion_reglas(info):
+    """
+    Describe el formato que elegirían las reglas de formato para un video.
+    
+    Args:
+        info: Información del video obtenida con yt-dlp
+    
+    Returns:
+        Texto para mostrar en la lista de calidades
+    """
+    try:
+        seleccion = seleccionar_con_reglas(info.get('formats') or [], duracion=info.get('duration'))
+    except Exception:
+        return "Automática según reglas (ninguno cabe en el tamaño máximo)"
+    if not seleccion:
+        return "Automática según reglas (ningún formato de video)"
+    
+    formatos = {f.get('format_id'): f for f in info.get('formats') or []}
+    video = formatos.get(seleccion.split('+')[0], {})
+    if video.get('height'):
+        return f"Automática según reglas ({video['height']}p {video.get('ext', '')})"
+    return f"Automática según reglas ({seleccion})"
+
+def _describir_tamano(formato, duracion):
+    """
+    Describe el tamaño de un formato para la lista de calidades.
+    
+    Args:
+        formato: Formato de yt-dlp
+        duracion: Duración del video en segundos
+    
+    Returns:
+        Tamaño en MB o GB ('~' si es estimado) o "Tamaño desconocido"
+    """
+    # Estimar tamaño (a partir de la tasa de bits si yt-dlp no lo reporta)
+    filesize = tamano_formato(formato, duracion)
+    if not filesize:
+        return "Tamaño desconocido"
+    prefijo = "~" if tamano_es_estimado(formato) else ""
+    if filesize > 1024 * 1024 * 1024:
+        return f"{prefijo}{filesize / (1024 * 1024 * 1024):.2f} GB"
+    return f"{prefijo}{filesize / (1024 * 1024):.2f} MB"
 
 def obtener_formatos_disponibles(url):
     """
@@ -16,123 +69,119 @@ def obtener_formatos_disponibles(url):
     """
     print(f"Obteniendo formatos disponibles para: {url}")
     
-    # Opciones para YoutubeDL
-    opciones = {
-        'quiet': True,
-        'no_warnings': True,
-    }
-    
     try:
-        # Obtener la información del video
-        with yt_dlp.YoutubeDL(opciones) as ydl:
-            info = ydl.extract_info(url, download=False)
-            
-            if not info:
-                print("No se pudo obtener información del video")
-                return []
-            
-            print(f"Título del video: {info.get('title', 'Desconocido')}")
-            
-            # Formatos disponibles
-            formatos_disponibles = []
-            
-            # Opciones predefinidas comunes
-            formatos_predefinidos = [
-                {'format_id': 'best', 'calidad': 'Mejor calidad disponible', 'extension': 'auto', 'tamaño_aprox': 'Variable'},
-                {'format_id': 'bestvideo+bestaudio', 'calidad': 'Mejor video + mejor audio', 'extension': 'auto', 'tamaño_aprox': 'Variable'},
-            ]
-            
-            # Añadir formatos predefinidos siempre
-            formatos_disponibles.extend(formatos_predefinidos)
-            
-            # Formatos específicos del video
-            if 'formats' in info and info['formats']:
-                # Filtro para formatos con audio y video
-                for formato in info['formats']:
-                    vcodec = formato.get('vcodec', '')
-                    acodec = formato.get('acodec', '')
-                    
-                    # Ignorar formatos sin video o solo audio
-                    if vcodec == 'none' or vcodec == '':
-                        continue
-                    
-                    # Crear un ID de formato que combine video+audio si es necesario
-                    format_id = formato.get('format_id', '')
-                    if acodec == 'none':
-                        format_id = f"{format_id}+bestaudio"
-                    
-                    # Obtener información de calidad
-                    height = formato.get('height', 0)
-                    width = formato.get('width', 0)
-                    fps = formato.get('fps', 0)
-                    extension = formato.get('ext', 'desconocida')
-                    
-                    # Construir descripción de la calidad
-                    if height and width:
-                        calidad = f"{width}x{height}"
-                        if fps:
-                            calidad += f" @{int(fps)}fps"
-                    else:
-                        calidad = formato.get('format_note', 'Calidad desconocida')
-                    
-                    # Añadir info de codec
-                    if vcodec and vcodec != 'none':
-                        codec_info = f" [{vcodec.split('.')[0]}"
-                        if acodec and acodec != 'none':
-                            codec_info += f"/{acodec.split('.')[0]}"
-                        elif format_id.endswith('+bestaudio'):
-                            codec_info += "/mejor audio"
-                        codec_info += "]"
-                        calidad += codec_info
-                    
-                    # Estimar tamaño
-                    filesize = formato.get('filesize') or formato.get('filesize_approx')
-                    if filesize:
-                        if filesize > 1024 * 1024 * 1024:
-                            tamaño = f"{filesize / (1024 * 1024 * 1024):.2f} GB"
-                        else:
-                            tamaño = f"{filesize / (1024 * 1024):.2f} MB"
-                    else:
-                        tamaño = "Tamaño desconocido"
-                    
-                    # Guardar información del formato
-                    formatos_disponibles.append({
-                        'format_id': format_id,
-                        'calidad': calidad,
-                        'extension': extension,
-                        'tamaño_aprox': tamaño,
-                        'height': height or 0  # Para ordenar
-                    })
-            
-            # Eliminar duplicados y ordenar
-            formatos_filtrados = []
-            formatos_ids_vistos = set()
-            
-            # Primero incluir las opciones predefinidas
-            for formato in formatos_disponibles:
-                if formato['format_id'] in ['best', 'bestvideo+bestaudio']:
-                    formatos_filtrados.append(formato)
-                    formatos_ids_vistos.add(formato['format_id'])
-            
-            # Luego ordenar el resto por altura (calidad) descendente
-            otros_formatos = [f for f in formatos_disponibles 
-                             if f['format_id'] not in formatos_ids_vistos]
-            otros_formatos.sort(key=lambda x: x.get('height', 0), reverse=True)
-            
-            # Agregar los formatos ordenados, evitando duplicados de resoluciones
-            resoluciones_vistas = set()
-            for formato in otros_formatos:
-                height = formato.get('height', 0)
-                # Si es una resolución que ya tenemos, ignorar
-                if height in resoluciones_vistas and height != 0:
+        # Obtener la información del video (de la caché si ya fue precargada)
+        info = obtener_info_video(url)
+        if not info:
+            print("No se pudo obtener información del video")
+            return []
+        
+        print(f"Título del video: {info.get('title', 'Desconocido')}")
+        
+        # Formatos disponibles
+        formatos_disponibles = []
+        
+        # Opciones predefinidas comunes
+        formatos_predefinidos = [
+            {'format_id': 'best', 'calidad': 'Mejor calidad disponible', 'extension': 'auto', 'tamaño_aprox': 'Variable'},
+            {'format_id': 'bestvideo+bestaudio', 'calidad': 'Mejor video + mejor audio', 'extension': 'auto', 'tamaño_aprox': 'Variable'},
+            {'format_id': CALIDAD_REGLAS, 'calidad': _describir_seleccion_reglas(info), 'extension': 'auto', 'tamaño_aprox': 'Variable'},
+            {'format_id': CALIDAD_ADAPTATIVA, 'calidad': f"Adaptativa al ancho de banda (máx. {obtener_presupuesto_tiempo():g} min)", 'extension': 'auto', 'tamaño_aprox': 'Variable'},
+        ]
+        
+        # Solo audio: el mejor formato sin video, sin recodificar o convertido a MP3
+        audio = seleccionar_mejor_audio(info.get('formats') or [])
+        formatos_predefinidos += [
+            {'format_id': CALIDAD_AUDIO, 'calidad': 'Solo audio (sin recodificar)',
+             'extension': extension_audio(CALIDAD_AUDIO, audio) if audio else 'auto',
+             'tamaño_aprox': _describir_tamano(audio, info.get('duration')) if audio else 'Variable'},
+            {'format_id': CALIDAD_AUDIO_MP3, 'calidad': 'Solo audio convertido a MP3',
+             'extension': 'mp3', 'tamaño_aprox': 'Variable'},
+        ]
+        
+        # Añadir formatos predefinidos siempre
+        formatos_disponibles.extend(formatos_predefinidos)
+        
+        # Formatos específicos del video
+        if 'formats' in info and info['formats']:
+            # Filtro para formatos con audio y video
+            for formato in info['formats']:
+                vcodec = formato.get('vcodec', '')
+                acodec = formato.get('acodec', '')
+                
+                # Ignorar formatos sin video o solo audio
+                if vcodec == 'none' or vcodec == '':
                     continue
                 
+                # Crear un ID de formato que combine video+audio si es necesario
+                format_id = formato.get('format_id', '')
+                if acodec == 'none':
+                    format_id = f"{format_id}+bestaudio"
+                
+                # Obtener información de calidad
+                height = formato.get('height', 0)
+                width = formato.get('width', 0)
+                fps = formato.get('fps', 0)
+                extension = formato.get('ext', 'desconocida')
+                
+                # Construir descripción de la calidad
+                if height and width:
+                    calidad = f"{width}x{height}"
+                    if fps:
+                        calidad += f" @{int(fps)}fps"
+                else:
+                    calidad = formato.get('format_note', 'Calidad desconocida')
+                
+                # Añadir info de codec
+                if vcodec and vcodec != 'none':
+                    codec_info = f" [{vcodec.split('.')[0]}"
+                    if acodec and acodec != 'none':
+                        codec_info += f"/{acodec.split('.')[0]}"
+                    elif format_id.endswith('+bestaudio'):
+                        codec_info += "/mejor audio"
+                    codec_info += "]"
+                    calidad += codec_info
+                
+                tamaño = _describir_tamano(formato, info.get('duration'))
+                
+                # Guardar información del formato
+                formatos_disponibles.append({
+                    'format_id': format_id,
+                    'calidad': calidad,
+                    'extension': extension,
+                    'tamaño_aprox': tamaño,
+                    'height': height or 0  # Para ordenar
+                })
+        
+        # Eliminar duplicados y ordenar
+        formatos_filtrados = []
+        formatos_ids_vistos = set()
+        
+        # Primero incluir las opciones predefinidas
+        for formato in formatos_disponibles:
+            if formato['format_id'] in _IDS_PREDEFINIDOS:
                 formatos_filtrados.append(formato)
-                resoluciones_vistas.add(height)
-            
-            print(f"Se encontraron {len(formatos_filtrados)} formatos únicos")
-            return formatos_filtrados
+                formatos_ids_vistos.add(formato['format_id'])
+        
+        # Luego ordenar el resto por altura (calidad) descendente
+        otros_formatos = [f for f in formatos_disponibles 
+                         if f['format_id'] not in formatos_ids_vistos]
+        otros_formatos.sort(key=lambda x: x.get('height', 0), reverse=True)
+        
+        # Agregar los formatos ordenados, evitando duplicados de resoluciones
+        resoluciones_vistas = set()
+        for formato in otros_formatos:
+            height = formato.get('height', 0)
+            # Si es una resolución que ya tenemos, ignorar
+            if height in resoluciones_vistas and height != 0:
+                continue
             
+            formatos_filtrados.append(formato)
+            resoluciones_vistas.add(height)
+        
+        print(f"Se encontraron {len(formatos_filtrados)} formatos únicos")
+        return formatos_filtrados
+        
     except Exception as e:
         print(f"Error al obtener formatos: {str(e)}")
         raise
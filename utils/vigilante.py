@@ -0,0 +1,153 @@
+"""
+Vigilancia de transferencias estancadas.
+
+El hook de progreso alimenta al vigilante con los bytes descargados. Un hilo
+comprueba cada segundo qué transferencias llevan más de la ventana
+configurada sin avanzar, las marca como estancadas y corta su conexión: una
+lectura bloqueada en un socket que ya no recibe nada no vuelve a llamar al
+hook, así que esperar a que la descarga lo note no basta. La descarga
+interrumpida se reintenta desde los bytes ya descargados, liberando su plaza
+mientras tanto.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from utils.config import AVANCE_MINIMO_ESTANCAMIENTO, obtener_ventana_estancamiento
+
+class TransferenciaEstancadaError(Exception):
+    """La transferencia no avanzó durante la ventana de vigilancia."""
+
+class VigilanteEstancamiento:
+    """
+    Vigila el avance de las transferencias activas.
+
+    Attributes:
+        estancamientos: Host -> número de transferencias estancadas detectadas
+    """
+
+    def __init__(self):
+        """Inicializa el vigilante sin transferencias."""
+        self._transferencias: Dict[int, dict] = {}
+        self.estancamientos: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+
+    def registrar(self, id_descarga: int, host: str,
+                  aviso_callback: Optional[Callable[[str], None]] = None,
+                  cortar_callback: Optional[Callable[[], None]] = None) -> None:
+        """
+        Empieza a vigilar una transferencia.
+
+        Args:
+            id_descarga: ID de la descarga
+            host: Host del que se descarga
+            aviso_callback: Función a la que notificar que se estancó
+            cortar_callback: Función que cierra la conexión de la transferencia
+                             (se llama desde el hilo del vigilante)
+        """
+        # La ventana se lee una vez por transferencia, no en cada comprobación
+        ventana = obtener_ventana_estancamiento()
+        with self._lock:
+            self._transferencias[id_descarga] = {
+                'host': host,
+                'bytes': 0,
+                'momento': time.monotonic(),
+                'ventana': ventana,
+                'estancada': False,
+                'aviso': aviso_callback,
+                'cortar': cortar_callback,
+            }
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, daemon=True)
+                self._hilo.start()
+
+    def quitar(self, id_descarga: int) -> None:
+        """
+        Deja de vigilar una transferencia.
+
+        Args:
+            id_descarga: ID de la descarga
+        """
+        with self._lock:
+            self._transferencias.pop(id_descarga, None)
+
+    def alimentar(self, id_descarga: int, bytes_descargados: int) -> None:
+        """
+        Registra el avance de una transferencia (se llama desde el hook de progreso).
+
+        Solo cuenta como avance un aumento de al menos AVANCE_MINIMO_ESTANCAMIENTO
+        bytes, para que un goteo de datos también se considere estancado.
+
+        Args:
+            id_descarga: ID de la descarga
+            bytes_descargados: Bytes descargados hasta ahora
+        """
+        with self._lock:
+            transferencia = self._transferencias.get(id_descarga)
+            if transferencia is None:
+                return
+            if (bytes_descargados < transferencia['bytes']
+                    or bytes_descargados - transferencia['bytes'] >= AVANCE_MINIMO_ESTANCAMIENTO):
+                transferencia['bytes'] = bytes_descargados
+                transferencia['momento'] = time.monotonic()
+
+    def comprobar(self, id_descarga: int) -> None:
+        """
+        Interrumpe la transferencia si el vigilante la marcó como estancada.
+
+        Args:
+            id_descarga: ID de la descarga
+
+        Raises:
+            TransferenciaEstancadaError: Si la transferencia está estancada
+        """
+        with self._lock:
+            transferencia = self._transferencias.get(id_descarga)
+            estancada = transferencia is not None and transferencia['estancada']
+        if estancada:
+            raise TransferenciaEstancadaError(
+                f"Transferencia estancada: sin avance en {transferencia['ventana']:.0f} s")
+
+    def _bucle(self) -> None:
+        """Comprueba periódicamente el avance de todas las transferencias."""
+        while True:
+            time.sleep(1)
+            ahora = time.monotonic()
+            avisos = []
+            with self._lock:
+                for transferencia in self._transferencias.values():
+                    if (transferencia['estancada']
+                            or ahora - transferencia['momento'] < transferencia['ventana']):
+                        continue
+                    transferencia['estancada'] = True
+                    host = transferencia['host']
+                    self.estancamientos[host] = self.estancamientos.get(host, 0) + 1
+                    avisos.append((transferencia['aviso'], transferencia['cortar'], host,
+                                   self.estancamientos[host]))
+
+            for aviso, cortar, host, total in avisos:
+                print(f"Transferencia estancada en {host or '(desconocido)'} "
+                      f"({total} en esta sesión); se reabrirá la conexión")
+                if callable(aviso):
+                    aviso("Sin avance, reabriendo la conexión...")
+                if callable(cortar):
+                    # Despierta la lectura bloqueada; la descarga lo trata como estancamiento
+                    try:
+                        cortar()
+                    except Exception as e:
+                        print(f"Error al cortar la transferencia estancada: {str(e)}")
+
+    def estancamientos_por_host(self) -> Dict[str, int]:
+        """
+        Devuelve cuántas transferencias estancadas se detectaron por host.
+
+        Returns:
+            Diccionario host -> número de estancamientos
+        """
+        with self._lock:
+            return dict(self.estancamientos)
+
+# Vigilante compartido por todas las descargas
+vigilante_estancamiento = VigilanteEstancamiento()